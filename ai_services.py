@@ -10,6 +10,7 @@ import wikipedia
 from dotenv import load_dotenv
 
 from core_voice import speak
+from tracing import span
 
 load_dotenv()
 
@@ -61,6 +62,7 @@ def get_api_keys():
     return WEATHER_API_KEY, NEWS_API_KEY
 
 
+@span("ai.chat")
 def get_chat_response(user_input):
     try:
         chat_completion = client.chat.completions.create(
@@ -88,6 +90,7 @@ def get_chat_response(user_input):
         return error_message
 
 
+@span("ai.wikipedia")
 def search_wikipedia(query):
     try:
         speak("Searching Wikipedia...")
@@ -154,6 +157,7 @@ def cache_api_response(func):
     return wrapper
 
 
+@span("ai.weather")
 @cache_api_response
 def get_weather(city):
     if not WEATHER_API_KEY or str(WEATHER_API_KEY).strip().startswith("#"):
@@ -188,10 +192,11 @@ def get_weather(city):
     return message
 
 
+@span("ai.news")
 @cache_api_response
 def get_daily_news(api_key, category="general", country="us", page_size=5):
     url = f"https://newsapi.org/v2/top-headlines?country={country}&category={category}&pageSize={page_size}&apiKey={api_key}"
-    response = requests.get(url)
+    response = requests.get(url, timeout=10)
     if response.status_code == 200:
         news_data = response.json()
         articles = news_data.get("articles", [])
@@ -12,6 +12,9 @@ DEFAULT_SETTINGS = {
     "wake_word_enabled": False,
     "wake_word": "hey assip",
     "offline_voice_mode": False,
+    "nlp_cache_warmup": True,
+    "metrics_interval": 2.0,
+    "metrics_history_resolution": 10.0,
 }
 
 
@@ -0,0 +1,147 @@
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from core_voice import silence_thread, speak, unsilence_thread
+from tracing import current_trace_id, span, start_trace
+
+
+MAX_WORKERS = 3
+# Jobs queued or running at once; more are turned away instead of piling up
+MAX_PENDING = 6
+# Seconds before a job that is still running is acknowledged
+ACK_AFTER = 2.0
+DEFAULT_DEADLINE = 30.0
+
+_executor = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(MAX_PENDING)
+_jobs = {}
+_jobs_lock = threading.Lock()
+_job_ids = itertools.count(1)
+_enabled = False
+
+
+def set_background_execution(enabled):
+    """Run slow handlers in the pool (True) or inline in the caller (False, the default)"""
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def is_background_execution():
+    return _enabled
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="assip-handler")
+        return _executor
+
+
+def _run_job(job, func, args, kwargs):
+    with _jobs_lock:
+        if job["state"] != "queued":
+            return None
+        job["state"] = "running"
+        job["thread"] = threading.get_ident()
+    try:
+        with start_trace("background", parent_id=job["trace_id"]), span(f"job.{job['label']}"):
+            return func(*args, **kwargs)
+    except Exception as e:
+        print(f"Error in background handler {job['label']}: {e}")
+    finally:
+        with _jobs_lock:
+            if job["state"] == "running":
+                job["state"] = "done"
+            # Pool threads are reused; the next job must be heard again
+            unsilence_thread(job["thread"])
+
+
+def _acknowledge(job):
+    if job["state"] in ("queued", "running"):
+        speak(f"Still working on {job['label']}...")
+
+
+def _expire(job):
+    with _jobs_lock:
+        if job["state"] not in ("queued", "running"):
+            return
+        running = job["state"] == "running"
+        job["state"] = "cancelled"
+        if running:
+            # The thread cannot be stopped; whatever it says from now on is dropped
+            silence_thread(job["thread"])
+    job["future"].cancel()
+    speak(f"Sorry, {job['label']} is taking too long, so I stopped waiting.")
+
+
+def _finish(job):
+    for timer in job["timers"]:
+        timer.cancel()
+    with _jobs_lock:
+        if job["state"] in ("queued", "running"):
+            job["state"] = "done"
+        _jobs.pop(job["id"], None)
+    _slots.release()
+
+
+def submit_job(label, func, *args, deadline=DEFAULT_DEADLINE, **kwargs):
+    """Run func in the handler pool with a deadline; None when the pool is full.
+
+    The user hears an acknowledgement when the job runs longer than
+    ACK_AFTER. Past its deadline the job is cancelled: dropped if it has not
+    started, silenced if it has.
+    """
+    if not _slots.acquire(blocking=False):
+        speak("I'm still working on earlier requests. Please try again in a moment.")
+        return None
+    job = {
+        "id": next(_job_ids),
+        "label": label,
+        "state": "queued",
+        "thread": None,
+        "future": None,
+        "trace_id": current_trace_id(),
+    }
+    job["timers"] = [threading.Timer(ACK_AFTER, _acknowledge, (job,)), threading.Timer(deadline, _expire, (job,))]
+    with _jobs_lock:
+        _jobs[job["id"]] = job
+    try:
+        job["future"] = _get_executor().submit(_run_job, job, func, args, kwargs)
+    except RuntimeError:
+        _finish(job)
+        raise
+    for timer in job["timers"]:
+        timer.daemon = True
+        timer.start()
+    job["future"].add_done_callback(lambda _: _finish(job))
+    return job
+
+
+def run_slow(label, deadline, func, *args, **kwargs):
+    """Call func in the background when enabled, otherwise right away"""
+    if _enabled:
+        return submit_job(label, func, *args, deadline=deadline, **kwargs)
+    return func(*args, **kwargs)
+
+
+def list_jobs():
+    """Labels and states of the jobs that are queued or running"""
+    with _jobs_lock:
+        return [{"id": job["id"], "label": job["label"], "state": job["state"]} for job in _jobs.values()]
+
+
+def cancel_jobs():
+    """Cancel every queued or running job; returns how many were cancelled"""
+    with _jobs_lock:
+        jobs = [job for job in _jobs.values() if job["state"] in ("queued", "running")]
+        for job in jobs:
+            if job["state"] == "running":
+                silence_thread(job["thread"])
+            job["state"] = "cancelled"
+    for job in jobs:
+        if job["future"] is not None:
+            job["future"].cancel()
+    return len(jobs)
@@ -0,0 +1,390 @@
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from contextlib import ExitStack, redirect_stdout
+from io import StringIO
+from unittest.mock import patch
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+TOKENIZER_CORPUS = [
+    "what's the weather like in new york?",
+    "open youtube.com",
+    "send a message to mom saying \"i'll be home soon\"",
+    "tell me the latest sports news",
+    "search wikipedia for albert einstein",
+    "open notepad application",
+    "set volume to 50%",
+    "remind me to call dad in 10 minutes",
+    "check my internet speed",
+    "add task buy milk in 5 minutes",
+    "what is my ip address",
+    "can't you find cheap flights to paris, please!",
+]
+
+
+def time_per_call(func, inputs, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text in inputs:
+            func(text)
+    return (time.perf_counter() - started) / (repeat * len(inputs))
+
+
+def bench_tokenizer(repeat=500):
+    """Compare the fast tokenizer with nltk.word_tokenize on command text"""
+    from nltk.tokenize import word_tokenize
+
+    import nlp_processor
+
+    fast = time_per_call(nlp_processor.fast_tokenize, TOKENIZER_CORPUS, repeat)
+    print(f"fast_tokenize:  {fast * 1e6:8.1f} us/call")
+    try:
+        word_tokenize("warm up punkt")
+    except LookupError as e:
+        print(f"word_tokenize unavailable: {e}")
+        return {"fast_us": fast * 1e6}
+    slow = time_per_call(word_tokenize, TOKENIZER_CORPUS, repeat)
+    print(f"word_tokenize:  {slow * 1e6:8.1f} us/call")
+    print(f"speedup:        {slow / fast:8.1f}x")
+    return {"fast_us": fast * 1e6, "nltk_us": slow * 1e6}
+
+
+# Labeled corpus and regression baseline
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_corpus.json")
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+# command_router callables and the intent a call to them stands for
+ROUTE_HANDLERS = {
+    "web_search": "web_search",
+    "open_website": "open_website",
+    "get_weather": "weather",
+    "get_daily_news": "news",
+    "get_ip_mac": "system_info",
+    "get_system_info": "system_info",
+    "report_cpu_usage": "system_info",
+    "report_memory_usage": "system_info",
+    "report_disk_usage": "system_info",
+    "report_battery": "system_info",
+    "report_battery_drain": "system_info",
+    "report_metric_trend": "system_info",
+    "send_whatsapp_message": "whatsapp",
+    "search_wikipedia": "wikipedia",
+    "send_sos_sms": "emergency",
+    "open_app": "app_control",
+    "process_system_control": "system_control",
+    "adjust_volume": "system_control",
+    "open_file_explorer": "file_explorer",
+    "check_internet_speed": "internet_speed",
+    "set_reminder": "set_reminder",
+    "get_chat_response": "general_query",
+    "take_screenshot": "screenshot",
+    "add_task": "tasks",
+    "list_tasks": "tasks",
+    "complete_tasks": "tasks",
+    "delete_tasks": "tasks",
+    "clear_completed_tasks": "tasks",
+    "search_tasks": "tasks",
+    "get_usage_summary": "usage",
+}
+# Routes that also count as correct for a labeled intent
+ROUTE_EQUIVALENTS = {
+    "system_control": {"system_info"},
+}
+
+
+def load_corpus(path=CORPUS_PATH):
+    """Return the labeled corpus as a list of (utterance, intent)"""
+    with open(path, "r") as f:
+        data = json.load(f)
+    return [(text, intent) for intent, texts in data.items() for text in texts]
+
+
+def summarize_latencies(latencies, correct, labels):
+    latencies_ms = np.asarray(latencies) * 1000
+    correct = np.asarray(correct, dtype=bool)
+    per_intent = {}
+    for label in sorted(set(labels)):
+        mask = np.asarray(labels) == label
+        per_intent[label] = float(correct[mask].mean())
+    return {
+        "count": len(latencies),
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "throughput_per_s": float(len(latencies) / (latencies_ms.sum() / 1000)) if latencies_ms.sum() else 0.0,
+        "accuracy": float(correct.mean()),
+        "per_intent_accuracy": per_intent,
+    }
+
+
+def bench_nlp(corpus):
+    """Latency and intent accuracy of nlp_processor.process_nlp, cache cold"""
+    import nlp_processor
+
+    nlp_processor.get_intent_index()
+    nlp_processor.clear_nlp_cache()
+    latencies, correct, labels = [], [], []
+    for text, intent in corpus:
+        started = time.perf_counter()
+        result = nlp_processor.process_nlp(text)
+        latencies.append(time.perf_counter() - started)
+        correct.append(result["intent"] == intent)
+        labels.append(intent)
+    return summarize_latencies(latencies, correct, labels)
+
+
+def _route_recorder(calls, name):
+    def record(*args, **kwargs):
+        calls.append(ROUTE_HANDLERS.get(name, name))
+        if name == "add_task":
+            return {"id": 1, "title": str(args[0]) if args else ""}
+        if name in ("complete_tasks", "delete_tasks", "search_tasks"):
+            return []
+        return None
+    return record
+
+
+def bench_router(corpus):
+    """Latency and routing accuracy of command_router.process_command.
+
+    Every handler is replaced by a recorder, so only routing, NLP and the
+    storage the router touches are timed. Storage goes to a temporary folder.
+    """
+    import command_router
+    import task_manager
+    import usage_tracker
+
+    calls = []
+    latencies, correct, labels = [], [], []
+    with tempfile.TemporaryDirectory() as tmp, ExitStack() as stack:
+        stack.enter_context(patch.object(usage_tracker, "USAGE_PATH", os.path.join(tmp, "usage_log.json")))
+        stack.callback(usage_tracker.flush_usage)
+        stack.enter_context(patch.object(task_manager, "TASKS_PATH", os.path.join(tmp, "tasks.json")))
+        stack.enter_context(patch.object(task_manager, "TASKS_DB_PATH", os.path.join(tmp, "tasks.db")))
+        stack.callback(task_manager.close_task_store)
+        for name in ROUTE_HANDLERS:
+            stack.enter_context(patch.object(command_router, name, _route_recorder(calls, name)))
+        stack.enter_context(patch.object(command_router, "speak", lambda *a, **k: None))
+        stack.enter_context(patch.object(command_router, "take_command", lambda *a, **k: "ok"))
+        stack.enter_context(redirect_stdout(StringIO()))
+        for text, intent in corpus:
+            del calls[:]
+            started = time.perf_counter()
+            command_router.process_command(text)
+            latencies.append(time.perf_counter() - started)
+            route = calls[0] if calls else "none"
+            correct.append(route == intent or route in ROUTE_EQUIVALENTS.get(intent, ()))
+            labels.append(intent)
+    return summarize_latencies(latencies, correct, labels)
+
+
+def bench_dispatch(corpus, repeat=5):
+    """Time finding the first matching router rule: one re.search per rule vs the compiled router"""
+    import command_router
+
+    texts = [text.lower().strip() for text, _ in corpus]
+    # Rules with an empty pattern (custom actions) decline for almost every command
+    rules = [route for route in command_router.get_routes() if route.pattern]
+    separate = [re.compile(route.pattern) for route in rules]
+    router = command_router.compile_router(rules)
+
+    def sequential(text):
+        for position, regex in enumerate(separate):
+            if regex.search(text):
+                return position
+        return None
+
+    def compiled(text):
+        remaining = command_router.candidate_rules(router, text)
+        patterns = tuple(rules[position].pattern for position in remaining)
+        found = command_router.search_first_match(command_router._compile_rules(patterns), text)
+        return remaining[found[0]] if found else None
+
+    mismatches = sum(sequential(text) != compiled(text) for text in texts)
+    before = time_per_call(sequential, texts, repeat)
+    after = time_per_call(compiled, texts, repeat)
+    print(f"re.search chain: {before * 1e6:8.1f} us/command")
+    print(f"compiled router: {after * 1e6:8.1f} us/command")
+    print(f"speedup:         {before / after:8.1f}x ({mismatches} routing mismatches)")
+    return {"sequential_us": before * 1e6, "compiled_us": after * 1e6, "mismatches": mismatches}
+
+
+def bench_tasks(count=100000, repeat=200):
+    """Task store operations with count saved tasks, against rewriting them as tasks.json"""
+    import task_manager
+
+    created = "2026-01-01T09:00:00"
+    legacy = [
+        {
+            "id": task_id,
+            "title": f"task number {task_id}",
+            "created_at": created,
+            "due_at": "2099-01-01T09:00:00" if task_id % 4 else None,
+            "completed": task_id % 3 == 0,
+            "notified": False,
+        }
+        for task_id in range(1, count + 1)
+    ]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp, ExitStack() as stack:
+        json_path = os.path.join(tmp, "tasks.json")
+        stack.enter_context(patch.object(task_manager, "TASKS_PATH", json_path))
+        stack.enter_context(patch.object(task_manager, "TASKS_DB_PATH", os.path.join(tmp, "tasks.db")))
+        stack.callback(task_manager.close_task_store)
+        stack.enter_context(redirect_stdout(StringIO()))
+
+        started = time.perf_counter()
+        with open(json_path, "w") as f:
+            json.dump(legacy, f, indent=2)
+        with open(json_path, "r") as f:
+            json.load(f)
+        results["json_rewrite_ms"] = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        task_manager.list_tasks()
+        results["migration_ms"] = (time.perf_counter() - started) * 1000
+
+        ids = np.random.default_rng(0).integers(1, count + 1, size=repeat)
+        operations = {
+            "add_task": lambda i: task_manager.add_task(f"benchmark task {i}", 60),
+            "complete_task": lambda i: task_manager.complete_task(int(ids[i])),
+            "pop_due_tasks": lambda i: task_manager.pop_due_tasks(),
+        }
+        for name, operation in operations.items():
+            started = time.perf_counter()
+            for i in range(repeat):
+                operation(i)
+            results[f"{name}_us"] = (time.perf_counter() - started) / repeat * 1e6
+        started = time.perf_counter()
+        pending = task_manager.list_tasks()
+        results["list_tasks_ms"] = (time.perf_counter() - started) * 1000
+
+    print(f"{count} tasks ({len(pending)} pending)")
+    print(f"tasks.json load + rewrite (every call before): {results['json_rewrite_ms']:9.1f} ms")
+    print(f"one-time migration from tasks.json:            {results['migration_ms']:9.1f} ms")
+    for name in operations:
+        print(f"{name + ':':<47}{results[name + '_us']:9.1f} us")
+    print(f"{'list_tasks:':<47}{results['list_tasks_ms']:9.1f} ms")
+    return results
+
+
+def compare_to_baseline(results, baseline, latency_tolerance=0.25, accuracy_tolerance=0.01):
+    """Return a list of regressions of results against a saved baseline"""
+    failures = []
+    for layer, current in results.items():
+        previous = baseline.get(layer)
+        if not previous:
+            continue
+        if "count" in previous and current["count"] != previous["count"]:
+            failures.append(f"{layer} ran {current['count']} commands, baseline has {previous['count']}")
+            continue
+        # Latency depends on the machine, so only baselines saved with --include-latency have it
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if key not in previous:
+                continue
+            limit = previous[key] * (1 + latency_tolerance)
+            if current[key] > limit:
+                failures.append(f"{layer} {key} {current[key]:.3f} > {limit:.3f} (baseline {previous[key]:.3f})")
+        if current["accuracy"] < previous["accuracy"] - accuracy_tolerance:
+            failures.append(f"{layer} accuracy {current['accuracy']:.3f} < baseline {previous['accuracy']:.3f}")
+    return failures
+
+
+def baseline_from_results(results, include_latency=False):
+    """The part of the results worth keeping as a baseline: accuracy, plus latency for this machine only"""
+    keys = ("count", "accuracy") + (("p50_ms", "p95_ms", "p99_ms") if include_latency else ())
+    return {layer: {key: summary[key] for key in keys} for layer, summary in results.items()}
+
+
+def print_summary(layer, summary):
+    print(
+        f"{layer:>6}: n={summary['count']} p50={summary['p50_ms']:.3f}ms p95={summary['p95_ms']:.3f}ms "
+        f"p99={summary['p99_ms']:.3f}ms throughput={summary['throughput_per_s']:.0f}/s "
+        f"accuracy={summary['accuracy']:.3f}"
+    )
+
+
+def run_pipeline_benchmark(layers=("nlp", "router"), corpus_path=CORPUS_PATH, baseline_path=BASELINE_PATH,
+                           save_baseline=False, latency_tolerance=0.25, accuracy_tolerance=0.01, limit=None,
+                           include_latency=False):
+    """Benchmark the layers and compare them with the baseline; returns 1 on a regression or a missing baseline"""
+    corpus = load_corpus(corpus_path)
+    if limit:
+        corpus = corpus[::max(1, len(corpus) // limit)]
+    runners = {"nlp": bench_nlp, "router": bench_router}
+    results = {}
+    for layer in layers:
+        results[layer] = runners[layer](corpus)
+        print_summary(layer, results[layer])
+    if save_baseline:
+        with open(baseline_path, "w") as f:
+            json.dump(baseline_from_results(results, include_latency), f, indent=2)
+            f.write("\n")
+        print(f"Baseline saved to {baseline_path}")
+        return 0
+    if not os.path.exists(baseline_path):
+        # A gate without a baseline would pass whatever happened
+        print(f"No baseline at {baseline_path}; run with --save-baseline to create one.")
+        return 1
+    with open(baseline_path, "r") as f:
+        baseline = json.load(f)
+    failures = compare_to_baseline(results, baseline, latency_tolerance, accuracy_tolerance)
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    return 1 if failures else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ASSIP performance benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+    tokenizer_parser = subparsers.add_parser("tokenizer", help="fast tokenizer vs word_tokenize")
+    tokenizer_parser.add_argument("--repeat", type=int, default=500)
+    dispatch_parser = subparsers.add_parser("dispatch", help="router rule matching: re.search chain vs compiled table")
+    dispatch_parser.add_argument("--corpus", default=CORPUS_PATH)
+    dispatch_parser.add_argument("--repeat", type=int, default=5)
+    tasks_parser = subparsers.add_parser("tasks", help="SQLite task store vs rewriting tasks.json")
+    tasks_parser.add_argument("--count", type=int, default=100000)
+    tasks_parser.add_argument("--repeat", type=int, default=200)
+    pipeline_parser = subparsers.add_parser("pipeline", help="NLP and router latency/accuracy on the labeled corpus")
+    pipeline_parser.add_argument("--layers", nargs="+", choices=["nlp", "router"], default=["nlp", "router"])
+    pipeline_parser.add_argument("--corpus", default=CORPUS_PATH)
+    pipeline_parser.add_argument("--baseline", default=BASELINE_PATH)
+    pipeline_parser.add_argument("--save-baseline", action="store_true")
+    pipeline_parser.add_argument("--include-latency", action="store_true",
+                                 help="also save latencies; use with a --baseline file kept on this machine")
+    pipeline_parser.add_argument("--latency-tolerance", type=float, default=0.25)
+    pipeline_parser.add_argument("--accuracy-tolerance", type=float, default=0.01)
+    pipeline_parser.add_argument("--limit", type=int, help="run on an evenly spaced sample of this size")
+    args = parser.parse_args(argv)
+
+    if args.benchmark == "tokenizer":
+        bench_tokenizer(args.repeat)
+    elif args.benchmark == "dispatch":
+        return 1 if bench_dispatch(load_corpus(args.corpus), args.repeat)["mismatches"] else 0
+    elif args.benchmark == "tasks":
+        bench_tasks(args.count, args.repeat)
+    elif args.benchmark == "pipeline":
+        return run_pipeline_benchmark(
+            args.layers,
+            args.corpus,
+            args.baseline,
+            args.save_baseline,
+            args.latency_tolerance,
+            args.accuracy_tolerance,
+            args.limit,
+            args.include_latency,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
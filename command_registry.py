@@ -0,0 +1,119 @@
+from collections import namedtuple
+
+
+# A routed rule. handler is called with the arguments parsed by args_schema
+# and handles the command unless it returns False. anchors are words of which
+# at least one appears in every text the pattern matches, or a function
+# returning them; None means the route is always tried.
+Route = namedtuple("Route", ["name", "pattern", "handler", "anchors", "priority", "args_schema", "order"])
+
+# Argument sources besides group numbers
+COMMAND = "command"  # the command as heard
+TEXT = "text"  # the lowercased, stripped command
+
+_routes = {}
+_intent_handlers = {}
+_custom_actions = {}
+_version = 0
+
+
+def _bump():
+    global _version
+    _version += 1
+
+
+def get_registry_version():
+    return _version
+
+
+def register_route(name, pattern, handler, priority=100, anchors=None, args=None):
+    """Add or replace a route. Lower priorities are tried first, ties in registration order.
+
+    args maps a handler argument to a group number of pattern, a (group
+    number, converter) pair, COMMAND or TEXT.
+    """
+    previous = _routes.get(name)
+    order = previous.order if previous else len(_routes)
+    _routes[name] = Route(name, pattern, handler, anchors, priority, dict(args or {}), order)
+    _bump()
+
+
+def route(name, pattern, priority=100, anchors=None, args=None):
+    """Decorator form of register_route"""
+    def decorator(func):
+        register_route(name, pattern, func, priority, anchors, args)
+        return func
+    return decorator
+
+
+def unregister_route(name):
+    if _routes.pop(name, None) is None:
+        return False
+    _bump()
+    return True
+
+
+def get_routes():
+    """Registered routes in the order they are tried"""
+    return sorted(_routes.values(), key=lambda r: (r.priority, r.order))
+
+
+def parse_route_args(route_, groups, command, text):
+    """Build the handler arguments of a route from its match groups"""
+    parsed = {}
+    for arg, source in route_.args_schema.items():
+        if source == COMMAND:
+            parsed[arg] = command
+        elif source == TEXT:
+            parsed[arg] = text
+        else:
+            group, converter = source if isinstance(source, tuple) else (source, None)
+            value = groups[group - 1]
+            parsed[arg] = converter(value) if converter and value is not None else value
+    return parsed
+
+
+def intent_handler(*intents, requires=()):
+    """Register a handler(command, text, entities) for NLP intents.
+
+    The handler is only used when every entity in requires was extracted.
+    """
+    def decorator(func):
+        for intent in intents:
+            _intent_handlers[intent] = (func, tuple(requires))
+        _bump()
+        return func
+    return decorator
+
+
+def get_intent_handler(intent, entities):
+    """The handler for intent if the entities it requires are present, else None"""
+    registered = _intent_handlers.get(intent)
+    if registered is None:
+        return None
+    handler, requires = registered
+    if all(entity in entities for entity in requires):
+        return handler
+    return None
+
+
+def custom_action(kind, argument=False):
+    """Register a handler for custom command actions "kind" or, with argument, "kind:<argument>" """
+    def decorator(func):
+        _custom_actions[kind.lower()] = (func, argument)
+        _bump()
+        return func
+    return decorator
+
+
+def parse_custom_action(action):
+    """Return (handler, argument) for a custom command action, or None"""
+    action = str(action).strip()
+    kind, separator, argument = action.partition(":")
+    registered = _custom_actions.get(kind.lower())
+    if registered is None:
+        return None
+    handler, takes_argument = registered
+    if takes_argument != bool(separator):
+        return None
+    return handler, argument.strip() if takes_argument else None
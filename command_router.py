@@ -1,8 +1,5 @@
 import re
-import os
-import shutil
-
-import psutil
+from functools import lru_cache
 
 from ai_services import (
     extract_category,
@@ -14,10 +11,24 @@ from ai_services import (
     search_wikipedia,
     web_search,
 )
+from background_jobs import cancel_jobs, run_slow
+from command_registry import (
+    COMMAND,
+    TEXT,
+    custom_action,
+    get_intent_handler,
+    get_registry_version,
+    get_routes,
+    intent_handler,
+    parse_custom_action,
+    parse_route_args,
+    route,
+)
 from core_voice import speak, take_command
-from custom_commands import find_action
+from custom_commands import find_action, get_custom_commands_version, list_custom_phrases
+from keyword_automaton import build_automaton, find_keywords
 from messaging_services import send_sos_sms, send_whatsapp_message
-from nlp_processor import process_nlp
+from nlp_processor import INTENT_THRESHOLD, compile_first_match, extract_entities, process_nlp, search_first_match
 from system_services import (
     adjust_volume,
     check_internet_speed,
@@ -26,45 +37,431 @@ from system_services import (
     open_app,
     open_file_explorer,
     process_system_control,
+    report_battery,
+    report_battery_drain,
+    report_cpu_usage,
+    report_disk_usage,
+    report_memory_usage,
+    report_metric_trend,
     set_reminder,
+    take_screenshot,
 )
-from task_manager import add_task, complete_task, delete_task, list_tasks
+from task_manager import add_task, clear_completed_tasks, complete_tasks, delete_tasks, list_tasks, search_tasks
+from tracing import span, start_trace
 from usage_tracker import get_usage_summary, log_event
 
+# Intents the router may act on as the runner-up when the best intent cannot be
+# handled: lookups without side effects, and only with a clear lead over the next
+RUNNER_UP_INTENTS = ("weather", "news", "wikipedia", "system_info")
+RUNNER_UP_MARGIN = 0.1
+
+# Seconds a background handler may take before the assistant stops waiting
+HANDLER_DEADLINES = {
+    "chat": 30,
+    "internet_speed": 40,
+    "news": 20,
+    "weather": 20,
+    "whatsapp": 60,
+    "wikipedia": 20,
+}
+
+TASK_ANCHORS = ("task", "todo")
+# "3", "3, 5 and 7", "3 & 4"
+TASK_IDS = r"(\d+(?:(?:\s*,\s*(?:and\s+)?|\s+and\s+|\s*&\s*)\d+)*)"
+VOLUME_ANCHORS = ("volume", "sound")
+
+
+@custom_action("system_info")
+def _action_system_info(argument):
+    get_system_info()
+
+
+@custom_action("internet_speed")
+def _action_internet_speed(argument):
+    check_internet_speed()
+
+
+@custom_action("open_app", argument=True)
+def _action_open_app(app_name):
+    open_app(app_name)
+    speak(f"Opening {app_name}")
+    log_event("app", app_name)
+
+
+@custom_action("open_website", argument=True)
+def _action_open_website(website):
+    open_website(website)
+
+
+@custom_action("web_search", argument=True)
+def _action_web_search(query):
+    web_search(query)
+
+
+@custom_action("say", argument=True)
+def _action_say(text):
+    speak(text)
+
 
 def execute_custom_action(action):
-    action = str(action).strip()
-    if not action:
+    parsed = parse_custom_action(action)
+    if parsed is None:
         return False
-    lowered = action.lower()
-    if lowered == "system_info":
-        get_system_info()
-        return True
-    if lowered == "internet_speed":
-        check_internet_speed()
-        return True
-    if lowered.startswith("open_app:"):
-        app_name = action.split(":", 1)[1].strip()
-        open_app(app_name)
-        speak(f"Opening {app_name}")
-        log_event("app", app_name)
-        return True
-    if lowered.startswith("open_website:"):
-        website = action.split(":", 1)[1].strip()
-        open_website(website)
-        return True
-    if lowered.startswith("web_search:"):
-        query = action.split(":", 1)[1].strip()
-        web_search(query)
-        return True
-    if lowered.startswith("say:"):
-        text = action.split(":", 1)[1].strip()
-        speak(text)
-        return True
-    return False
+    handler, argument = parsed
+    handler(argument)
+    return True
+
+
+# Routes tried in priority order before NLP; see command_registry.route.
+@route("cancel", r"^(?:cancel|stop)(?:\s+(?:that|it|everything|all))?$", 5, ("cancel", "stop"))
+def _route_cancel():
+    cancelled = cancel_jobs()
+    if cancelled:
+        speak(f"Cancelled {cancelled} request{'s' if cancelled != 1 else ''}.")
+    else:
+        speak("There is nothing to cancel.")
+
+
+@route("usage", r"(app|assistant|usage)\s+(report|summary|stats|statistics)", 10, ("report", "summary", "stat"))
+def _route_usage():
+    summary = get_usage_summary()
+    speak(summary)
+
+
+@route(
+    "add_task",
+    r"(?:add|create)\s+(?:task|todo)\s+(.+?)(?:\s+in\s+(\d+)\s+minutes?)?(?:\?|$)",
+    20,
+    TASK_ANCHORS,
+    {"title": 1, "minutes": 2},
+)
+def _route_add_task(title, minutes):
+    title = title.strip()
+    task = add_task(title, minutes=minutes)
+    due_text = f" due in {minutes} minutes" if minutes else ""
+    speak(f"Task {task['id']} added{due_text}: {task['title']}")
+
+
+def _read_tasks(tasks):
+    return " | ".join(f"{t['id']}. {t['title']}" for t in tasks[:10])
+
+
+@route("list_tasks", r"(list|show|view)\s+(?:my\s+)?(?:tasks|todos)", 30, TASK_ANCHORS)
+def _route_list_tasks():
+    tasks = list_tasks()
+    if not tasks:
+        speak("You have no pending tasks.")
+        return
+    speak("Your tasks are: " + _read_tasks(tasks))
+
+
+def parse_task_ids(text):
+    """Task numbers in the order spoken, without repeats"""
+    return list(dict.fromkeys(int(number) for number in re.findall(r"\d+", text)))
+
+
+def _describe_ids(task_ids):
+    names = [str(task_id) for task_id in task_ids]
+    label = "Task" if len(names) == 1 else "Tasks"
+    if len(names) > 1:
+        names = [", ".join(names[:-1]), names[-1]]
+    return f"{label} {' and '.join(names)}"
+
+
+def _report_batch(task_ids, done_ids, verb):
+    missing = [task_id for task_id in task_ids if task_id not in done_ids]
+    if done_ids:
+        speak(f"{_describe_ids(done_ids)} {verb}.")
+    if missing:
+        speak(f"{_describe_ids(missing)} not found.")
+
+
+@route(
+    "complete_task",
+    rf"(?:complete|finish|done)\s+(?:task|todo)s?\s+{TASK_IDS}",
+    40,
+    TASK_ANCHORS,
+    {"task_ids": (1, parse_task_ids)},
+)
+def _route_complete_task(task_ids):
+    completed = complete_tasks(task_ids)
+    _report_batch(task_ids, [task["id"] for task in completed], "marked completed")
+
+
+@route(
+    "complete_named_task",
+    r"(?:complete|finish)\s+(?:the|my)\s+(.+?)\s+(?:task|todo)\b",
+    42,
+    TASK_ANCHORS,
+    {"query": 1},
+)
+def _route_complete_named_task(query):
+    matches = search_tasks(query)
+    if not matches:
+        speak(f"I couldn't find a pending task about {query}.")
+    elif len(matches) > 1:
+        speak(f"{len(matches)} tasks match {query}: {_read_tasks(matches)}. Say complete task and its number.")
+    else:
+        task = complete_tasks([matches[0]["id"]])[0]
+        speak(f"Task {task['id']} marked completed: {task['title']}")
+
+
+@route(
+    "clear_completed_tasks",
+    r"(?:clear|delete|remove)\s+(?:all\s+)?(?:the\s+|my\s+)?(?:completed|finished|done)\s+(?:task|todo)s",
+    45,
+    TASK_ANCHORS,
+)
+def _route_clear_completed_tasks():
+    removed = clear_completed_tasks()
+    if removed:
+        speak(f"Cleared {removed} completed task{'s' if removed != 1 else ''}.")
+    else:
+        speak("There are no completed tasks to clear.")
+
+
+@route(
+    "delete_task",
+    rf"(?:delete|remove)\s+(?:task|todo)s?\s+{TASK_IDS}",
+    50,
+    TASK_ANCHORS,
+    {"task_ids": (1, parse_task_ids)},
+)
+def _route_delete_task(task_ids):
+    _report_batch(task_ids, delete_tasks(task_ids), "deleted")
+
+
+@route("custom_action", r"", 60, list_custom_phrases, {"text": TEXT})
+def _route_custom_action(text):
+    action = find_action(text)
+    if not (action and execute_custom_action(action)):
+        return False
+
+
+@route(
+    "volume",
+    r"(?:set|change|adjust)?\s*(?:the\s*)?(volume|sound)(?:\s*(?:level|up|down)?)?\s*(?:to|at)?\s*(\d+)(?:\s*percent|%)?",
+    70,
+    VOLUME_ANCHORS,
+    {"volume_level": (2, int)},
+)
+def _route_volume(volume_level):
+    print(f"Setting volume to {volume_level}%")
+    adjust_volume(volume_level)
+
+
+@route("volume_up", r"(volume|sound)\s+(up|increase|higher|louder)", 80, VOLUME_ANCHORS)
+def _route_volume_up():
+    adjust_volume(70)
+
+
+@route("volume_down", r"(volume|sound)\s+(down|decrease|lower|quieter)", 90, VOLUME_ANCHORS)
+def _route_volume_down():
+    adjust_volume(30)
+
+
+@route("mute", r"mute|quiet|silence", 100, ("mute", "quiet", "silence"))
+def _route_mute():
+    adjust_volume(0)
+
+
+@route("system_info", r"(system|computer)\s+(info|information|status)", 110, ("system", "computer"))
+def _route_system_info():
+    get_system_info()
+
+
+@route(
+    "metric_trend",
+    r"(average|mean|peak|max(?:imum)?|highest)\s+(cpu|processor|memory|ram)",
+    115,
+    ("average", "mean", "peak", "max", "highest"),
+    {"stat": 1, "metric": 2, "command": COMMAND},
+)
+def _route_metric_trend(stat, metric, command):
+    report_metric_trend(stat, metric, command)
+
+
+@route("cpu", r"(cpu|processor)\s+(usage|info|status)", 120, ("cpu", "processor"))
+def _route_cpu():
+    report_cpu_usage()
+
+
+@route("memory", r"(memory|ram)\s+(usage|info|status)", 130, ("memory", "ram"))
+def _route_memory():
+    report_memory_usage()
+
+
+@route("disk", r"(disk|storage|drive)\s+(usage|info|status)", 140, ("disk", "storage", "drive"))
+def _route_disk():
+    report_disk_usage()
+
+
+@route(
+    "battery_drain",
+    r"battery\s+(?:drain|discharge)|how\s+fast\s+is\s+(?:the\s+|my\s+)?battery\s+(?:draining|dropping)",
+    145,
+    ("battery",),
+)
+def _route_battery_drain():
+    report_battery_drain()
+
+
+@route("battery", r"(battery|power)\s+(level|status|info)", 150, ("battery", "power"))
+def _route_battery():
+    report_battery()
+
+
+@route("screenshot", r"(?:take|grab|capture)\s+(?:a\s+)?screenshot", 160, ("screenshot",))
+def _route_screenshot():
+    take_screenshot()
+
+
+@route(
+    "find_task",
+    r"(?:find|look\s+for)\s+(?:my\s+|the\s+|a\s+)?(?:task|todo)s?\s+(?:about\s+|for\s+|called\s+|named\s+|with\s+)?(.+)",
+    165,
+    TASK_ANCHORS,
+    {"query": 1},
+)
+def _route_find_task(query):
+    matches = search_tasks(query)
+    if not matches:
+        speak(f"I couldn't find a pending task about {query}.")
+    else:
+        count = f"{len(matches)} tasks match" if len(matches) > 1 else "1 task matches"
+        speak(f"{count} {query}: {_read_tasks(matches)}")
+
+
+@route(
+    "search",
+    r"(?:search|look\s+(?:up|for)|find|google)\s+(?:for\s+)?(.*)",
+    170,
+    ("search", "look", "find", "google"),
+    {"search_query": 1},
+)
+def _route_search(search_query):
+    search_query = search_query.strip()
+    if not search_query:
+        return False
+    web_search(search_query)
+
+
+@route(
+    "file_explorer",
+    r"(open|launch|show)(?:\s+(?:the|my))?\s+(?:file(?:\s+)?(?:explorer|manager)|documents|files)",
+    180,
+    ("file", "documents"),
+)
+def _route_file_explorer():
+    open_file_explorer()
+
+
+@route(
+    "internet_speed",
+    r"(check|test|what's|how's|measure)(?:\s+(?:the|my))?\s+(?:internet|network|wifi|wi-fi|connection)(?:\s+speed)?",
+    190,
+    ("internet", "network", "wifi", "wi-fi", "connection"),
+)
+def _route_internet_speed():
+    run_slow("the speed test", HANDLER_DEADLINES["internet_speed"], check_internet_speed)
+
+
+@route(
+    "reminder",
+    r"(?:set|create|add|remind\s+me\s+(?:about|of))(?:\s+a)?\s+reminder\s+(?:for|about|to)?\s+(.+?)(?:\s+in\s+(\d+)\s+minutes?)?(?:\?|$|please)",
+    200,
+    ("reminder",),
+    {"title": 1, "minutes": 2},
+)
+def _route_reminder(title, minutes):
+    title = title.strip()
+    minutes = minutes if minutes else "5"
+    set_reminder(title, minutes)
+
+
+def compile_router(routes):
+    """Build the dispatch structure for a list of routes.
+
+    One pass of a keyword automaton over the command finds the anchors it
+    contains and so the candidate routes; the patterns of each candidate set
+    are combined into one regex on first use.
+    """
+    always = []
+    anchor_rules = {}
+    for position, route_ in enumerate(routes):
+        anchors = route_.anchors
+        if anchors is None:
+            always.append(position)
+            continue
+        if callable(anchors):
+            anchors = anchors()
+        for anchor in anchors:
+            anchor_rules.setdefault(anchor, set()).add(position)
+    return {
+        "rules": list(routes),
+        "always": frozenset(always),
+        "automaton": build_automaton(anchor_rules),
+        "anchor_rules": anchor_rules,
+    }
+
+
+@lru_cache(maxsize=256)
+def _compile_rules(patterns):
+    return compile_first_match(patterns, 0)
+
+
+def candidate_rules(router, normalized_command):
+    """Positions of the rules that can match, in table order"""
+    candidates = set(router["always"])
+    for anchor in find_keywords(router["automaton"], normalized_command):
+        candidates |= router["anchor_rules"][anchor]
+    return sorted(candidates)
+
+
+def dispatch_rules(command, normalized_command, router=None):
+    """Run the first matching rule; return its name, or None when no rule handled the command.
+
+    The candidate patterns are tried with one combined regex. A declining
+    handler resumes the search with the candidates after it.
+    """
+    if router is None:
+        router = get_router()
+    rules = router["rules"]
+    remaining = candidate_rules(router, normalized_command)
+    while remaining:
+        found = search_first_match(_compile_rules(tuple(rules[position].pattern for position in remaining)), normalized_command)
+        if found is None:
+            return None
+        index, groups = found
+        route_ = rules[remaining[index]]
+        with span(f"route.{route_.name}"):
+            handled = route_.handler(**parse_route_args(route_, groups, command, normalized_command)) is not False
+        if handled:
+            return route_.name
+        remaining = remaining[index + 1:]
+    return None
+
+
+_router = None
+_router_state = None
+
+
+def get_router():
+    """The compiled registered routes, rebuilt when routes or custom commands change"""
+    global _router, _router_state
+    state = (get_registry_version(), get_custom_commands_version())
+    if _router is None or state != _router_state:
+        _router = compile_router(get_routes())
+        _router_state = state
+    return _router
 
 
 def process_command(command):
+    with start_trace("command"):
+        _process_command(command)
+
+
+def _process_command(command):
     if not command:
         speak("I didn't hear anything. Please try again.")
         return
@@ -72,195 +469,122 @@ def process_command(command):
     normalized_command = command.lower().strip()
     log_event("command", normalized_command)
 
-    usage_match = re.search(r"(app|assistant|usage)\s+(report|summary|stats|statistics)", normalized_command)
-    if usage_match:
-        summary = get_usage_summary()
-        speak(summary)
+    with span("router.dispatch"):
+        handled = dispatch_rules(command, normalized_command)
+    if handled:
         return
 
-    add_task_match = re.search(r"(?:add|create)\s+(?:task|todo)\s+(.+?)(?:\s+in\s+(\d+)\s+minutes?)?(?:\?|$)", normalized_command)
-    if add_task_match:
-        title = add_task_match.group(1).strip()
-        minutes = add_task_match.group(2)
-        task = add_task(title, minutes=minutes)
-        due_text = f" due in {minutes} minutes" if minutes else ""
-        speak(f"Task {task['id']} added{due_text}: {task['title']}")
+    nlp_result = process_nlp(normalized_command)
+    if handle_intent(command, normalized_command, nlp_result["intent"], nlp_result["entities"]):
         return
 
-    list_task_match = re.search(r"(list|show|view)\s+(?:my\s+)?(?:tasks|todos)", normalized_command)
-    if list_task_match:
-        tasks = list_tasks()
-        if not tasks:
-            speak("You have no pending tasks.")
+    # The best intent could not be acted on; a clear runner-up lookup is cheaper than the LLM
+    intent = runner_up_intent(nlp_result.get("top_intents", []))
+    if intent is not None:
+        text = nlp_result.get("corrected_input", normalized_command)
+        if handle_intent(command, normalized_command, intent, extract_entities(text, intent)):
             return
-        lines = [f"{t['id']}. {t['title']}" for t in tasks[:10]]
-        speak("Your tasks are: " + " | ".join(lines))
-        return
 
-    complete_task_match = re.search(r"(?:complete|finish|done)\s+(?:task|todo)\s+(\d+)", normalized_command)
-    if complete_task_match:
-        task_id = int(complete_task_match.group(1))
-        task = complete_task(task_id)
-        if task:
-            speak(f"Task {task_id} marked completed.")
-        else:
-            speak(f"Task {task_id} not found.")
-        return
+    with span("intent.general_query"):
+        run_slow("your question", HANDLER_DEADLINES["chat"], get_chat_response, command)
 
-    delete_task_match = re.search(r"(?:delete|remove)\s+(?:task|todo)\s+(\d+)", normalized_command)
-    if delete_task_match:
-        task_id = int(delete_task_match.group(1))
-        ok = delete_task(task_id)
-        if ok:
-            speak(f"Task {task_id} deleted.")
-        else:
-            speak(f"Task {task_id} not found.")
-        return
 
-    custom_action = find_action(normalized_command)
-    if custom_action and execute_custom_action(custom_action):
-        return
+@intent_handler("open_website", requires=("website",))
+def _intent_open_website(command, text, entities):
+    open_website(entities["website"])
 
-    volume_match = re.search(
-        r"(?:set|change|adjust)?\s*(?:the\s*)?(volume|sound)(?:\s*(?:level|up|down)?)?\s*(?:to|at)?\s*(\d+)(?:\s*percent|%)?",
-        normalized_command,
-    )
-    if volume_match:
-        try:
-            volume_level = int(volume_match.group(2))
-            print(f"Setting volume to {volume_level}%")
-            adjust_volume(volume_level)
-            return
-        except (ValueError, IndexError):
-            speak("I couldn't understand the volume level. Please try again.")
-            return
 
-    if re.search(r"(volume|sound)\s+(up|increase|higher|louder)", normalized_command):
-        adjust_volume(70)
-        return
+@intent_handler("wikipedia", requires=("query",))
+def _intent_wikipedia(command, text, entities):
+    run_slow("the Wikipedia search", HANDLER_DEADLINES["wikipedia"], search_wikipedia, entities["query"])
 
-    if re.search(r"(volume|sound)\s+(down|decrease|lower|quieter)", normalized_command):
-        adjust_volume(30)
-        return
 
-    if re.search(r"mute|quiet|silence", normalized_command):
-        adjust_volume(0)
-        return
+@intent_handler("web_search", "search", requires=("query",))
+def _intent_web_search(command, text, entities):
+    web_search(entities["query"])
 
-    if re.search(r"(system|computer)\s+(info|information|status)", normalized_command):
-        get_system_info()
-        return
 
-    if re.search(r"(cpu|processor)\s+(usage|info|status)", normalized_command):
-        cpu_percent = psutil.cpu_percent(interval=1)
-        cpu_count = psutil.cpu_count(logical=False)
-        speak(f"CPU usage is currently {cpu_percent}% across {cpu_count} physical cores.")
-        return
+@intent_handler("weather", requires=("city",))
+def _intent_weather(command, text, entities):
+    run_slow("the weather", HANDLER_DEADLINES["weather"], get_weather, entities["city"])
 
-    if re.search(r"(memory|ram)\s+(usage|info|status)", normalized_command):
-        memory = psutil.virtual_memory()
-        memory_total = round(memory.total / (1024**3), 2)
-        memory_used = round(memory.used / (1024**3), 2)
-        speak(f"Memory usage is {memory.percent}%. {memory_used} gigabytes used out of {memory_total} gigabytes total.")
-        return
 
-    if re.search(r"(disk|storage|drive)\s+(usage|info|status)", normalized_command):
-        home_path = os.path.expanduser("~")
-        disk_usage = shutil.disk_usage(home_path)
-        disk_total = round(disk_usage.total / (1024**3), 2)
-        disk_used = round(disk_usage.used / (1024**3), 2)
-        disk_percent = round((disk_usage.used / disk_usage.total) * 100, 2)
-        speak(f"Disk usage is {disk_percent}%. {disk_used} gigabytes used out of {disk_total} gigabytes total.")
-        return
+@intent_handler("news")
+def _intent_news(command, text, entities):
+    _, news_api_key = get_api_keys()
+    category = entities.get("category", extract_category(text))
+    run_slow("the news", HANDLER_DEADLINES["news"], get_daily_news, news_api_key, category=category)
 
-    if re.search(r"(battery|power)\s+(level|status|info)", normalized_command):
-        battery = psutil.sensors_battery()
-        if battery:
-            charging = "plugged in" if battery.power_plugged else "on battery power"
-            speak(f"Battery is at {battery.percent}% and currently {charging}.")
-        else:
-            speak("Battery information is not available.")
-        return
 
-    screenshot_match = re.search(r"(?:take|grab|capture)\s+(?:a\s+)?screenshot", normalized_command)
-    if screenshot_match:
-        try:
-            from pywhatkit import take_screenshot
-            take_screenshot()
-            speak("Screenshot taken successfully.")
-        except Exception as e:
-            speak(f"I couldn't take a screenshot. {str(e)}")
-        return
+@intent_handler("system_info")
+def _intent_system_info(command, text, entities):
+    get_ip_mac()
 
-    search_match = re.search(r"(?:search|look\s+(?:up|for)|find|google)\s+(?:for\s+)?(.*)", normalized_command)
-    if search_match:
-        search_query = search_match.group(1).strip()
-        if search_query:
-            web_search(search_query)
-            return
 
-    file_explorer_match = re.search(r"(open|launch|show)(?:\s+(?:the|my))?\s+(?:file(?:\s+)?(?:explorer|manager)|documents|files)", normalized_command)
-    if file_explorer_match:
-        open_file_explorer()
-        return
+@intent_handler("whatsapp", requires=("contact",))
+def _intent_whatsapp(command, text, entities):
+    message = entities.get("message", "")
+    if not message:
+        speak("What message would you like to send?")
+        message = take_command()
+    # Asking for the message needs the microphone, so only the sending runs in the background
+    run_slow("the WhatsApp message", HANDLER_DEADLINES["whatsapp"], send_whatsapp_message, entities["contact"], message)
 
-    internet_speed_match = re.search(r"(check|test|what's|how's|measure)(?:\s+(?:the|my))?\s+(?:internet|network|wifi|wi-fi|connection)(?:\s+speed)?", normalized_command)
-    if internet_speed_match:
-        check_internet_speed()
-        return
 
-    reminder_match = re.search(r"(?:set|create|add|remind\s+me\s+(?:about|of))(?:\s+a)?\s+reminder\s+(?:for|about|to)?\s+(.+?)(?:\s+in\s+(\d+)\s+minutes?)?(?:\?|$|please)", normalized_command)
-    if reminder_match:
-        title = reminder_match.group(1).strip()
-        minutes = reminder_match.group(2) if reminder_match.group(2) else "5"
-        set_reminder(title, minutes)
-        return
+@intent_handler("emergency")
+def _intent_emergency(command, text, entities):
+    send_sos_sms()
 
-    nlp_result = process_nlp(normalized_command)
-    intent = nlp_result["intent"]
-    entities = nlp_result["entities"]
-
-    if intent == "open_website" and "website" in entities:
-        open_website(entities["website"])
-    elif intent == "wikipedia" and "query" in entities:
-        search_wikipedia(entities["query"])
-    elif intent == "web_search" and "query" in entities:
-        web_search(entities["query"])
-    elif intent == "search" and "query" in entities:
-        web_search(entities["query"])
-    elif intent == "weather" and "city" in entities:
-        get_weather(entities["city"])
-    elif intent == "news":
-        _, news_api_key = get_api_keys()
-        category = entities.get("category", extract_category(normalized_command))
-        get_daily_news(news_api_key, category=category)
-    elif intent == "system_info":
-        get_ip_mac()
-    elif intent == "whatsapp" and "contact" in entities:
-        message = entities.get("message", "")
-        if not message:
-            speak("What message would you like to send?")
-            message = take_command()
-        send_whatsapp_message(entities["contact"], message)
-    elif intent == "emergency":
-        send_sos_sms()
-    elif intent == "app_control" and "app_name" in entities:
-        try:
-            open_app(entities["app_name"])
-            log_event("app", entities["app_name"])
-            speak(f"Opening {entities['app_name']}")
-        except Exception as e:
-            speak(f"I couldn't open {entities['app_name']}. {e}")
-    elif intent == "system_control":
-        process_system_control(command, entities)
-    elif intent == "file_explorer":
-        path = entities.get("path", None)
-        open_file_explorer(path)
-    elif intent == "internet_speed":
-        check_internet_speed()
-    elif intent == "set_reminder":
-        title = entities.get("title", "reminder")
-        minutes = entities.get("minutes", 5)
-        set_reminder(title, minutes)
-    else:
-        get_chat_response(command)
+
+@intent_handler("app_control", requires=("app_name",))
+def _intent_app_control(command, text, entities):
+    try:
+        open_app(entities["app_name"])
+        log_event("app", entities["app_name"])
+        speak(f"Opening {entities['app_name']}")
+    except Exception as e:
+        speak(f"I couldn't open {entities['app_name']}. {e}")
+
+
+@intent_handler("system_control")
+def _intent_system_control(command, text, entities):
+    process_system_control(command, entities)
+
+
+@intent_handler("file_explorer")
+def _intent_file_explorer(command, text, entities):
+    path = entities.get("path", None)
+    open_file_explorer(path)
+
+
+@intent_handler("internet_speed")
+def _intent_internet_speed(command, text, entities):
+    run_slow("the speed test", HANDLER_DEADLINES["internet_speed"], check_internet_speed)
+
+
+@intent_handler("set_reminder")
+def _intent_set_reminder(command, text, entities):
+    title = entities.get("title", "reminder")
+    minutes = entities.get("minutes", 5)
+    set_reminder(title, minutes)
+
+
+def runner_up_intent(top_intents):
+    """The second intent when it is a side-effect free lookup that clearly beats the third, else None"""
+    if len(top_intents) < 2:
+        return None
+    intent, score = top_intents[1]
+    next_score = top_intents[2][1] if len(top_intents) > 2 else 0.0
+    if intent not in RUNNER_UP_INTENTS or score <= INTENT_THRESHOLD or score - next_score < RUNNER_UP_MARGIN:
+        return None
+    return intent
+
+
+def handle_intent(command, normalized_command, intent, entities):
+    """Run the handler for an NLP intent; False when it lacks what it needs"""
+    handler = get_intent_handler(intent, entities)
+    if handler is None:
+        return False
+    with span(f"intent.{intent}"):
+        handler(command, normalized_command, entities)
+    return True
@@ -1,26 +1,41 @@
+import os
 import speech_recognition as sr
 import pyttsx3
+import threading
 from datetime import datetime
 import importlib.util
 
+from tracing import span
+
 
 engine = None
+# pyttsx3 engines are not thread-safe; handlers may speak from worker threads
+_speak_lock = threading.RLock()
+# Threads whose speech is dropped, e.g. handlers cancelled past their deadline
+_silenced_threads = set()
+# When set, speak() hands text to the sink and take_command() reads from the
+# input source instead of the speakers and microphone
+_output_sink = None
+_input_source = None
 _has_sphinx = importlib.util.find_spec("pocketsphinx") is not None
 _printed_sphinx_hint = False
-try:
-    engine = pyttsx3.init()
-    if engine:
-        engine.setProperty("rate", 175)
-        engine.setProperty("volume", 1.0)
-        voices = engine.getProperty("voices")
-        if len(voices) > 1:
-            engine.setProperty("voice", voices[1].id)
-        engine.say("Text to speech initialized")
-        engine.runAndWait()
-        print("Text-to-speech engine initialized successfully")
-except Exception as e:
-    print(f"Warning: Could not initialize text-to-speech engine: {e}")
-    engine = None
+# Headless runs (CI, load tests) have no audio devices; skip the TTS engine
+HEADLESS = os.getenv("ASSIP_HEADLESS", "").strip().lower() in ("1", "true", "yes")
+if not HEADLESS:
+    try:
+        engine = pyttsx3.init()
+        if engine:
+            engine.setProperty("rate", 175)
+            engine.setProperty("volume", 1.0)
+            voices = engine.getProperty("voices")
+            if len(voices) > 1:
+                engine.setProperty("voice", voices[1].id)
+            engine.say("Text to speech initialized")
+            engine.runAndWait()
+            print("Text-to-speech engine initialized successfully")
+    except Exception as e:
+        print(f"Warning: Could not initialize text-to-speech engine: {e}")
+        engine = None
 
 
 def set_voice_properties(rate: int, volume_percent: int):
@@ -30,13 +45,40 @@ def set_voice_properties(rate: int, volume_percent: int):
     engine.setProperty("volume", max(0, min(100, int(volume_percent))) / 100)
 
 
+def set_output_sink(sink):
+    """Send everything speak() says to sink(text) instead of the TTS engine; None restores it"""
+    global _output_sink
+    _output_sink = sink
+
+
+def set_input_source(source):
+    """Answer take_command() with source() instead of the microphone; None restores it"""
+    global _input_source
+    _input_source = source
+
+
+def silence_thread(ident):
+    _silenced_threads.add(ident)
+
+
+def unsilence_thread(ident):
+    _silenced_threads.discard(ident)
+
+
+@span("voice.speak")
 def speak(audio):
+    if threading.get_ident() in _silenced_threads:
+        return
+    if _output_sink is not None:
+        _output_sink(str(audio))
+        return
     try:
         if engine is not None:
             text = str(audio).strip()
             if text:
-                engine.say(text)
-                engine.runAndWait()
+                with _speak_lock:
+                    engine.say(text)
+                    engine.runAndWait()
                 print(f"Assistant: {text}")
         else:
             print(f"Assistant (TTS Disabled): {audio}")
@@ -47,6 +89,8 @@ def speak(audio):
 
 def take_command(offline_only=False):
     global _printed_sphinx_hint
+    if _input_source is not None:
+        return str(_input_source() or "").lower()
     r = sr.Recognizer()
     with sr.Microphone() as source:
         print("Listening...")
@@ -1,10 +1,24 @@
 import json
 import os
+import threading
+
+from tracing import span
 
 
 CUSTOM_COMMANDS_PATH = os.path.join(os.path.dirname(__file__), "custom_commands.json")
 
+# Bumped whenever the saved commands change so caches keyed on them can reset
+_version = 0
+
+# Parsed commands, rebuilt when the file's mtime or size changes
+_index = None
+_index_stamp = None
+_index_lock = threading.Lock()
+# Trie key marking the end of a phrase; tokens are strings, so it never collides
+_END = None
+
 
+@span("custom_commands.load")
 def _load():
     if not os.path.exists(CUSTOM_COMMANDS_PATH):
         return []
@@ -19,14 +33,75 @@ def _load():
 
 
 def _save(data):
+    global _version, _index
     with open(CUSTOM_COMMANDS_PATH, "w") as f:
         json.dump(data, f, indent=2)
+    with _index_lock:
+        _index = None
+        _version += 1
+
+
+def _file_stamp():
+    try:
+        stat = os.stat(CUSTOM_COMMANDS_PATH)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _build_index(data):
+    """Exact phrase map plus a trie over the phrases' space-separated tokens.
+
+    Both map to (position in the file, action); the earliest saved command wins,
+    as in a scan of the file.
+    """
+    exact = {}
+    trie = {}
+    phrases = []
+    for position, item in enumerate(data):
+        phrase = str(item.get("phrase", "")).strip().lower()
+        if not phrase:
+            continue
+        phrases.append(phrase)
+        entry = (position, item.get("action", ""))
+        exact.setdefault(phrase, entry)
+        node = trie
+        for token in phrase.split(" "):
+            node = node.setdefault(token, {})
+        node.setdefault(_END, entry)
+    return {"exact": exact, "trie": trie, "phrases": phrases}
+
+
+def _get_index():
+    global _version, _index, _index_stamp
+    stamp = _file_stamp()
+    index = _index
+    if index is not None and stamp == _index_stamp:
+        return index
+    with _index_lock:
+        if _index is None or stamp != _index_stamp:
+            if _index is not None:
+                # Edited outside the assistant
+                _version += 1
+            _index = _build_index(_load())
+            _index_stamp = stamp
+        return _index
+
+
+def get_custom_commands_version():
+    _get_index()
+    return _version
 
 
 def list_custom_commands():
     return _load()
 
 
+def list_custom_phrases():
+    """Normalized phrases of the saved commands, as find_action compares them"""
+    return list(_get_index()["phrases"])
+
+
 def add_custom_command(phrase, action):
     phrase = str(phrase).strip().lower()
     action = str(action).strip()
@@ -55,9 +130,17 @@ def remove_custom_command(phrase):
 
 
 def find_action(command_text):
+    """Action of the first saved command that is the text or a leading run of its words"""
     command_text = str(command_text).strip().lower()
-    for item in _load():
-        phrase = str(item.get("phrase", "")).strip().lower()
-        if phrase and (command_text == phrase or command_text.startswith(phrase + " ")):
-            return item.get("action", "")
-    return None
+    index = _get_index()
+    best = index["exact"].get(command_text)
+    # Phrases ending before the last word are followed by a space in command_text
+    node = index["trie"]
+    for token in command_text.split(" ")[:-1]:
+        node = node.get(token)
+        if node is None:
+            break
+        entry = node.get(_END)
+        if entry is not None and (best is None or entry[0] < best[0]):
+            best = entry
+    return best[1] if best is not None else None
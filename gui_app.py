@@ -1,13 +1,19 @@
+import queue
 import threading
 import tkinter as tk
 from tkinter import messagebox, ttk
 
 from assistant_preferences import load_settings, save_settings as save_assistant_settings
 from ai_services import get_api_keys, set_api_keys
+from background_jobs import set_background_execution
 from command_router import process_command
 from core_voice import set_voice_properties, speak, take_command, wish
 from custom_commands import add_custom_command, list_custom_commands, remove_custom_command
-from task_manager import pop_due_tasks
+from metrics_history import set_history_resolution, start_history
+from nlp_processor import ensure_nlp_artifact, warm_lemmatizer, warm_nlp_cache_from_usage
+from reminder_scheduler import set_reminder_callback, start_reminder_scheduler
+from system_metrics import set_sample_interval, start_sampler
+from task_manager import start_due_scheduler
 from usage_tracker import get_usage_summary
 
 
@@ -15,6 +21,9 @@ root = None
 start_button = None
 status_label = None
 _update_status = None
+# Reminders fired on the scheduler thread, shown by the Tk loop
+REMINDER_POLL_MS = 250
+_reminder_queue = queue.Queue()
 
 
 def refresh_custom_commands_list(listbox):
@@ -173,13 +182,49 @@ def update_status(status="ready"):
         _update_status(status)
 
 
+def announce_task(task):
+    speak(f"Task reminder: {task.get('title', 'task')}")
+
+
+def show_reminder(reminder):
+    # Runs on the reminder thread; Tk may only be used from the GUI thread, which polls the queue
+    _reminder_queue.put(reminder)
+    speak(f"Reminder: {reminder['title']}")
+
+
+def _poll_reminders():
+    while True:
+        try:
+            reminder = _reminder_queue.get_nowait()
+        except queue.Empty:
+            break
+        messagebox.showinfo("Reminder", f"Reminder: {reminder['title']}")
+    root.after(REMINDER_POLL_MS, _poll_reminders)
+
+
 def run_assistant():
     try:
+        # Slow handlers run in the pool so the loop can listen again right away
+        set_background_execution(True)
+        settings = load_settings()
+        # System queries read the sampler's snapshot instead of waiting on psutil
+        set_sample_interval(settings.get("metrics_interval", 2.0))
+        start_sampler()
+        set_history_resolution(settings.get("metrics_history_resolution", 10.0))
+        start_history()
         wish()
+        # The first start saves the intent index so later starts map it instead of rebuilding
+        ensure_nlp_artifact()
+        # WordNet loads in about a second; do it now rather than on the first command
+        warm_lemmatizer()
+        if settings.get("nlp_cache_warmup", True):
+            warm_nlp_cache_from_usage()
+        # Reminders are spoken from the scheduler thread as each task falls due
+        start_due_scheduler(announce_task)
+        # Saved reminders are loaded here; ones missed while the app was closed fire now
+        set_reminder_callback(show_reminder)
+        start_reminder_scheduler()
         while True:
-            due_tasks = pop_due_tasks()
-            for task in due_tasks:
-                speak(f"Task reminder: {task.get('title', 'task')}")
             update_status("listening")
             settings = load_settings()
             offline_mode = bool(settings.get("offline_voice_mode", False))
@@ -274,6 +319,7 @@ def create_gui():
             status_label.config(text="Status: Ready")
 
     _update_status = _local_update_status
+    root.after(REMINDER_POLL_MS, _poll_reminders)
     root.mainloop()
 
 
@@ -0,0 +1,253 @@
+import argparse
+import json
+import os
+import socketserver
+import sys
+import threading
+import time
+from contextlib import ExitStack, redirect_stdout
+
+import numpy as np
+
+# No audio devices in headless runs; must be set before core_voice is imported
+os.environ.setdefault("ASSIP_HEADLESS", "1")
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import command_router
+import reminder_scheduler
+import task_manager
+import tracing
+import usage_tracker
+from core_voice import set_input_source, set_output_sink
+
+# Handlers that reach the network, the desktop or the speakers. --stub-handlers
+# replaces them so only routing, NLP and local storage are exercised.
+EXTERNAL_HANDLERS = (
+    "web_search",
+    "open_website",
+    "get_weather",
+    "get_daily_news",
+    "get_ip_mac",
+    "get_system_info",
+    "send_whatsapp_message",
+    "search_wikipedia",
+    "send_sos_sms",
+    "open_app",
+    "process_system_control",
+    "adjust_volume",
+    "open_file_explorer",
+    "check_internet_speed",
+    "set_reminder",
+    "get_chat_response",
+    "take_screenshot",
+    "report_cpu_usage",
+    "report_memory_usage",
+    "report_disk_usage",
+    "report_battery",
+    "report_battery_drain",
+    "report_metric_trend",
+)
+
+_router_lock = threading.Lock()
+_latencies = []
+# Output of the command being routed; stubbed handlers record their calls here
+_outputs = []
+
+
+def _stub(name):
+    def record(*args, **kwargs):
+        _outputs.append(f"<{name}{tuple(args)!r}>")
+    return record
+
+
+def _override(stack, module, name, value):
+    """Set module.name to value until stack is closed"""
+    stack.callback(setattr, module, name, getattr(module, name))
+    setattr(module, name, value)
+
+
+def install_stubs(stack):
+    """Replace the external handlers until stack is closed"""
+    for name in EXTERNAL_HANDLERS:
+        _override(stack, command_router, name, _stub(name))
+
+
+def run_command(command):
+    """Route one command; returns a record with what was said and how long it took.
+
+    Commands are routed one at a time, so the output of concurrent socket
+    clients does not interleave.
+    """
+    global _outputs
+    with _router_lock, redirect_stdout(sys.stderr):
+        # Handlers print progress; stdout is kept for the records
+        _outputs = outputs = []
+        set_output_sink(outputs.append)
+        set_input_source(lambda: "")
+        started = time.perf_counter()
+        try:
+            command_router.process_command(command)
+            error = None
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        latency = time.perf_counter() - started
+        set_output_sink(None)
+        set_input_source(None)
+        _latencies.append(latency)
+    record = {"command": command, "output": outputs, "latency_ms": round(latency * 1000, 3)}
+    if error:
+        record["error"] = error
+    return record
+
+
+def latency_report(latencies=None):
+    latencies_ms = np.asarray(_latencies if latencies is None else latencies) * 1000
+    if not len(latencies_ms):
+        return {"count": 0}
+    total_s = latencies_ms.sum() / 1000
+    return {
+        "count": int(len(latencies_ms)),
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "max_ms": float(latencies_ms.max()),
+        "commands_per_min": float(len(latencies_ms) / total_s * 60) if total_s else 0.0,
+    }
+
+
+def text_sink(stream):
+    def write(record):
+        stream.write(f"> {record['command']}  [{record['latency_ms']:.2f} ms]\n")
+        for line in record["output"]:
+            stream.write(f"  {line}\n")
+        if "error" in record:
+            stream.write(f"  ERROR {record['error']}\n")
+        stream.flush()
+    return write
+
+
+def jsonl_sink(stream):
+    def write(record):
+        stream.write(json.dumps(record) + "\n")
+        stream.flush()
+    return write
+
+
+def null_sink(stream):
+    return lambda record: None
+
+
+SINKS = {"text": text_sink, "jsonl": jsonl_sink, "null": null_sink}
+
+
+def run_lines(lines, sink):
+    """Route every non-empty line; returns how many commands ran"""
+    count = 0
+    for line in lines:
+        command = line.strip()
+        if not command:
+            continue
+        sink(run_command(command))
+        count += 1
+    return count
+
+
+def _make_request_handler():
+    class CommandHandler(socketserver.StreamRequestHandler):
+        """One command per line in, one JSON record per line out"""
+
+        def handle(self):
+            for raw in self.rfile:
+                command = raw.decode("utf-8", errors="replace").strip()
+                if not command:
+                    continue
+                record = run_command(command)
+                self.wfile.write((json.dumps(record) + "\n").encode("utf-8"))
+                self.wfile.flush()
+
+    return CommandHandler
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+else:
+    _UnixServer = None
+
+
+def make_server(tcp=None, unix=None):
+    """A threaded server for --tcp HOST:PORT or --unix PATH"""
+    handler = _make_request_handler()
+    if unix:
+        if _UnixServer is None:
+            raise ValueError("Unix sockets are not supported on this platform")
+        if os.path.exists(unix):
+            os.remove(unix)
+        return _UnixServer(unix, handler)
+    host, _, port = tcp.rpartition(":")
+    return _TCPServer((host or "127.0.0.1", int(port)), handler)
+
+
+def use_data_dir(stack, data_dir):
+    """Keep the tasks, reminders, usage log and traces of this run in data_dir"""
+    os.makedirs(data_dir, exist_ok=True)
+    _override(stack, usage_tracker, "USAGE_PATH", os.path.join(data_dir, "usage_log.json"))
+    stack.callback(usage_tracker.flush_usage)
+    _override(stack, task_manager, "TASKS_PATH", os.path.join(data_dir, "tasks.json"))
+    # Reminders are stored in the task database
+    _override(stack, task_manager, "TASKS_DB_PATH", os.path.join(data_dir, "tasks.db"))
+    _override(stack, tracing, "TRACE_PATH", os.path.join(data_dir, "traces.jsonl"))
+    stack.callback(task_manager.close_task_store)
+    stack.callback(reminder_scheduler.stop_reminder_scheduler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run ASSIP commands without a microphone or speakers")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--file", help="read commands from this file, one per line (default: stdin)")
+    source.add_argument("--tcp", metavar="HOST:PORT", help="serve commands on a TCP socket")
+    source.add_argument("--unix", metavar="PATH", help="serve commands on a Unix socket")
+    parser.add_argument("--sink", choices=sorted(SINKS), default="text", help="how results are written to stdout")
+    parser.add_argument("--stub-handlers", action="store_true", help="replace network and desktop handlers")
+    parser.add_argument("--repeat", type=int, default=1, help="run the command file this many times")
+    parser.add_argument("--data-dir", help="store tasks, reminders, usage and traces here instead of the project folder")
+    parser.add_argument("--trace", action="store_true", help="record per-stage traces (see tracing.py)")
+    args = parser.parse_args(argv)
+    if args.trace:
+        tracing.set_tracing(True)
+
+    sink = SINKS[args.sink](sys.stdout)
+    stack = ExitStack()
+    if args.data_dir:
+        use_data_dir(stack, args.data_dir)
+    if args.stub_handlers:
+        install_stubs(stack)
+    try:
+        if args.tcp or args.unix:
+            with make_server(args.tcp, args.unix) as server:
+                print(f"Listening on {args.unix or args.tcp}", file=sys.stderr)
+                server.serve_forever()
+        elif args.file:
+            with open(args.file, "r") as f:
+                lines = f.readlines()
+            for _ in range(args.repeat):
+                run_lines(lines, sink)
+        else:
+            run_lines(sys.stdin, sink)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stack.close()
+        print(json.dumps({"latency": latency_report()}), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
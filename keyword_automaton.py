@@ -0,0 +1,54 @@
+from collections import deque
+
+
+def build_automaton(keywords):
+    """Compile keywords into an Aho-Corasick automaton for find_keywords.
+
+    Failure links are folded into a full transition table, so matching reads
+    every character exactly once and never backtracks.
+    """
+    goto = [{}]
+    outputs = [set()]
+    for keyword in keywords:
+        if not keyword:
+            continue
+        state = 0
+        for char in keyword:
+            next_state = goto[state].get(char)
+            if next_state is None:
+                next_state = len(goto)
+                goto[state][char] = next_state
+                goto.append({})
+                outputs.append(set())
+            state = next_state
+        outputs[state].add(keyword)
+
+    fail = [0] * len(goto)
+    transitions = [None] * len(goto)
+    transitions[0] = dict(goto[0])
+    queue = deque(goto[0].values())
+    while queue:
+        state = queue.popleft()
+        transitions[state] = dict(transitions[fail[state]])
+        transitions[state].update(goto[state])
+        outputs[state] |= outputs[fail[state]]
+        for char, next_state in goto[state].items():
+            fail[next_state] = transitions[fail[state]].get(char, 0) if state else 0
+            queue.append(next_state)
+    return {
+        "transitions": transitions,
+        "outputs": [frozenset(found) for found in outputs],
+    }
+
+
+def find_keywords(automaton, text):
+    """Return the set of keywords occurring anywhere in text, overlaps included"""
+    transitions = automaton["transitions"]
+    outputs = automaton["outputs"]
+    state = 0
+    found = set()
+    for char in text:
+        state = transitions[state].get(char, 0)
+        if outputs[state]:
+            found |= outputs[state]
+    return found
@@ -0,0 +1,194 @@
+import math
+import re
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from system_metrics import add_sample_listener, start_sampler
+
+
+# One row per HISTORY_RESOLUTION seconds, kept for HISTORY_SPAN seconds
+HISTORY_RESOLUTION = 10.0
+HISTORY_SPAN = 24 * 3600
+HISTORY_COLUMNS = (
+    "timestamp",
+    "cpu",
+    "memory",
+    "disk_read",
+    "disk_write",
+    "net_sent",
+    "net_recv",
+    "battery",
+    "plugged",
+)
+# Samples behind a battery drain estimate must cover at least this many seconds
+MIN_DRAIN_WINDOW = 300
+
+_COLUMN = {name: index for index, name in enumerate(HISTORY_COLUMNS)}
+_COUNTERS = ("disk_read_bytes", "disk_write_bytes", "net_bytes_sent", "net_bytes_recv")
+METRIC_ALIASES = {"processor": "cpu", "ram": "memory"}
+
+
+class RingBuffer:
+    """Fixed number of float rows; the oldest row is overwritten when full"""
+
+    def __init__(self, capacity, width):
+        self.rows = np.full((capacity, width), np.nan)
+        self.next = 0
+        self.count = 0
+
+    @property
+    def capacity(self):
+        return len(self.rows)
+
+    def append(self, row):
+        self.rows[self.next] = row
+        self.next = (self.next + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def ordered(self):
+        """Rows oldest first"""
+        if self.count < self.capacity:
+            return self.rows[: self.count]
+        return np.concatenate((self.rows[self.next :], self.rows[: self.next]))
+
+
+_lock = threading.Lock()
+_buffer = RingBuffer(math.ceil(HISTORY_SPAN / HISTORY_RESOLUTION), len(HISTORY_COLUMNS))
+_bucket = None
+_started = False
+
+
+def set_history_resolution(seconds):
+    """Change the row resolution; clears the history kept so far"""
+    global HISTORY_RESOLUTION, _buffer, _bucket
+    if seconds <= 0:
+        raise ValueError("The history resolution must be positive")
+    with _lock:
+        HISTORY_RESOLUTION = float(seconds)
+        _buffer = RingBuffer(math.ceil(HISTORY_SPAN / HISTORY_RESOLUTION), len(HISTORY_COLUMNS))
+        _bucket = None
+
+
+def _new_bucket(snapshot):
+    return {
+        "start": snapshot["timestamp"],
+        "counters": [snapshot.get(name, 0) for name in _COUNTERS],
+        "cpu": 0.0,
+        "memory": 0.0,
+        "samples": 0,
+    }
+
+
+def record_sample(snapshot):
+    """Fold one metrics snapshot into the history; a row is written every HISTORY_RESOLUTION seconds"""
+    global _bucket
+    with _lock:
+        if _bucket is None:
+            _bucket = _new_bucket(snapshot)
+        _bucket["cpu"] += snapshot["cpu_percent"]
+        _bucket["memory"] += snapshot["memory_percent"]
+        _bucket["samples"] += 1
+        elapsed = snapshot["timestamp"] - _bucket["start"]
+        if elapsed < HISTORY_RESOLUTION:
+            return
+        counters = [snapshot.get(name, 0) for name in _COUNTERS]
+        # Counters can reset (sleep, adapter changes); never report negative rates
+        rates = [max(now - before, 0) / elapsed for now, before in zip(counters, _bucket["counters"])]
+        battery = snapshot.get("battery_percent")
+        plugged = snapshot.get("battery_plugged")
+        _buffer.append(
+            [
+                snapshot["timestamp"],
+                _bucket["cpu"] / _bucket["samples"],
+                _bucket["memory"] / _bucket["samples"],
+                *rates,
+                np.nan if battery is None else battery,
+                np.nan if plugged is None else float(plugged),
+            ]
+        )
+        _bucket = _new_bucket(snapshot)
+
+
+def start_history():
+    """Record every sample of the metrics sampler; later calls do nothing"""
+    global _started
+    with _lock:
+        if _started:
+            return
+        _started = True
+    add_sample_listener(record_sample)
+    start_sampler()
+
+
+def get_history(seconds=None, since=None):
+    """Rows (oldest first) from the last seconds, or since a timestamp"""
+    with _lock:
+        rows = _buffer.ordered().copy()
+    if seconds is not None:
+        since = time.time() - seconds
+    if since is not None:
+        rows = rows[np.searchsorted(rows[:, 0], since, side="left") :]
+    return rows
+
+
+def _metric(name):
+    name = METRIC_ALIASES.get(name, name)
+    if name not in _COLUMN or name == "timestamp":
+        raise ValueError(f"Unknown metric: {name}")
+    return _COLUMN[name]
+
+
+def average(metric, seconds=None, since=None):
+    """Mean of a metric over the window, or None without history"""
+    values = get_history(seconds, since)[:, _metric(metric)]
+    values = values[~np.isnan(values)]
+    return float(values.mean()) if len(values) else None
+
+
+def peak(metric, seconds=None, since=None):
+    """(highest value, its timestamp) over the window, or None without history"""
+    rows = get_history(seconds, since)
+    values = rows[:, _metric(metric)]
+    if not len(values) or np.isnan(values).all():
+        return None
+    index = int(np.nanargmax(values))
+    return float(values[index]), float(rows[index, 0])
+
+
+def battery_drain_rate(seconds=3600):
+    """Battery percent lost per hour while unplugged, from a least-squares fit; None if unknown"""
+    rows = get_history(seconds)
+    rows = rows[(rows[:, _COLUMN["plugged"]] == 0) & ~np.isnan(rows[:, _COLUMN["battery"]])]
+    if len(rows) < 2:
+        return None
+    times = rows[:, 0]
+    if times[-1] - times[0] < MIN_DRAIN_WINDOW:
+        return None
+    slope = np.polyfit(times - times[0], rows[:, _COLUMN["battery"]], 1)[0]
+    return float(-slope * 3600)
+
+
+def start_of_today():
+    return datetime.now().replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+
+
+def parse_window(text, default_seconds=600):
+    """(seconds, since, description) for phrases like 'last 10 minutes', 'past hour' or 'today'.
+
+    Without such a phrase the window is the last default_seconds, or today when that is None.
+    """
+    text = text.lower()
+    match = re.search(r"(?:last|past)\s+(\d+)?\s*(minute|min|hour|hr)s?", text)
+    if "today" in text or (not match and default_seconds is None):
+        return None, start_of_today(), "today"
+    if not match:
+        minutes = default_seconds // 60
+        return default_seconds, None, f"over the last {minutes} minutes"
+    amount = int(match.group(1) or 1)
+    unit = "hour" if match.group(2) in ("hour", "hr") else "minute"
+    seconds = amount * (3600 if unit == "hour" else 60)
+    description = f"over the last {amount} {unit}s" if amount != 1 else f"over the last {unit}"
+    return seconds, None, description
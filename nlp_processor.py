@@ -1,26 +1,42 @@
+import hashlib
+import inspect
+import json
+import os
 import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from functools import lru_cache
 
 import nltk
 import numpy as np
 from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
 from nltk.tokenize import word_tokenize
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-
-# Ensure NLTK resources are downloaded
-try:
-    nltk.data.find('tokenizers/punkt')
-    nltk.data.find('corpora/stopwords')
-    nltk.data.find('corpora/wordnet')
-except LookupError:
-    nltk.download('punkt')
-    nltk.download('stopwords')
-    nltk.download('wordnet')
-
-# Initialize lemmatizer
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+
+from custom_commands import get_custom_commands_version
+from tracing import span
+from usage_tracker import get_top_commands
+
+
+def _ensure_nltk_resources():
+    # Download only the missing resources; punkt is only used by the "nltk" tokenizer
+    resources = {'stopwords': 'corpora/stopwords', 'wordnet': 'corpora/wordnet'}
+    if TOKENIZER_MODE == 'nltk':
+        resources['punkt'] = 'tokenizers/punkt'
+    for name, path in resources.items():
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            nltk.download(name)
+
+# Initialize lemmatizer; stop words come from the model artifact or NLTK at the end of the module
 lemmatizer = WordNetLemmatizer()
-stop_words = set(stopwords.words('english'))
+stop_words = set()
 
 # Define command patterns
 COMMAND_PATTERNS = {
@@ -69,204 +85,950 @@ COMMAND_PATTERNS = {
     ]
 }
 
+# Preprocessing caches
+LEMMA_CACHE_SIZE = 4096
+PREPROCESS_CACHE_SIZE = 2048
+PRECOMPUTE_LEMMAS = True
+
+# token -> lemma for the pattern vocabulary, filled when the intent index is built
+_lemma_table = {}
+_lemma_table_hits = 0
+
+
+def _wordnet_lemma(token):
+    try:
+        return lemmatizer.lemmatize(token)
+    except LookupError:
+        # WordNet is missing and could not be downloaded; keep the word as spoken
+        return token
+
+
+@lru_cache(maxsize=LEMMA_CACHE_SIZE)
+def _lemmatize_cached(token):
+    return _wordnet_lemma(token)
+
+
+def _lemmatize(token):
+    global _lemma_table_hits
+    lemma = _lemma_table.get(token)
+    if lemma is not None:
+        _lemma_table_hits += 1
+        return lemma
+    return _lemmatize_cached(token)
+
+
+def precompute_lemma_table(texts):
+    """Lemmatize every token of the given texts up front so lookups skip WordNet"""
+    global _lemma_table
+    table = {}
+    for text in texts:
+        for token in tokenize(text.lower()):
+            if token.isalnum() and token not in stop_words and token not in table:
+                table[token] = _wordnet_lemma(token)
+    _lemma_table = table
+    return table
+
+
+def warm_lemmatizer():
+    """Load WordNet now; words outside the lemma table would otherwise load it on the first command"""
+    _wordnet_lemma("commands")
+
+
+def get_preprocess_cache_stats():
+    """Return hit/miss counters for the preprocessing and lemma caches"""
+    text_info = _preprocess_cached.cache_info()
+    lemma_info = _lemmatize_cached.cache_info()
+    return {
+        'text': {
+            'hits': text_info.hits,
+            'misses': text_info.misses,
+            'size': text_info.currsize,
+            'maxsize': text_info.maxsize,
+        },
+        'lemma': {
+            'hits': lemma_info.hits + _lemma_table_hits,
+            'misses': lemma_info.misses,
+            'size': lemma_info.currsize,
+            'maxsize': lemma_info.maxsize,
+            'table_size': len(_lemma_table),
+            'table_hits': _lemma_table_hits,
+        },
+    }
+
+
+def clear_preprocess_caches():
+    global _lemma_table_hits
+    _preprocess_cached.cache_clear()
+    _lemmatize_cached.cache_clear()
+    _lemma_table_hits = 0
+
+
+# Tokenization
+# "fast" uses the regex splitter below, "nltk" uses word_tokenize (punkt + Treebank)
+TOKENIZER_MODE = os.getenv("ASSIP_TOKENIZER", "fast")
+
+# The Treebank rules that decide which alphanumeric tokens word_tokenize
+# produces, applied in the same order. Treebank only splits off a period at
+# the end of its input, so a period that ends a sentence inside the text is
+# split off first, as punkt's sentence split would leave it.
+_FAST_TOKEN_RULES = [
+    (re.compile(r"^\"|(?<=[ (\[{<])(?:\"|'')"), " `` "),
+    (re.compile(r"[«“‘„»”’\"]|`+|''"), r" \g<0> "),
+    (re.compile(r"(?<!\w)'(?!(?:re|ve|ll|m|t|s|d|n)\b)(?=\w)", re.IGNORECASE), "' "),
+    (re.compile(r"[:,](?!\d)|\.{2,}|--|[;@#$%&*?!\[\](){}<>\u2012-\u2015]"), r" \g<0> "),
+    (re.compile(r"(?<=[^.])\.(?=[\])}>\"'»”’ ]*\s*$)"), " . "),
+    (re.compile(r"(?<=[^'])'(?= )"), " ' "),
+    (re.compile(r"(?<=[^'\s])('s|'m|'d|')(?=\s|$)", re.IGNORECASE), r" \1 "),
+    (re.compile(r"(?<=[^'\s])('ll|'re|'ve|n't)(?=\s|$)", re.IGNORECASE), r" \1 "),
+]
+# Contractions Treebank splits inside a word, with the split position
+_SPLIT_WORDS = {'cannot': 3, "d'ye": 1, 'gimme': 3, 'gonna': 3, 'gotta': 3, 'lemme': 3, "more'n": 4, 'wanna': 3}
+_SPLIT_WORDS_RE = re.compile(r"\b(?:cannot|d'ye|gimme|gonna|gotta|lemme|more'n)\b|\bwanna(?=\s|$)", re.IGNORECASE)
+_PLAIN_TEXT_RE = re.compile(r"[A-Za-z0-9\s]*")
+_SENTENCE_END_RE = re.compile(r"(\S+)\.(?=\s+\S)")
+# Words punkt does not end a sentence after; single letters are taken as initials
+_ABBREVIATIONS = {'a.m', 'co', 'dr', 'e.g', 'etc', 'i.e', 'inc', 'jr', 'ltd', 'mr', 'mrs', 'ms', 'p.m', 'prof', 'sr', 'st', 'u.k', 'u.s', 'vs'}
+
+
+def _end_sentence(match):
+    word = match.group(1)
+    if word.endswith('.') or word.lower() in _ABBREVIATIONS or (len(word) == 1 and word.isalpha()):
+        return match.group(0)
+    return f"{word} . "
+
+
+def _split_word(match):
+    word = match.group(0)
+    split = _SPLIT_WORDS[word.lower()]
+    return f" {word[:split]} {word[split:]} "
+
+
+def fast_tokenize(text):
+    """Split text into the same word tokens word_tokenize gives for commands"""
+    if not _PLAIN_TEXT_RE.fullmatch(text):
+        text = _SENTENCE_END_RE.sub(_end_sentence, text)
+        for regex, replacement in _FAST_TOKEN_RULES:
+            text = regex.sub(replacement, text)
+    text = _SPLIT_WORDS_RE.sub(_split_word, text)
+    return text.split()
+
+
+def tokenize(text):
+    if TOKENIZER_MODE == "nltk":
+        return word_tokenize(text)
+    return fast_tokenize(text)
+
+
+def set_tokenizer_mode(mode):
+    """Switch between the "fast" and "nltk" tokenizers"""
+    global TOKENIZER_MODE, _intent_index
+    if mode not in ("fast", "nltk"):
+        raise ValueError(f"Unknown tokenizer mode: {mode}")
+    TOKENIZER_MODE = mode
+    if mode == "nltk":
+        _ensure_nltk_resources()
+    clear_preprocess_caches()
+    _intent_index = None
+    clear_nlp_cache()
+
 # Intent classification
 def preprocess_text(text):
     """Preprocess text by tokenizing, removing stopwords, and lemmatizing"""
+    return _preprocess_cached(text)
+
+
+@lru_cache(maxsize=PREPROCESS_CACHE_SIZE)
+def _preprocess_cached(text):
     text = text.lower()
-    tokens = word_tokenize(text)
-    tokens = [lemmatizer.lemmatize(token) for token in tokens if token.isalnum() and token not in stop_words]
+    tokens = tokenize(text)
+    tokens = [_lemmatize(token) for token in tokens if token.isalnum() and token not in stop_words]
     return ' '.join(tokens)
 
-def classify_intent(user_input):
+# Same token rule TfidfVectorizer applies by default
+TERM_PATTERN = r"(?u)\b\w\w+\b"
+_term_re = re.compile(TERM_PATTERN)
+
+_intent_index = None
+
+
+def _patterns_signature(patterns):
+    return tuple((intent, tuple(items)) for intent, items in patterns.items())
+
+
+def build_intent_index(patterns=None, precompute_lemmas=None):
+    """Vectorize every command pattern once into a single sparse index.
+
+    Scoring used to fit one TfidfVectorizer per intent on its patterns plus the
+    user input. The input only changes those fits through the terms it shares
+    with the patterns (each adds one document to the term's frequency), so the
+    index keeps per-intent IDF weights for both cases and corrects the pattern
+    norms at query time. Scores are identical to the per-intent fits.
+    """
+    if patterns is None:
+        patterns = COMMAND_PATTERNS
+    if precompute_lemmas is None:
+        precompute_lemmas = PRECOMPUTE_LEMMAS
+    if precompute_lemmas:
+        precompute_lemma_table(p for items in patterns.values() for p in items)
+    intents = list(patterns)
+    processed = []
+    groups = []
+    for group, intent in enumerate(intents):
+        for pattern in patterns[intent]:
+            processed.append(preprocess_text(pattern))
+            groups.append(group)
+    groups = np.array(groups, dtype=np.int32)
+
+    counter = CountVectorizer(token_pattern=TERM_PATTERN)
+    counts = counter.fit_transform(processed).tocsr().astype(np.float64)
+    counts_sq = counts.multiply(counts).tocsr()
+
+    # Documents per intent fit: the intent's patterns plus the user input
+    membership = sparse.csr_matrix(
+        (np.ones(len(groups)), (groups, np.arange(len(groups)))),
+        shape=(len(intents), len(groups)),
+    )
+    doc_freq = (membership @ (counts > 0).astype(np.float64)).toarray()
+    n_docs = np.asarray(membership.sum(axis=1)).ravel() + 1
+    # Smoothed IDF as TfidfVectorizer computes it, without and with the input
+    idf_absent = np.log((n_docs[:, None] + 1) / (doc_freq + 1)) + 1
+    idf_present = np.log((n_docs[:, None] + 1) / (doc_freq + 2)) + 1
+    idf_absent_sq = idf_absent ** 2
+    idf_present_sq = idf_present ** 2
+
+    return {
+        'signature': _patterns_signature(patterns),
+        'intents': intents,
+        'vocabulary': dict(counter.vocabulary_),
+        'pattern_groups': groups,
+        'group_starts': np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]]),
+        # pattern . input numerator weights: tf * idf_present^2
+        'shared_weights': counts.multiply(idf_present_sq[groups]).tocsr(),
+        # squared pattern norm assuming no term is shared with the input
+        'base_norm_sq': np.asarray(counts_sq.multiply(idf_absent_sq[groups]).sum(axis=1)).ravel(),
+        # per shared term correction of the squared pattern norm
+        'norm_correction': counts_sq.multiply((idf_present_sq - idf_absent_sq)[groups]).tocsr(),
+        'idf_present_sq': idf_present_sq,
+        # terms unknown to every pattern have a document frequency of one
+        'unseen_idf_sq': (np.log((n_docs + 1) / 2) + 1) ** 2,
+    }
+
+
+def get_intent_index():
+    """Return the intent index, rebuilding it when COMMAND_PATTERNS changed"""
+    global _intent_index
+    if _intent_index is None or _intent_index['signature'] != _patterns_signature(COMMAND_PATTERNS):
+        _intent_index = build_intent_index()
+    return _intent_index
+
+
+def _score_intents(index, processed_inputs):
+    """Return the best cosine score per intent for each preprocessed input"""
+    vocabulary = index['vocabulary']
+    rows, cols, values = [], [], []
+    unseen_sq = np.zeros(len(processed_inputs))
+    for row, text in enumerate(processed_inputs):
+        term_counts = {}
+        for term in _term_re.findall(text.lower()):
+            term_counts[term] = term_counts.get(term, 0) + 1
+        for term, count in term_counts.items():
+            col = vocabulary.get(term)
+            if col is None:
+                unseen_sq[row] += count * count
+            else:
+                rows.append(row)
+                cols.append(col)
+                values.append(count)
+    query = sparse.csr_matrix(
+        (np.array(values, dtype=np.float64), (rows, cols)),
+        shape=(len(processed_inputs), len(vocabulary)),
+    )
+
+    dots = (query @ index['shared_weights'].T).toarray()
+    pattern_norm_sq = index['base_norm_sq'] + (query.sign() @ index['norm_correction'].T).toarray()
+    query_norm_sq = query.multiply(query) @ index['idf_present_sq'].T
+    query_norm_sq = np.asarray(query_norm_sq) + unseen_sq[:, None] * index['unseen_idf_sq']
+
+    denominator = np.sqrt(pattern_norm_sq) * np.sqrt(query_norm_sq)[:, index['pattern_groups']]
+    scores = np.divide(dots, denominator, out=np.zeros_like(dots), where=denominator > 0)
+    return np.maximum.reduceat(scores, index['group_starts'], axis=1)
+
+
+# Minimum best score for an intent to be accepted over general_query
+INTENT_THRESHOLD = 0.1
+TOP_K = 3
+
+
+def get_intent_names():
+    """Intent names in the column order of the score vectors"""
+    return list(get_intent_index()['intents'])
+
+def score_intents(user_inputs):
+    """Return the full score matrix (one row per input, one column per intent)"""
+    user_inputs = list(user_inputs)
+    index = get_intent_index()
+    if not user_inputs:
+        return np.zeros((0, len(index['intents'])))
+    return _score_intents(index, [preprocess_text(text) for text in user_inputs])
+
+def _top_intents(intents, scores, k):
+    """Top-k (intent, score) pairs of one score vector, best first"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return []
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.lexsort((top, -scores[top]))]
+    return [(intents[i], float(scores[i])) for i in top]
+
+def _decide_intents(intents, scores, threshold):
+    """Best intent per row, or general_query when it does not reach the threshold"""
+    results = []
+    if not len(scores):
+        return results
+    best = np.argmax(scores, axis=1)
+    best_scores = scores[np.arange(len(scores)), best]
+    for intent_id, score in zip(best, best_scores):
+        if score > threshold:
+            results.append((intents[intent_id], score))
+        else:
+            results.append(('general_query', 0.0))
+    return results
+
+def classify_intent(user_input, threshold=INTENT_THRESHOLD):
     """Classify the intent of the user's input"""
-    processed_input = preprocess_text(user_input)
-    
-    # Calculate similarity with each command pattern
-    scores = {}
-    for intent, patterns in COMMAND_PATTERNS.items():
-        # Create a corpus with the patterns and the user input
-        corpus = [preprocess_text(pattern) for pattern in patterns] + [processed_input]
-        
-        # Create TF-IDF vectors
-        vectorizer = TfidfVectorizer()
-        tfidf_matrix = vectorizer.fit_transform(corpus)
-        
-        # Calculate cosine similarity between user input and patterns
-        user_vector = tfidf_matrix[-1]
-        pattern_vectors = tfidf_matrix[:-1]
-        
-        # Get the maximum similarity score
-        similarity_scores = cosine_similarity(user_vector, pattern_vectors)
-        max_score = np.max(similarity_scores)
-        scores[intent] = max_score
-    
-    # Return the intent with the highest score if it's above a threshold
-    max_intent = max(scores, key=scores.get)
-    if scores[max_intent] > 0.1:  # Threshold for confidence
-        return max_intent, scores[max_intent]
-    else:
-        return 'general_query', 0.0
+    return classify_intents([user_input], threshold)[0]
+
+def classify_intents(user_inputs, threshold=INTENT_THRESHOLD):
+    """Classify many inputs at once, scoring the whole batch in one pass"""
+    user_inputs = list(user_inputs)
+    if not user_inputs:
+        return []
+    return _decide_intents(get_intent_names(), score_intents(user_inputs), threshold)
+
+def classify_intent_topk(user_input, k=TOP_K, threshold=INTENT_THRESHOLD):
+    """Classify one input and also return its score vector and top-k intents.
+
+    Returns (intent, confidence, scores, top) where scores is indexed like
+    get_intent_names() and top is a list of (intent, score), best first.
+    """
+    intents = get_intent_names()
+    scores = score_intents([user_input])
+    intent, confidence = _decide_intents(intents, scores, threshold)[0]
+    return intent, confidence, scores[0], _top_intents(intents, scores[0], k)
+
+# Entity extraction
+VALID_NEWS_CATEGORIES = ('general', 'business', 'entertainment', 'health', 'science', 'sports', 'technology')
+
+# Map common application names
+APP_MAP = {
+    'notepad': 'notepad',
+    'calculator': 'calc',
+    'paint': 'mspaint',
+    'command prompt': 'cmd',
+    'cmd': 'cmd',
+    'browser': 'msedge',
+    'edge': 'msedge',
+    'chrome': 'chrome',
+    'word': 'winword',
+    'excel': 'excel',
+    'powerpoint': 'powerpnt',
+    'spotify': 'spotify',
+    'facebook': 'facebook',
+    'instagram': 'instagram',
+    'fb': 'facebook',
+    'insta': 'instagram',
+    'whatsapp': 'whatsapp',
+    'watsapp': 'whatsapp',
+    'chatgpt': 'chatgpt',
+}
+
+
+def compile_first_match(patterns, flags=re.IGNORECASE):
+    """Combine patterns into one regex that behaves like trying them in order.
+
+    Every pattern becomes a lookahead alternative anchored at the start of the
+    input, so a single match finds the first pattern that would match anywhere,
+    exactly as successive re.search calls would. Returns the compiled regex and
+    the group offset of each alternative for search_first_match.
+    """
+    alternatives = []
+    offsets = []
+    group_count = 0
+    for pattern in patterns:
+        offsets.append(group_count + 1)
+        group_count += 1 + re.compile(pattern, flags).groups
+        alternatives.append(r'(?=[\s\S]*?(' + pattern + '))')
+    return re.compile('(?:' + '|'.join(alternatives) + ')', flags), offsets
+
+
+def search_first_match(compiled, text):
+    """Return (pattern position, groups of that pattern) or None"""
+    regex, offsets = compiled
+    match = regex.match(text)
+    if not match:
+        return None
+    for position, offset in enumerate(offsets):
+        if match.group(offset) is not None:
+            end = offsets[position + 1] if position + 1 < len(offsets) else regex.groups + 1
+            return position, match.groups()[offset:end - 1]
+    return None
+
+
+_ENTITY_EXTRACTORS = {}
+_extractor_timings = {}
+
+
+def entity_extractor(*intents):
+    """Register a function extracting entities for the given intents"""
+    def decorator(func):
+        for intent in intents:
+            _ENTITY_EXTRACTORS[intent] = func
+        return func
+    return decorator
+
+
+_CITY_RE = re.compile(r'(?:weather|forecast|temperature)(?:\s+in\s+|\s+for\s+|\s+of\s+)?([A-Za-z\s]+?)(?:\?|$|please)', re.IGNORECASE)
+_WEBSITE_RE = re.compile(r'(?:open|go to|visit|browse|navigate to)\s+(?:the\s+)?(?:website\s+)?([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})', re.IGNORECASE)
+# Search query patterns in priority order; the last one is the loose fallback
+_SEARCH_QUERY = compile_first_match([
+    r'(?:search|google|look up|find|search for|look for)\s+(?:information about|about|for)?\s+(.+?)(?:\?|$|please)',
+    r'(?:search|google|look up)\s+(?:for|on|about)?\s+"?([^"]+?)"?(?:\?|$|please)',
+    r'(?:find|get|show me)\s+(?:information|results|details|data)\s+(?:about|for|on)\s+(.+?)(?:\?|$|please)',
+    r'(?:can you|please|hey|could you)\s+(?:search|find|google)\s+(?:for|about)?\s+(.+?)(?:\?|$|please)',
+    r'(?:search|google|find|look up)(?:\s+(?:for|about))?\s+(.+)',
+])
+_CONTACT_RE = re.compile(r'(?:send|text|message|whatsapp)\s+(?:a\s+)?(?:message\s+)?(?:to\s+)?([A-Za-z\s]+?)(?:\s+saying|\s+with message|\s+that says|$)', re.IGNORECASE)
+_MESSAGE_RE = re.compile(r'(?:saying|that says|with message|with text)\s+"?([^"]+?)"?(?:\?|$|please)', re.IGNORECASE)
+_NEWS_CATEGORY_RE = re.compile(r'(?:news|headlines|updates)\s+(?:about|on|regarding)?\s+([a-zA-Z]+)', re.IGNORECASE)
+_WIKI_QUERY_RE = re.compile(r'(?:wikipedia|wiki|search|look up|information about)\s+(?:for\s+)?(.+?)(?:\?|$|please)', re.IGNORECASE)
+_APP_RE = re.compile(r'(?:open|launch|start|run)\s+(?:the\s+)?(?:application\s+)?([A-Za-z\s]+?)(?:\s+application|\?|$|please)', re.IGNORECASE)
+_LEVEL_RE = re.compile(r'(?:set|change|adjust)\s+(?:the\s+)?(?:brightness|volume)\s+(?:to\s+)?(\d+)(?:\s*%)?', re.IGNORECASE)
+_REMINDER_RE = re.compile(r'(?:remind|reminder|remind me)(?:\s+(?:to|about))?\s+(.+?)(?:\s+in\s+(\d+)\s+minutes?)?(?:\?|$|please)', re.IGNORECASE)
+_PATH_RE = re.compile(r'(?:open|show|launch)(?:\s+(?:file explorer|files|documents))(?:\s+(?:in|at|for))?\s+(.+?)(?:\?|$|please)', re.IGNORECASE)
+
+
+@entity_extractor('weather')
+def _extract_weather(user_input):
+    # Extract city name
+    city_match = _CITY_RE.search(user_input)
+    if city_match:
+        return {'city': city_match.group(1).strip()}
+    return {}
+
+
+@entity_extractor('open_website')
+def _extract_website(user_input):
+    website_match = _WEBSITE_RE.search(user_input)
+    if website_match:
+        return {'website': website_match.group(1).strip()}
+    return {}
+
+
+@entity_extractor('web_search', 'search')
+def _extract_search_query(user_input):
+    found = search_first_match(_SEARCH_QUERY, user_input)
+    if found:
+        return {'query': found[1][0].strip()}
+    return {}
+
+
+@entity_extractor('whatsapp')
+def _extract_whatsapp(user_input):
+    # Extract contact name and message
+    entities = {}
+    contact_match = _CONTACT_RE.search(user_input)
+    message_match = _MESSAGE_RE.search(user_input)
+    if contact_match:
+        entities['contact'] = contact_match.group(1).strip()
+    if message_match:
+        entities['message'] = message_match.group(1).strip()
+    return entities
+
+
+@entity_extractor('news')
+def _extract_news_category(user_input):
+    category_match = _NEWS_CATEGORY_RE.search(user_input)
+    if category_match:
+        category = category_match.group(1).lower().strip()
+        if category in VALID_NEWS_CATEGORIES:
+            return {'category': category}
+    return {'category': 'general'}
+
+
+@entity_extractor('wikipedia')
+def _extract_wikipedia_query(user_input):
+    query_match = _WIKI_QUERY_RE.search(user_input)
+    if query_match:
+        return {'query': query_match.group(1).strip()}
+    return {}
 
+
+@entity_extractor('app_control')
+def _extract_app_name(user_input):
+    app_match = _APP_RE.search(user_input)
+    if app_match:
+        app_name = app_match.group(1).strip().lower()
+        return {'app_name': APP_MAP.get(app_name, app_name)}
+    return {}
+
+
+@entity_extractor('system_control')
+def _extract_level(user_input):
+    # Extract brightness/volume level
+    level_match = _LEVEL_RE.search(user_input)
+    if level_match:
+        level = int(level_match.group(1))
+        lowered = user_input.lower()
+        if 'brightness' in lowered:
+            return {'brightness': level}
+        if 'volume' in lowered:
+            return {'volume': level}
+    return {}
+
+
+@entity_extractor('set_reminder')
+def _extract_reminder(user_input):
+    reminder_match = _REMINDER_RE.search(user_input)
+    if reminder_match:
+        return {
+            'title': reminder_match.group(1).strip(),
+            'minutes': int(reminder_match.group(2)) if reminder_match.group(2) else 5,  # Default to 5 minutes
+        }
+    return {}
+
+
+@entity_extractor('file_explorer')
+def _extract_path(user_input):
+    path_match = _PATH_RE.search(user_input)
+    if path_match:
+        return {'path': path_match.group(1).strip()}
+    return {}
+
+
+@span("nlp.entities")
 def extract_entities(user_input, intent):
     """Extract relevant entities based on the identified intent"""
-    entities = {}
-    
-    if intent == 'weather':
-        # Extract city name
-        city_pattern = r'(?:weather|forecast|temperature)(?:\s+in\s+|\s+for\s+|\s+of\s+)?([A-Za-z\s]+?)(?:\?|$|please)'
-        city_match = re.search(city_pattern, user_input, re.IGNORECASE)
-        if city_match:
-            entities['city'] = city_match.group(1).strip()
-    
-    elif intent == 'open_website':
-        # Extract website name
-        website_pattern = r'(?:open|go to|visit|browse|navigate to)\s+(?:the\s+)?(?:website\s+)?([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})'
-        website_match = re.search(website_pattern, user_input, re.IGNORECASE)
-        if website_match:
-            entities['website'] = website_match.group(1).strip()
-    
-    elif intent == 'web_search' or intent == 'search':
-        # Extract search query - more robust pattern
-        search_patterns = [
-            r'(?:search|google|look up|find|search for|look for)\s+(?:information about|about|for)?\s+(.+?)(?:\?|$|please)',
-            r'(?:search|google|look up)\s+(?:for|on|about)?\s+"?([^"]+?)"?(?:\?|$|please)',
-            r'(?:find|get|show me)\s+(?:information|results|details|data)\s+(?:about|for|on)\s+(.+?)(?:\?|$|please)',
-            r'(?:can you|please|hey|could you)\s+(?:search|find|google)\s+(?:for|about)?\s+(.+?)(?:\?|$|please)'
-        ]
-        
-        for pattern in search_patterns:
-            query_match = re.search(pattern, user_input, re.IGNORECASE)
-            if query_match:
-                entities['query'] = query_match.group(1).strip()
-                break
-                
-        # Fallback - if no match, use everything after search/google/etc.
-        if 'query' not in entities:
-            simple_pattern = r'(?:search|google|find|look up)(?:\s+(?:for|about))?\s+(.+)'
-            simple_match = re.search(simple_pattern, user_input, re.IGNORECASE)
-            if simple_match:
-                entities['query'] = simple_match.group(1).strip()
-    
-    elif intent == 'whatsapp':
-        # Extract contact name and message
-        contact_pattern = r'(?:send|text|message|whatsapp)\s+(?:a\s+)?(?:message\s+)?(?:to\s+)?([A-Za-z\s]+?)(?:\s+saying|\s+with message|\s+that says|$)'
-        contact_match = re.search(contact_pattern, user_input, re.IGNORECASE)
-        
-        message_pattern = r'(?:saying|that says|with message|with text)\s+"?([^"]+?)"?(?:\?|$|please)'
-        message_match = re.search(message_pattern, user_input, re.IGNORECASE)
-        
-        if contact_match:
-            entities['contact'] = contact_match.group(1).strip()
-        if message_match:
-            entities['message'] = message_match.group(1).strip()
-    
-    elif intent == 'news':
-        # Extract news category
-        category_pattern = r'(?:news|headlines|updates)\s+(?:about|on|regarding)?\s+([a-zA-Z]+)'
-        category_match = re.search(category_pattern, user_input, re.IGNORECASE)
-        if category_match:
-            category = category_match.group(1).lower().strip()
-            valid_categories = ['general', 'business', 'entertainment', 'health', 'science', 'sports', 'technology']
-            if category in valid_categories:
-                entities['category'] = category
-            else:
-                entities['category'] = 'general'
-        else:
-            entities['category'] = 'general'
-    
-    elif intent == 'wikipedia':
-        # Extract search query
-        query_pattern = r'(?:wikipedia|wiki|search|look up|information about)\s+(?:for\s+)?(.+?)(?:\?|$|please)'
-        query_match = re.search(query_pattern, user_input, re.IGNORECASE)
-        if query_match:
-            entities['query'] = query_match.group(1).strip()
-    
-    elif intent == 'app_control':
-        # Extract application name
-        app_pattern = r'(?:open|launch|start|run)\s+(?:the\s+)?(?:application\s+)?([A-Za-z\s]+?)(?:\s+application|\?|$|please)'
-        app_match = re.search(app_pattern, user_input, re.IGNORECASE)
-        if app_match:
-            app_name = app_match.group(1).strip().lower()
-            # Map common application names
-            app_map = {
-                'notepad': 'notepad',
-                'calculator': 'calc',
-                'paint': 'mspaint',
-                'command prompt': 'cmd',
-                'cmd': 'cmd',
-                'browser': 'msedge',
-                'edge': 'msedge',
-                'chrome': 'chrome',
-                'word': 'winword',
-                'excel': 'excel',
-                'powerpoint': 'powerpnt',
-                'spotify': 'spotify',
-                'facebook': 'facebook',
-                'instagram': 'instagram',
-                'fb': 'facebook',
-                'insta': 'instagram',
-                'whatsapp': 'whatsapp',
-                'watsapp': 'whatsapp',
-                'chatgpt': 'chatgpt',
-            }
-            entities['app_name'] = app_map.get(app_name, app_name)
-    
-    elif intent == 'system_control':
-        # Extract brightness/volume level
-        level_pattern = r'(?:set|change|adjust)\s+(?:the\s+)?(?:brightness|volume)\s+(?:to\s+)?(\d+)(?:\s*%)?'
-        level_match = re.search(level_pattern, user_input, re.IGNORECASE)
-        if level_match:
-            level = int(level_match.group(1))
-            if 'brightness' in user_input.lower():
-                entities['brightness'] = level
-            elif 'volume' in user_input.lower():
-                entities['volume'] = level
-    
-    elif intent == 'set_reminder':
-        # Extract reminder title and time
-        reminder_pattern = r'(?:remind|reminder|remind me)(?:\s+(?:to|about))?\s+(.+?)(?:\s+in\s+(\d+)\s+minutes?)?(?:\?|$|please)'
-        reminder_match = re.search(reminder_pattern, user_input, re.IGNORECASE)
-        if reminder_match:
-            entities['title'] = reminder_match.group(1).strip()
-            if reminder_match.group(2):
-                entities['minutes'] = int(reminder_match.group(2))
-            else:
-                entities['minutes'] = 5  # Default to 5 minutes
-    
-    elif intent == 'internet_speed':
-        # No specific entities needed for internet speed test
-        pass
-    
-    elif intent == 'file_explorer':
-        # Extract path if specified
-        path_pattern = r'(?:open|show|launch)(?:\s+(?:file explorer|files|documents))(?:\s+(?:in|at|for))?\s+(.+?)(?:\?|$|please)'
-        path_match = re.search(path_pattern, user_input, re.IGNORECASE)
-        if path_match:
-            entities['path'] = path_match.group(1).strip()
-    
+    extractor = _ENTITY_EXTRACTORS.get(intent)
+    if extractor is None:
+        return {}
+    started = time.perf_counter()
+    entities = extractor(user_input)
+    timing = _extractor_timings.setdefault(intent, [0, 0.0])
+    timing[0] += 1
+    timing[1] += time.perf_counter() - started
     return entities
 
-def process_nlp(user_input):
-    """Process user input with NLP techniques to understand intent and extract entities"""
-    intent, confidence = classify_intent(user_input)
-    entities = extract_entities(user_input, intent)
+
+def get_extractor_timings():
+    """Return per-intent extractor call counts and times, slowest total first"""
+    timings = {
+        intent: {
+            'calls': calls,
+            'total_ms': total * 1000,
+            'avg_ms': total * 1000 / calls,
+        }
+        for intent, (calls, total) in _extractor_timings.items()
+    }
+    return dict(sorted(timings.items(), key=lambda item: item[1]['total_ms'], reverse=True))
+
+
+def reset_extractor_timings():
+    _extractor_timings.clear()
+
+# Fuzzy matching for speech recognition errors
+FUZZY_MATCHING = True
+FUZZY_THRESHOLD = 0.55
+# Edit similarity the best n-gram match must also exceed, so that words which
+# merely share a few n-grams ("right"/"brightness") are left alone
+FUZZY_MIN_RATIO = 0.8
+FUZZY_MIN_LENGTH = 4
+FUZZY_NGRAM_RANGE = (2, 3)
+# Never corrected towards: a misheard word must not send an SOS
+FUZZY_EXCLUDED_INTENTS = ('emergency',)
+# The only intents a corrected input may be classified as: lookups without side
+# effects. "book a massage" must not become a WhatsApp message; such inputs
+# stay general queries.
+FUZZY_INTENTS = ('weather', 'news', 'wikipedia', 'system_info')
+
+_word_re = re.compile(r"[A-Za-z]+")
+_fuzzy_index = None
+
+
+def fuzzy_vocabulary(patterns=None):
+    """Words worth correcting towards: pattern words and known entity names"""
+    if patterns is None:
+        patterns = COMMAND_PATTERNS
+    texts = [p for intent, items in patterns.items() if intent not in FUZZY_EXCLUDED_INTENTS for p in items]
+    texts += list(APP_MAP) + list(VALID_NEWS_CATEGORIES)
+    words = set()
+    for text in texts:
+        for word in _word_re.findall(text.lower()):
+            if len(word) >= 3 and word not in stop_words:
+                words.add(word)
+    return sorted(words)
+
+
+def build_fuzzy_index(patterns=None):
+    """Character n-gram vectors of the vocabulary, one row per word in a sparse matrix"""
+    if patterns is None:
+        patterns = COMMAND_PATTERNS
+    words = fuzzy_vocabulary(patterns)
+    vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=FUZZY_NGRAM_RANGE)
+    return {
+        'signature': _patterns_signature(patterns),
+        'vectorizer': vectorizer,
+        'matrix': vectorizer.fit_transform(words).tocsr(),
+        'words': np.array(words),
+        'known': frozenset(words),
+    }
+
+
+def get_fuzzy_index():
+    global _fuzzy_index
+    if _fuzzy_index is None or _fuzzy_index['signature'] != _patterns_signature(COMMAND_PATTERNS):
+        _fuzzy_index = build_fuzzy_index()
+    return _fuzzy_index
+
+
+def correct_texts(user_inputs):
+    """Replace unknown words with the closest vocabulary word when it is close enough.
+
+    All unknown words of the batch are scored against the vocabulary in a
+    single sparse product; only the best match per word is then checked for
+    edit similarity.
+    """
+    index = get_fuzzy_index()
+    candidates = sorted({
+        word
+        for text in user_inputs
+        for word in _word_re.findall(text.lower())
+        if len(word) >= FUZZY_MIN_LENGTH and word not in index['known'] and word not in stop_words
+    })
+    if not candidates:
+        return list(user_inputs)
+    scores = (index['vectorizer'].transform(candidates) @ index['matrix'].T).toarray()
+    best = scores.argmax(axis=1)
+    best_scores = scores[np.arange(len(candidates)), best]
+    replacements = {
+        word: index['words'][match]
+        for word, match, score in zip(candidates, best, best_scores)
+        if score >= FUZZY_THRESHOLD and SequenceMatcher(None, word, index['words'][match]).ratio() > FUZZY_MIN_RATIO
+    }
+    if not replacements:
+        return list(user_inputs)
+    return [
+        _word_re.sub(lambda m: replacements.get(m.group(0).lower(), m.group(0)), text)
+        for text in user_inputs
+    ]
+
+
+@span("nlp.classify")
+def _classify_with_fuzzy_fallback(user_inputs):
+    """Classify inputs; retry the ones that fell through after correcting typos.
+
+    Returns (intent, confidence, corrected input or None, top intents) per input.
+    """
+    user_inputs = list(user_inputs)
+    if not user_inputs:
+        return []
+    intents = get_intent_names()
+    scores = score_intents(user_inputs)
+    classified = [
+        (intent, confidence, None, _top_intents(intents, row, TOP_K))
+        for (intent, confidence), row in zip(_decide_intents(intents, scores, INTENT_THRESHOLD), scores)
+    ]
+    if not FUZZY_MATCHING:
+        return classified
+    fallthrough = [i for i, result in enumerate(classified) if result[0] == 'general_query']
+    if not fallthrough:
+        return classified
+    corrected = correct_texts([user_inputs[i] for i in fallthrough])
+    changed = [(i, text) for i, text in zip(fallthrough, corrected) if text != user_inputs[i]]
+    if not changed:
+        return classified
+    retried_scores = score_intents([text for _, text in changed])
+    retried = _decide_intents(intents, retried_scores, INTENT_THRESHOLD)
+    for (i, text), (intent, confidence), row in zip(changed, retried, retried_scores):
+        if intent in FUZZY_INTENTS:
+            classified[i] = (intent, confidence, text, _top_intents(intents, row, TOP_K))
+    return classified
+
+def _build_nlp_result(user_input, intent, confidence, corrected_input=None, top_intents=()):
+    text = corrected_input or user_input
+    entities = extract_entities(text, intent)
     
     # Fallback: if open_website failed to extract a website, it might be an app
-    if intent == 'open_website' and not entities and 'open' in user_input.lower():
-        app_entities = extract_entities(user_input, 'app_control')
+    if intent == 'open_website' and not entities and 'open' in text.lower():
+        app_entities = extract_entities(text, 'app_control')
         if app_entities:
             intent = 'app_control'
             entities = app_entities
             
-    return {
+    result = {
         'input': user_input,
         'intent': intent,
         'confidence': float(confidence),
-        'entities': entities
+        'entities': entities,
+        'top_intents': list(top_intents),
+    }
+    if corrected_input:
+        result['corrected_input'] = corrected_input
+    return result
+
+# Result cache in front of process_nlp
+NLP_CACHE_SIZE = 512
+_nlp_cache = OrderedDict()
+_nlp_cache_lock = threading.Lock()
+_nlp_cache_stats = {'hits': 0, 'misses': 0}
+_nlp_cache_state = None
+
+
+def normalize_command(text):
+    return ' '.join(str(text).lower().split())
+
+
+def _copy_result(result, user_input):
+    copied = dict(result)
+    copied['input'] = user_input
+    copied['entities'] = dict(result['entities'])
+    copied['top_intents'] = list(result.get('top_intents', ()))
+    return copied
+
+
+def _check_nlp_cache_state():
+    """Drop cached results once the patterns or custom commands changed"""
+    global _nlp_cache_state
+    state = (_patterns_signature(COMMAND_PATTERNS), TOKENIZER_MODE, FUZZY_MATCHING, get_custom_commands_version())
+    if state != _nlp_cache_state:
+        _nlp_cache.clear()
+        _nlp_cache_state = state
+
+
+def _cache_lookup(key):
+    with _nlp_cache_lock:
+        _check_nlp_cache_state()
+        result = _nlp_cache.get(key)
+        if result is None:
+            _nlp_cache_stats['misses'] += 1
+            return None
+        _nlp_cache.move_to_end(key)
+        _nlp_cache_stats['hits'] += 1
+        return result
+
+
+def _cache_store(key, result):
+    with _nlp_cache_lock:
+        _nlp_cache[key] = result
+        _nlp_cache.move_to_end(key)
+        while len(_nlp_cache) > NLP_CACHE_SIZE:
+            _nlp_cache.popitem(last=False)
+
+
+def get_nlp_cache_stats():
+    with _nlp_cache_lock:
+        lookups = _nlp_cache_stats['hits'] + _nlp_cache_stats['misses']
+        return {
+            'size': len(_nlp_cache),
+            'maxsize': NLP_CACHE_SIZE,
+            'hits': _nlp_cache_stats['hits'],
+            'misses': _nlp_cache_stats['misses'],
+            'hit_rate': _nlp_cache_stats['hits'] / lookups if lookups else 0.0,
+        }
+
+
+def clear_nlp_cache():
+    with _nlp_cache_lock:
+        _nlp_cache.clear()
+        _nlp_cache_stats['hits'] = 0
+        _nlp_cache_stats['misses'] = 0
+
+
+@span("nlp.process")
+def process_nlp(user_input):
+    """Process user input with NLP techniques to understand intent and extract entities"""
+    key = normalize_command(user_input)
+    cached = _cache_lookup(key)
+    if cached is not None:
+        return _copy_result(cached, user_input)
+    intent, confidence, corrected, top = _classify_with_fuzzy_fallback([user_input])[0]
+    result = _build_nlp_result(user_input, intent, confidence, corrected, top)
+    _cache_store(key, _copy_result(result, user_input))
+    return result
+
+@span("nlp.process_batch")
+def process_nlp_batch(user_inputs):
+    """Process many inputs at once; results are returned in input order"""
+    user_inputs = list(user_inputs)
+    keys = [normalize_command(text) for text in user_inputs]
+    results = [None] * len(user_inputs)
+    missing = []
+    for position, (user_input, key) in enumerate(zip(user_inputs, keys)):
+        cached = _cache_lookup(key)
+        if cached is None:
+            missing.append(position)
+        else:
+            results[position] = _copy_result(cached, user_input)
+    classified = _classify_with_fuzzy_fallback([user_inputs[position] for position in missing])
+    for position, (intent, confidence, corrected, top) in zip(missing, classified):
+        results[position] = _build_nlp_result(user_inputs[position], intent, confidence, corrected, top)
+        _cache_store(keys[position], _copy_result(results[position], user_inputs[position]))
+    return results
+
+def warm_nlp_cache(commands):
+    """Precompute results for the given commands"""
+    process_nlp_batch(commands)
+
+def warm_nlp_cache_from_usage(limit=None):
+    """Seed the cache with the most frequent commands from the usage log"""
+    if limit is None:
+        limit = NLP_CACHE_SIZE
+    commands = [name for name, _ in get_top_commands(limit)]
+    warm_nlp_cache(commands)
+    return len(commands)
+
+# Persisted model artifact
+NLP_ARTIFACT_DIR = os.path.join(os.path.dirname(__file__), "nlp_artifact")
+NLP_ARTIFACT_VERSION = 1
+
+_ARTIFACT_ARRAYS = ('pattern_groups', 'group_starts', 'base_norm_sq', 'idf_present_sq', 'unseen_idf_sq')
+_ARTIFACT_MATRICES = ('shared_weights', 'norm_correction')
+
+
+def _artifact_fingerprint(patterns):
+    """Hash of everything the artifact depends on: patterns and preprocessing code"""
+    digest = hashlib.sha256()
+    tokenizer_rules = [regex.pattern for regex, _ in _FAST_TOKEN_RULES] + [_SPLIT_WORDS_RE.pattern, _SENTENCE_END_RE.pattern, sorted(_ABBREVIATIONS)]
+    digest.update(json.dumps([NLP_ARTIFACT_VERSION, TERM_PATTERN, TOKENIZER_MODE, tokenizer_rules, patterns]).encode('utf-8'))
+    for func in (_preprocess_cached, _lemmatize, _wordnet_lemma, precompute_lemma_table, build_intent_index, tokenize, fast_tokenize):
+        digest.update(inspect.getsource(inspect.unwrap(func)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def save_nlp_artifact(index=None, path=None):
+    """Write the intent index, stop words and lemma table to disk.
+
+    Arrays are raw .npy files so they can be memory-mapped at import. They are
+    named after the fingerprint and the manifest is replaced last, so readers
+    never see a half-written artifact.
+    """
+    if index is None:
+        index = get_intent_index()
+    path = path or NLP_ARTIFACT_DIR
+    os.makedirs(path, exist_ok=True)
+    fingerprint = _artifact_fingerprint(COMMAND_PATTERNS)
+    prefix = fingerprint[:16]
+    files = {}
+    for key in _ARTIFACT_ARRAYS:
+        files[key] = f"{prefix}_{key}.npy"
+        np.save(os.path.join(path, files[key]), np.asarray(index[key]))
+    for key in _ARTIFACT_MATRICES:
+        matrix = index[key]
+        for part in ('data', 'indices', 'indptr'):
+            name = f"{key}_{part}"
+            files[name] = f"{prefix}_{name}.npy"
+            np.save(os.path.join(path, files[name]), getattr(matrix, part))
+    vocabulary = sorted(index['vocabulary'], key=index['vocabulary'].get)
+    manifest = {
+        'version': NLP_ARTIFACT_VERSION,
+        'fingerprint': fingerprint,
+        'intents': index['intents'],
+        'vocabulary': vocabulary,
+        'pattern_count': len(index['pattern_groups']),
+        'stop_words': sorted(stop_words),
+        'lemma_table': _lemma_table,
+        'files': files,
     }
+    manifest_path = os.path.join(path, "manifest.json")
+    with open(manifest_path + ".tmp", "w") as f:
+        json.dump(manifest, f)
+    os.replace(manifest_path + ".tmp", manifest_path)
+    # Drop arrays of earlier fingerprints
+    for name in os.listdir(path):
+        if name.endswith(".npy") and not name.startswith(prefix):
+            try:
+                os.remove(os.path.join(path, name))
+            except OSError:
+                pass
+    return manifest_path
+
+
+def load_nlp_artifact(path=None, mmap_mode='r'):
+    """Memory-map a saved artifact; returns False when missing or out of date.
+
+    mmap_mode=None reads the arrays into memory so the files can be removed.
+    """
+    global _intent_index, _lemma_table, stop_words
+    path = path or NLP_ARTIFACT_DIR
+    try:
+        with open(os.path.join(path, "manifest.json"), "r") as f:
+            manifest = json.load(f)
+        if manifest.get('version') != NLP_ARTIFACT_VERSION:
+            return False
+        if manifest.get('fingerprint') != _artifact_fingerprint(COMMAND_PATTERNS):
+            return False
+        files = manifest['files']
+
+        def load(key):
+            return np.load(os.path.join(path, files[key]), mmap_mode=mmap_mode)
+
+        vocabulary = {term: col for col, term in enumerate(manifest['vocabulary'])}
+        index = {
+            'signature': _patterns_signature(COMMAND_PATTERNS),
+            'intents': manifest['intents'],
+            'vocabulary': vocabulary,
+        }
+        for key in _ARTIFACT_ARRAYS:
+            index[key] = load(key)
+        for key in _ARTIFACT_MATRICES:
+            index[key] = sparse.csr_matrix(
+                (load(f"{key}_data"), load(f"{key}_indices"), load(f"{key}_indptr")),
+                shape=(manifest['pattern_count'], len(vocabulary)),
+            )
+    except (OSError, ValueError, KeyError):
+        return False
+    stop_words = set(manifest['stop_words'])
+    _lemma_table = dict(manifest['lemma_table'])
+    _intent_index = index
+    return True
+
+
+def build_nlp_artifact(path=None):
+    """Build the intent index from scratch and persist it; the only step that writes NLP_ARTIFACT_DIR"""
+    global _intent_index
+    _intent_index = build_intent_index()
+    return save_nlp_artifact(_intent_index, path)
+
+
+def ensure_nlp_artifact():
+    """Build the artifact when none was loaded at import, so later starts can map it.
+
+    Called once by the app at startup; returns the manifest path when one was written.
+    """
+    global _artifact_loaded
+    if _artifact_loaded:
+        return None
+    try:
+        manifest_path = build_nlp_artifact()
+    except OSError as e:
+        print(f"Warning: Could not save NLP artifact: {e}")
+        return None
+    _artifact_loaded = True
+    return manifest_path
+
+
+# The artifact only covers pattern words, so WordNet is still needed for everything else
+_ensure_nltk_resources()
+# A current artifact supplies the index, stop words and lemma table
+_artifact_loaded = load_nlp_artifact()
+if not _artifact_loaded:
+    stop_words = set(stopwords.words('english'))
 
 # Example usage
 if __name__ == "__main__":
+    if "--build-artifact" in sys.argv:
+        print(f"NLP artifact written to {build_nlp_artifact()}")
+        sys.exit(0)
+
     # Test the NLP processor
     test_inputs = [
         "What's the weather like in New York?",
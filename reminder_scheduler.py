@@ -0,0 +1,290 @@
+import math
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import task_manager
+from core_voice import speak
+
+
+TICK_SECONDS = 1.0
+# Four wheels of 64 slots cover 64**4 ticks (about 194 days at one tick a second)
+WHEEL_BITS = 6
+WHEEL_LEVELS = 4
+# Longest the scheduler sleeps at once, so a suspended machine or a clock
+# change delays a reminder by at most this much
+MAX_SLEEP_SECONDS = 60.0
+
+# Reminders live in the task store (task_manager.TASKS_DB_PATH), one row each
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reminders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    due_at TEXT NOT NULL
+);
+"""
+_COLUMNS = "id, title, created_at, due_at"
+
+
+class TimerWheel:
+    """Hierarchical timing wheel: O(1) add, amortized O(1) per tick.
+
+    Level 0 has one slot per tick. An item due further away goes to the
+    first level whose slot span covers it and is moved down a level each time
+    the wheel below wraps into that slot.
+    """
+
+    def __init__(self, current_tick, bits=WHEEL_BITS, levels=WHEEL_LEVELS):
+        self.bits = bits
+        self.size = 1 << bits
+        self.mask = self.size - 1
+        self.levels = levels
+        self.current = current_tick
+        self.slots = [[[] for _ in range(self.size)] for _ in range(levels)]
+        self.level_counts = [0] * levels
+        # Further away than the top wheel reaches; rechecked when it wraps
+        self.overflow = []
+        self.ready = []
+        self.count = 0
+
+    def add(self, item, due_tick):
+        self.count += 1
+        self._place(item, due_tick)
+
+    def _place(self, item, due_tick):
+        if due_tick <= self.current:
+            self.ready.append(item)
+            return
+        for level in range(self.levels):
+            shift = self.bits * (level + 1)
+            # Same block of the wheel above: this level's slot is unambiguous
+            if due_tick >> shift == self.current >> shift:
+                self.slots[level][(due_tick >> (self.bits * level)) & self.mask].append((due_tick, item))
+                self.level_counts[level] += 1
+                return
+        self.overflow.append((due_tick, item))
+
+    def _cascade(self, level):
+        index = (self.current >> (self.bits * level)) & self.mask
+        slot, self.slots[level][index] = self.slots[level][index], []
+        self.level_counts[level] -= len(slot)
+        for due_tick, item in slot:
+            self._place(item, due_tick)
+
+    def next_tick(self):
+        """Earliest tick at which advance can fire or move an item; None when empty"""
+        if self.ready:
+            return self.current
+        # Every item on a level is due before any slot of the levels above
+        for level in range(self.levels):
+            if not self.level_counts[level]:
+                continue
+            shift = self.bits * level
+            block = (self.current >> (shift + self.bits)) << (shift + self.bits)
+            index = (self.current >> shift) & self.mask
+            for slot in range(index + 1, self.size):
+                if self.slots[level][slot]:
+                    return block + (slot << shift)
+            return self.current + 1
+        if self.overflow:
+            span = 1 << (self.bits * self.levels)
+            return (self.current // span + 1) * span
+        return None
+
+    def advance(self, to_tick):
+        """Move the wheel to to_tick and return the items that fell due, earliest first"""
+        fired = self.ready
+        self.ready = []
+        while self.current < to_tick:
+            # Below the lowest wheel holding items nothing can fire; skip to its next cascade
+            level = next((level for level in range(self.levels) if self.level_counts[level]), self.levels)
+            if level == self.levels and not self.overflow:
+                self.current = to_tick
+                break
+            if level:
+                span = 1 << (self.bits * level)
+                self.current = max(self.current, min(to_tick, (self.current // span + 1) * span - 1))
+                if self.current >= to_tick:
+                    break
+            self.current += 1
+            if self.current & ((1 << (self.bits * self.levels)) - 1) == 0:
+                overflow, self.overflow = self.overflow, []
+                for due_tick, item in overflow:
+                    self._place(item, due_tick)
+            for level in range(self.levels - 1, 0, -1):
+                if self.current & ((1 << (self.bits * level)) - 1) == 0:
+                    self._cascade(level)
+            slot, self.slots[0][self.current & self.mask] = self.slots[0][self.current & self.mask], []
+            self.level_counts[0] -= len(slot)
+            fired.extend(item for _, item in slot)
+            fired.extend(self.ready)
+            self.ready = []
+        self.count -= len(fired)
+        return fired
+
+
+_lock = threading.Condition()
+_reminders = {}
+_wheel = None
+_thread = None
+_stop = False
+_callback = None
+_conn = None
+_conn_path = None
+
+
+def _due_tick(timestamp):
+    return math.ceil(timestamp / TICK_SECONDS)
+
+
+def _now_tick():
+    # Rounded down, so a reminder never fires before its due time
+    return math.floor(time.time() / TICK_SECONDS)
+
+
+def _default_callback(reminder):
+    speak(f"Reminder: {reminder['title']}")
+
+
+def set_reminder_callback(callback):
+    """Called as callback(reminder) from the scheduler thread; None restores spoken reminders.
+
+    GUI code must hand the work over to its own thread, e.g. through a queue.
+    """
+    global _callback
+    _callback = callback
+
+
+def _row_to_reminder(row):
+    return {"id": row[0], "title": row[1], "created_at": row[2], "due_at": row[3]}
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _get_connection():
+    """Connection to the task store; reopened when its path changes. Use under _lock."""
+    global _conn, _conn_path
+    path = task_manager.TASKS_DB_PATH
+    if _conn is None or _conn_path != path:
+        if _conn is not None:
+            _conn.close()
+        _conn = _connect(path)
+        _conn_path = path
+    return _conn
+
+
+def _delete(reminder_ids):
+    """Remove fired or cancelled reminders from the store; call with the lock held"""
+    try:
+        with _get_connection() as conn:
+            conn.executemany("DELETE FROM reminders WHERE id = ?", [(rid,) for rid in reminder_ids])
+    except sqlite3.Error as e:
+        print(f"Warning: Could not update saved reminders: {e}")
+
+
+def _schedule(reminder):
+    _reminders[reminder["id"]] = reminder
+    _wheel.add(reminder["id"], _due_tick(datetime.fromisoformat(reminder["due_at"]).timestamp()))
+
+
+def _run():
+    while True:
+        with _lock:
+            if _stop:
+                return
+            # Sleep until the next slot holding a reminder, or until woken by a change
+            next_tick = _wheel.next_tick()
+            timeout = MAX_SLEEP_SECONDS
+            if next_tick is not None:
+                timeout = min(max(next_tick * TICK_SECONDS - time.time(), 0), MAX_SLEEP_SECONDS)
+            _lock.wait(timeout)
+            if _stop:
+                return
+            # Cancelled reminders are no longer in _reminders
+            fired = [_reminders.pop(rid) for rid in _wheel.advance(_now_tick()) if rid in _reminders]
+            if fired:
+                _delete([reminder["id"] for reminder in fired])
+        for reminder in fired:
+            try:
+                (_callback or _default_callback)(reminder)
+            except Exception as e:
+                print(f"Error delivering reminder {reminder['title']}: {e}")
+
+
+def start_reminder_scheduler():
+    """Load saved reminders and start the scheduler thread; reminders missed while stopped fire at once"""
+    global _wheel, _thread, _stop
+    with _lock:
+        if _thread is not None:
+            return
+        _stop = False
+        _wheel = TimerWheel(_now_tick())
+        _reminders.clear()
+        for row in _get_connection().execute(f"SELECT {_COLUMNS} FROM reminders"):
+            try:
+                _schedule(_row_to_reminder(row))
+            except (TypeError, ValueError):
+                continue
+        _thread = threading.Thread(target=_run, name="assip-reminders", daemon=True)
+        _thread.start()
+
+
+def stop_reminder_scheduler():
+    """Stop the scheduler thread and close the store; saved reminders stay for the next start"""
+    global _thread, _stop, _conn, _conn_path
+    with _lock:
+        if _thread is None:
+            return
+        _stop = True
+        thread = _thread
+        _lock.notify_all()
+    thread.join()
+    with _lock:
+        _thread = None
+        if _conn is not None:
+            _conn.close()
+            _conn = None
+            _conn_path = None
+
+
+def add_reminder(title, seconds):
+    """Schedule a reminder seconds from now; it is saved so it survives a restart"""
+    start_reminder_scheduler()
+    now = datetime.now()
+    reminder = {
+        "title": str(title).strip(),
+        "created_at": now.isoformat(),
+        "due_at": datetime.fromtimestamp(now.timestamp() + float(seconds)).isoformat(),
+    }
+    with _lock:
+        with _get_connection() as conn:
+            cursor = conn.execute(
+                "INSERT INTO reminders (title, created_at, due_at) VALUES (?, ?, ?)",
+                (reminder["title"], reminder["created_at"], reminder["due_at"]),
+            )
+        reminder = {"id": cursor.lastrowid, **reminder}
+        _schedule(reminder)
+        _lock.notify_all()
+    return dict(reminder)
+
+
+def cancel_reminder(reminder_id):
+    with _lock:
+        if _reminders.pop(int(reminder_id), None) is None:
+            return False
+        _delete([int(reminder_id)])
+    return True
+
+
+def list_reminders():
+    """Pending reminders, soonest first"""
+    with _lock:
+        return sorted((dict(r) for r in _reminders.values()), key=lambda r: r["due_at"])
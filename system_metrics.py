@@ -0,0 +1,137 @@
+import os
+import shutil
+import socket
+import threading
+import time
+
+import psutil
+
+
+# Seconds between samples; CPU percentages are averaged over this window
+SAMPLE_INTERVAL = 2.0
+# The first CPU reading needs a short window of its own
+FIRST_SAMPLE_WINDOW = 0.25
+DISK_PATH = os.path.expanduser("~")
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+_ready = threading.Event()
+_stop = threading.Event()
+_sampler = None
+_listeners = []
+
+
+def set_sample_interval(seconds):
+    """Change how often the sampler takes a snapshot"""
+    global SAMPLE_INTERVAL
+    if seconds <= 0:
+        raise ValueError("The sample interval must be positive")
+    SAMPLE_INTERVAL = float(seconds)
+
+
+def add_sample_listener(callback):
+    """Call callback(snapshot) from the sampler thread after every sample"""
+    if callback not in _listeners:
+        _listeners.append(callback)
+
+
+def remove_sample_listener(callback):
+    if callback in _listeners:
+        _listeners.remove(callback)
+
+
+def _network_identity():
+    hostname = socket.gethostname()
+    try:
+        ip_address = socket.gethostbyname(hostname)
+    except OSError:
+        ip_address = "unknown"
+    return hostname, ip_address
+
+
+def take_sample():
+    """Read every metric once without blocking; CPU covers the time since the previous call"""
+    memory = psutil.virtual_memory()
+    disk = shutil.disk_usage(DISK_PATH)
+    battery = psutil.sensors_battery()
+    net = psutil.net_io_counters()
+    disk_io = psutil.disk_io_counters()
+    hostname, ip_address = _network_identity()
+    return {
+        "timestamp": time.time(),
+        "cpu_percent": psutil.cpu_percent(interval=None),
+        "cpu_per_core": psutil.cpu_percent(interval=None, percpu=True),
+        "cpu_count": psutil.cpu_count(logical=False),
+        "cpu_logical": psutil.cpu_count(logical=True),
+        "memory_total": memory.total,
+        "memory_used": memory.used,
+        "memory_percent": memory.percent,
+        "disk_total": disk.total,
+        "disk_used": disk.used,
+        "disk_percent": round((disk.used / disk.total) * 100, 2),
+        "disk_read_bytes": disk_io.read_bytes if disk_io else 0,
+        "disk_write_bytes": disk_io.write_bytes if disk_io else 0,
+        "battery_percent": battery.percent if battery else None,
+        "battery_plugged": battery.power_plugged if battery else None,
+        "net_bytes_sent": net.bytes_sent if net else 0,
+        "net_bytes_recv": net.bytes_recv if net else 0,
+        "hostname": hostname,
+        "ip_address": ip_address,
+    }
+
+
+def _store(snapshot):
+    global _snapshot
+    with _snapshot_lock:
+        _snapshot = snapshot
+    _ready.set()
+    for callback in list(_listeners):
+        try:
+            callback(snapshot)
+        except Exception as e:
+            print(f"Error in metrics listener: {e}")
+
+
+def _sample_loop():
+    # Prime the CPU counters so the first reading covers a real window
+    psutil.cpu_percent(interval=None)
+    psutil.cpu_percent(interval=None, percpu=True)
+    wait = FIRST_SAMPLE_WINDOW
+    while not _stop.wait(wait):
+        try:
+            _store(take_sample())
+        except Exception as e:
+            print(f"Error sampling system metrics: {e}")
+        wait = SAMPLE_INTERVAL
+
+
+def start_sampler():
+    """Start the background sampler once; later calls do nothing"""
+    global _sampler
+    with _snapshot_lock:
+        if _sampler is not None and _sampler.is_alive():
+            return
+        _stop.clear()
+        _sampler = threading.Thread(target=_sample_loop, name="assip-metrics", daemon=True)
+        _sampler.start()
+
+
+def stop_sampler():
+    global _sampler
+    _stop.set()
+    if _sampler is not None:
+        _sampler.join(timeout=SAMPLE_INTERVAL + 1)
+    _sampler = None
+
+
+def get_snapshot(timeout=1.0):
+    """The latest metrics snapshot; starts the sampler on first use.
+
+    Only the very first call waits (for up to timeout seconds) for a sample.
+    """
+    if _snapshot is None:
+        start_sampler()
+        if not _ready.wait(timeout):
+            return take_sample()
+    with _snapshot_lock:
+        return dict(_snapshot)
@@ -1,19 +1,25 @@
 import os
 import platform
 import re
-import shutil
 import socket
 import subprocess
-import threading
 import time
 import uuid
-from tkinter import messagebox
+from datetime import datetime
 
-import psutil
-import pyautogui
 import screen_brightness_control as sbc
 
+try:
+    import pyautogui
+except Exception as e:
+    # pyautogui needs a display; headless runs have none
+    print(f"Warning: Could not load pyautogui: {e}")
+    pyautogui = None
+
 from core_voice import speak
+from metrics_history import average, battery_drain_rate, parse_window, peak, start_history
+from reminder_scheduler import add_reminder
+from system_metrics import get_snapshot
 
 
 def get_ip_mac():
@@ -31,40 +37,102 @@ def get_ip_mac():
         return ""
 
 
+def _gigabytes(value):
+    return round(value / (1024**3), 2)
+
+
+def _battery_text(snapshot):
+    if snapshot["battery_percent"] is None:
+        return None
+    charging = "plugged in" if snapshot["battery_plugged"] else "on battery power"
+    return f"Battery is at {snapshot['battery_percent']}% and currently {charging}."
+
+
 def get_system_info():
-    cpu_percent = psutil.cpu_percent(interval=1)
-    cpu_count = psutil.cpu_count(logical=False)
-    cpu_logical = psutil.cpu_count(logical=True)
-    memory = psutil.virtual_memory()
-    memory_total = round(memory.total / (1024**3), 2)
-    memory_used = round(memory.used / (1024**3), 2)
-    memory_percent = memory.percent
-    home_path = os.path.expanduser("~")
-    disk_usage = shutil.disk_usage(home_path)
-    disk_total = round(disk_usage.total / (1024**3), 2)
-    disk_used = round(disk_usage.used / (1024**3), 2)
-    disk_percent = round((disk_usage.used / disk_usage.total) * 100, 2)
+    snapshot = get_snapshot()
     battery_info = "Not available"
-    battery = psutil.sensors_battery()
-    if battery:
-        battery_percent = battery.percent
-        charging = "Plugged In" if battery.power_plugged else "On Battery"
-        battery_info = f"{battery_percent}% ({charging})"
-    hostname = socket.gethostname()
-    ip_address = socket.gethostbyname(hostname)
+    if snapshot["battery_percent"] is not None:
+        charging = "Plugged In" if snapshot["battery_plugged"] else "On Battery"
+        battery_info = f"{snapshot['battery_percent']}% ({charging})"
     info = f"""
     System Information:
-    CPU: {cpu_percent}% usage across {cpu_logical} logical cores ({cpu_count} physical)
-    Memory: {memory_used}GB used out of {memory_total}GB ({memory_percent}%)
-    Storage: {disk_used}GB used out of {disk_total}GB ({disk_percent}%)
-    Network: IP address {ip_address} on {hostname}
+    CPU: {snapshot['cpu_percent']}% usage across {snapshot['cpu_logical']} logical cores ({snapshot['cpu_count']} physical)
+    Memory: {_gigabytes(snapshot['memory_used'])}GB used out of {_gigabytes(snapshot['memory_total'])}GB ({snapshot['memory_percent']}%)
+    Storage: {_gigabytes(snapshot['disk_used'])}GB used out of {_gigabytes(snapshot['disk_total'])}GB ({snapshot['disk_percent']}%)
+    Network: IP address {snapshot['ip_address']} on {snapshot['hostname']}
     Battery: {battery_info}
     """
     print(info)
-    speak(f"Here's your system information. CPU usage is {cpu_percent}%, memory usage is {memory_percent}%, and disk usage is {disk_percent}%. Battery is {battery_info}.")
+    speak(f"Here's your system information. CPU usage is {snapshot['cpu_percent']}%, memory usage is {snapshot['memory_percent']}%, and disk usage is {snapshot['disk_percent']}%. Battery is {battery_info}.")
     return info
 
 
+def report_cpu_usage():
+    snapshot = get_snapshot()
+    speak(f"CPU usage is currently {snapshot['cpu_percent']}% across {snapshot['cpu_count']} physical cores.")
+
+
+def report_memory_usage():
+    snapshot = get_snapshot()
+    speak(
+        f"Memory usage is {snapshot['memory_percent']}%. {_gigabytes(snapshot['memory_used'])} gigabytes used "
+        f"out of {_gigabytes(snapshot['memory_total'])} gigabytes total."
+    )
+
+
+def report_disk_usage():
+    snapshot = get_snapshot()
+    speak(
+        f"Disk usage is {snapshot['disk_percent']}%. {_gigabytes(snapshot['disk_used'])} gigabytes used "
+        f"out of {_gigabytes(snapshot['disk_total'])} gigabytes total."
+    )
+
+
+def report_battery():
+    speak(_battery_text(get_snapshot()) or "Battery information is not available.")
+
+
+def report_network():
+    snapshot = get_snapshot()
+    speak(f"Your device name is {snapshot['hostname']} with IP address {snapshot['ip_address']}.")
+
+
+def report_metric_trend(stat, metric, command):
+    """Speak the average or peak of cpu/memory over the window named in the command"""
+    start_history()
+    metric = "cpu" if metric in ("cpu", "processor") else "memory"
+    label = "CPU" if metric == "cpu" else "memory"
+    if stat in ("average", "mean"):
+        seconds, since, window = parse_window(command)
+        value = average(metric, seconds, since)
+        if value is None:
+            speak(f"I don't have enough {label} history yet. Please ask again in a few minutes.")
+            return
+        speak(f"Average {label} usage {window} was {value:.1f}%.")
+        return
+    seconds, since, window = parse_window(command, default_seconds=None)
+    result = peak(metric, seconds, since)
+    if result is None:
+        speak(f"I don't have enough {label} history yet. Please ask again in a few minutes.")
+        return
+    value, timestamp = result
+    at = datetime.fromtimestamp(timestamp).strftime("%I:%M %p").lstrip("0")
+    speak(f"Peak {label} usage {window} was {value:.1f}% at {at}.")
+
+
+def report_battery_drain():
+    start_history()
+    rate = battery_drain_rate()
+    if rate is None:
+        speak("I need at least a few minutes of battery readings while unplugged to estimate the drain rate.")
+    elif rate <= 0:
+        speak("The battery is not draining right now.")
+    else:
+        level = get_snapshot()["battery_percent"]
+        remaining = f" At this rate it will last about {level / rate:.1f} more hours." if level else ""
+        speak(f"The battery is draining at about {rate:.1f}% per hour.{remaining}")
+
+
 def adjust_brightness(level):
     try:
         if 0 <= level <= 100:
@@ -77,6 +145,9 @@ def adjust_brightness(level):
 
 
 def adjust_volume(level):
+    if pyautogui is None:
+        speak("Volume control is not available on this machine.")
+        return
     try:
         if 0 <= level <= 100:
             pyautogui.press("volumemute")
@@ -107,36 +178,19 @@ def process_system_control(command, entities):
         adjust_volume(entities["volume"])
         return True
     if re.search(r"(cpu|processor)", command.lower()):
-        cpu_percent = psutil.cpu_percent(interval=1)
-        cpu_count = psutil.cpu_count(logical=False)
-        speak(f"CPU usage is currently {cpu_percent}% across {cpu_count} physical cores.")
+        report_cpu_usage()
         return True
     if re.search(r"(memory|ram)", command.lower()):
-        memory = psutil.virtual_memory()
-        memory_total = round(memory.total / (1024**3), 2)
-        memory_used = round(memory.used / (1024**3), 2)
-        speak(f"Memory usage is {memory.percent}%. {memory_used} gigabytes used out of {memory_total} gigabytes total.")
+        report_memory_usage()
         return True
     if re.search(r"(disk|storage|drive)", command.lower()):
-        home_path = os.path.expanduser("~")
-        disk_usage = shutil.disk_usage(home_path)
-        disk_total = round(disk_usage.total / (1024**3), 2)
-        disk_used = round(disk_usage.used / (1024**3), 2)
-        disk_percent = round((disk_usage.used / disk_usage.total) * 100, 2)
-        speak(f"Disk usage is {disk_percent}%. {disk_used} gigabytes used out of {disk_total} gigabytes total.")
+        report_disk_usage()
         return True
     if re.search(r"(battery|power)", command.lower()):
-        battery = psutil.sensors_battery()
-        if battery:
-            charging = "plugged in" if battery.power_plugged else "on battery power"
-            speak(f"Battery is at {battery.percent}% and currently {charging}.")
-        else:
-            speak("Battery information is not available.")
+        report_battery()
         return True
     if re.search(r"(network|internet|ip|connection)", command.lower()):
-        hostname = socket.gethostname()
-        ip_address = socket.gethostbyname(hostname)
-        speak(f"Your device name is {hostname} with IP address {ip_address}.")
+        report_network()
         return True
     get_system_info()
     return True
@@ -155,6 +209,16 @@ def open_file_explorer(path=None):
         speak(f"I couldn't open the file explorer. {str(e)}")
 
 
+def take_screenshot():
+    try:
+        # pywhatkit checks the internet connection on import, so load it only when needed
+        from pywhatkit import take_screenshot as capture_screen
+        capture_screen()
+        speak("Screenshot taken successfully.")
+    except Exception as e:
+        speak(f"I couldn't take a screenshot. {str(e)}")
+
+
 def open_app(app_name):
     app = app_name.strip()
     system_root = os.environ.get("SystemRoot", "C:\\Windows")
@@ -233,6 +297,7 @@ def check_internet_speed():
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
             text=True,
+            timeout=20,
         )
         if ping_result.returncode == 0:
             result = ping_result.stdout
@@ -252,11 +317,6 @@ def set_reminder(title, minutes):
     try:
         minutes = int(minutes)
         speak(f"Setting a reminder for {title} in {minutes} minutes.")
-
-        def reminder_callback():
-            messagebox.showinfo("Reminder", f"Reminder: {title}")
-            speak(f"Reminder: {title}")
-
-        threading.Timer(minutes * 60, reminder_callback).start()
+        add_reminder(title, minutes * 60)
     except Exception as e:
         speak(f"I couldn't set the reminder. {str(e)}")
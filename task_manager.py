@@ -1,12 +1,83 @@
+import bisect
+import heapq
 import json
 import os
+import re
+import sqlite3
+import threading
+import time
 from datetime import datetime, timedelta
 
+from tracing import span
 
+
+TASKS_DB_PATH = os.path.join(os.path.dirname(__file__), "tasks.db")
+# Tasks saved before the SQLite store; imported once into an empty database
 TASKS_PATH = os.path.join(os.path.dirname(__file__), "tasks.json")
+SCHEMA_VERSION = 1
+# Most IDs bound in one IN (...) list; old SQLite builds allow 999 parameters
+SQL_CHUNK_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    due_at TEXT,
+    completed INTEGER NOT NULL DEFAULT 0,
+    notified INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_due ON tasks (completed, notified, due_at);
+"""
+_COLUMNS = "id, title, created_at, due_at, completed, notified"
+
+_conn = None
+_conn_path = None
+_lock = threading.RLock()
+
+# Due-task scheduler: a min-heap of (due timestamp, task id). Entries whose task
+# was completed, deleted or announced are dropped from _due_times and skipped
+# when they reach the top of the heap.
+_due_changed = threading.Condition(_lock)
+_due_heap = []
+_due_times = {}
+_scheduler = None
+_scheduler_stop = False
+_on_due = None
+# Seconds the scheduler waits after a database error, doubling up to the maximum
+SCHEDULER_RETRY_SECONDS = 1.0
+SCHEDULER_MAX_RETRY_SECONDS = 60.0
+
+# Inverted index over task titles: token -> task IDs, plus the tokens in
+# sorted order for prefix lookups. Built on the first search, then kept up
+# to date by every function that adds, renames or removes tasks.
+_title_index = None
+_title_tokens = []
+_task_tokens = {}
+
+
+def _row_to_task(row):
+    return {
+        "id": row[0],
+        "title": row[1],
+        "created_at": row[2],
+        "due_at": row[3],
+        "completed": bool(row[4]),
+        "notified": bool(row[5]),
+    }
+
+
+def _normalize_due(due_at):
+    """ISO timestamps compare correctly as text only in one format; unreadable ones can never be due"""
+    if not due_at:
+        return None
+    try:
+        return datetime.fromisoformat(str(due_at)).isoformat()
+    except ValueError:
+        return None
 
 
-def _load_tasks():
+def _load_legacy_tasks():
     if not os.path.exists(TASKS_PATH):
         return []
     try:
@@ -19,78 +90,458 @@ def _load_tasks():
     return []
 
 
-def _save_tasks(tasks):
-    with open(TASKS_PATH, "w") as f:
-        json.dump(tasks, f, indent=2)
+def _migrate(conn):
+    """Import tasks.json into a new database, keeping task IDs; the JSON file is left in place"""
+    rows = []
+    for task in _load_legacy_tasks():
+        try:
+            task_id = int(task.get("id"))
+        except (TypeError, ValueError):
+            continue
+        rows.append(
+            (
+                task_id,
+                str(task.get("title", "")),
+                str(task.get("created_at") or datetime.now().isoformat()),
+                _normalize_due(task.get("due_at")),
+                int(bool(task.get("completed", False))),
+                int(bool(task.get("notified", False))),
+            )
+        )
+    with conn:
+        conn.executemany(f"INSERT OR IGNORE INTO tasks ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)", rows)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    if rows:
+        print(f"Imported {len(rows)} tasks from {TASKS_PATH}")
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+        _migrate(conn)
+    return conn
+
+
+def _get_connection():
+    """Shared connection to TASKS_DB_PATH; reopened when the path changes. Use under _lock."""
+    global _conn, _conn_path
+    if _conn is None or _conn_path != TASKS_DB_PATH:
+        if _conn is not None:
+            _conn.close()
+        _conn = _connect(TASKS_DB_PATH)
+        _conn_path = TASKS_DB_PATH
+        _reset_title_index()
+        if _scheduler is not None:
+            _load_schedule(_conn)
+    return _conn
+
+
+def _due_timestamp(due_at):
+    try:
+        return datetime.fromisoformat(due_at).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _load_schedule(conn):
+    """Fill the heap with every task still waiting to be announced"""
+    rows = conn.execute(
+        "SELECT id, due_at FROM tasks WHERE completed = 0 AND notified = 0 AND due_at IS NOT NULL"
+    ).fetchall()
+    _due_times.clear()
+    for task_id, due_at in rows:
+        timestamp = _due_timestamp(due_at)
+        if timestamp is not None:
+            _due_times[task_id] = timestamp
+    _due_heap[:] = [(timestamp, task_id) for task_id, timestamp in _due_times.items()]
+    heapq.heapify(_due_heap)
+    _due_changed.notify_all()
+
+
+def _schedule(task_id, due_at):
+    if _scheduler is None or not due_at:
+        return
+    timestamp = _due_timestamp(due_at)
+    if timestamp is None:
+        return
+    _due_times[task_id] = timestamp
+    heapq.heappush(_due_heap, (timestamp, task_id))
+    if _due_heap[0] == (timestamp, task_id):
+        _due_changed.notify_all()
+
+
+def _unschedule(task_ids):
+    for task_id in task_ids:
+        _due_times.pop(task_id, None)
+
+
+def _title_tokens_of(title):
+    return set(re.findall(r"[a-z0-9]+", str(title).lower()))
+
+
+def _reset_title_index():
+    global _title_index
+    _title_index = None
+    _title_tokens.clear()
+    _task_tokens.clear()
+
+
+def _index_title(task_id, title):
+    if _title_index is None:
+        return
+    _unindex_titles([task_id])
+    tokens = _title_tokens_of(title)
+    _task_tokens[task_id] = tokens
+    for token in tokens:
+        ids = _title_index.get(token)
+        if ids is None:
+            ids = _title_index[token] = set()
+            bisect.insort(_title_tokens, token)
+        ids.add(task_id)
+
+
+def _unindex_titles(task_ids):
+    if _title_index is None:
+        return
+    for task_id in task_ids:
+        for token in _task_tokens.pop(task_id, ()):
+            ids = _title_index[token]
+            ids.discard(task_id)
+            if not ids:
+                del _title_index[token]
+                del _title_tokens[bisect.bisect_left(_title_tokens, token)]
+
+
+def _get_title_index(conn):
+    global _title_index
+    if _title_index is None:
+        _title_index = {}
+        for task_id, title in conn.execute("SELECT id, title FROM tasks"):
+            tokens = _title_tokens_of(title)
+            _task_tokens[task_id] = tokens
+            for token in tokens:
+                _title_index.setdefault(token, set()).add(task_id)
+        _title_tokens[:] = sorted(_title_index)
+    return _title_index
+
+
+def _ids_with_prefix(index, prefix):
+    ids = set()
+    position = bisect.bisect_left(_title_tokens, prefix)
+    while position < len(_title_tokens) and _title_tokens[position].startswith(prefix):
+        ids |= index[_title_tokens[position]]
+        position += 1
+    return ids
+
+
+@span("tasks.search")
+def search_tasks(query, show_completed=False, limit=None):
+    """Tasks whose titles contain every word of the query, each word also matching as a prefix.
+
+    Titles with the query words as whole words come first, then by ID.
+    """
+    words = sorted(_title_tokens_of(query), key=len, reverse=True)
+    if not words:
+        return []
+    with _lock:
+        conn = _get_connection()
+        index = _get_title_index(conn)
+        matches = None
+        # Longest words first: they usually match the fewest tasks
+        for word in words:
+            ids = _ids_with_prefix(index, word)
+            matches = ids if matches is None else matches & ids
+            if not matches:
+                return []
+        tasks = _get_tasks(conn, matches)
+    if not show_completed:
+        tasks = [task for task in tasks if not task["completed"]]
+    tasks.sort(key=lambda task: (-len(_title_tokens_of(task["title"]) & set(words)), task["id"]))
+    return tasks[:limit] if limit is not None else tasks
+
+
+def close_task_store():
+    global _conn, _conn_path
+    with _lock:
+        if _conn is not None:
+            _conn.close()
+        _conn = None
+        _conn_path = None
+
+
+def _get_tasks(conn, task_ids):
+    """Tasks with the given IDs, in ID order; missing IDs are left out"""
+    rows = []
+    task_ids = list(task_ids)
+    # Stay well below SQLite's limit on bound parameters
+    for start in range(0, len(task_ids), SQL_CHUNK_SIZE):
+        chunk = task_ids[start:start + SQL_CHUNK_SIZE]
+        placeholders = ", ".join("?" * len(chunk))
+        rows.extend(conn.execute(f"SELECT {_COLUMNS} FROM tasks WHERE id IN ({placeholders})", chunk).fetchall())
+    return [_row_to_task(row) for row in sorted(rows)]
+
+
+def _due_in(minutes):
+    if minutes is None:
+        return None
+    try:
+        return (datetime.now() + timedelta(minutes=int(minutes))).isoformat()
+    except Exception:
+        return None
+
+
+@span("tasks.add")
+def add_tasks(items):
+    """Add several tasks in one transaction.
+
+    Each item is a title, a (title, minutes) pair or a dict with title and
+    optional minutes. Returns the new tasks in order.
+    """
+    created_at = datetime.now().isoformat()
+    tasks = []
+    for item in items:
+        if isinstance(item, dict):
+            title, minutes = item.get("title", ""), item.get("minutes")
+        elif isinstance(item, (tuple, list)):
+            title, minutes = item[0], item[1] if len(item) > 1 else None
+        else:
+            title, minutes = item, None
+        tasks.append(
+            {
+                "id": None,
+                "title": str(title).strip(),
+                "created_at": created_at,
+                "due_at": _due_in(minutes),
+                "completed": False,
+                "notified": False,
+            }
+        )
+    with _lock:
+        conn = _get_connection()
+        with conn:
+            for task in tasks:
+                task["id"] = conn.execute(
+                    "INSERT INTO tasks (title, created_at, due_at) VALUES (?, ?, ?)",
+                    (task["title"], task["created_at"], task["due_at"]),
+                ).lastrowid
+        for task in tasks:
+            _schedule(task["id"], task["due_at"])
+            _index_title(task["id"], task["title"])
+    return tasks
 
 
 def add_task(title, minutes=None):
-    tasks = _load_tasks()
-    task_id = max([t.get("id", 0) for t in tasks], default=0) + 1
-    due_at = None
-    if minutes is not None:
-        try:
-            due_at = (datetime.now() + timedelta(minutes=int(minutes))).isoformat()
-        except Exception:
-            due_at = None
-    task = {
-        "id": task_id,
-        "title": str(title).strip(),
-        "created_at": datetime.now().isoformat(),
-        "due_at": due_at,
-        "completed": False,
-        "notified": False,
-    }
-    tasks.append(task)
-    _save_tasks(tasks)
-    return task
+    return add_tasks([(title, minutes)])[0]
 
 
+@span("tasks.list")
 def list_tasks(show_completed=False):
-    tasks = _load_tasks()
-    if show_completed:
-        return tasks
-    return [t for t in tasks if not t.get("completed", False)]
+    query = f"SELECT {_COLUMNS} FROM tasks"
+    if not show_completed:
+        query += " WHERE completed = 0"
+    with _lock:
+        rows = _get_connection().execute(query + " ORDER BY id").fetchall()
+    return [_row_to_task(row) for row in rows]
+
+
+@span("tasks.complete")
+def complete_tasks(task_ids):
+    """Mark several tasks completed in one transaction; returns the ones that exist"""
+    task_ids = [int(task_id) for task_id in task_ids]
+    with _lock:
+        conn = _get_connection()
+        with conn:
+            conn.executemany("UPDATE tasks SET completed = 1 WHERE id = ?", [(task_id,) for task_id in task_ids])
+        _unschedule(task_ids)
+        return _get_tasks(conn, task_ids)
 
 
 def complete_task(task_id):
-    tasks = _load_tasks()
-    for task in tasks:
-        if task.get("id") == int(task_id):
-            task["completed"] = True
-            _save_tasks(tasks)
-            return task
-    return None
+    tasks = complete_tasks([task_id])
+    return tasks[0] if tasks else None
+
+
+@span("tasks.delete")
+def delete_tasks(task_ids):
+    """Delete several tasks in one transaction; returns the IDs that existed"""
+    task_ids = [int(task_id) for task_id in task_ids]
+    with _lock:
+        conn = _get_connection()
+        with conn:
+            existing = [task["id"] for task in _get_tasks(conn, task_ids)]
+            conn.executemany("DELETE FROM tasks WHERE id = ?", [(task_id,) for task_id in existing])
+        _unschedule(existing)
+        _unindex_titles(existing)
+    return existing
 
 
 def delete_task(task_id):
-    tasks = _load_tasks()
-    filtered = [t for t in tasks if t.get("id") != int(task_id)]
-    if len(filtered) == len(tasks):
-        return False
-    _save_tasks(filtered)
-    return True
+    return bool(delete_tasks([task_id]))
+
 
+@span("tasks.clear_completed")
+def clear_completed_tasks():
+    """Delete every completed task; returns how many were removed"""
+    with _lock:
+        conn = _get_connection()
+        with conn:
+            removed = [row[0] for row in conn.execute("SELECT id FROM tasks WHERE completed = 1")]
+            conn.execute("DELETE FROM tasks WHERE completed = 1")
+        _unindex_titles(removed)
+    return len(removed)
 
+
+@span("tasks.update")
+def update_tasks(updates):
+    """Apply several changes in one transaction; returns the updated tasks that exist.
+
+    Each update is a dict with an id and any of title, completed, or minutes
+    (a new due time from now, None to clear it). A new due time is announced
+    again even if the old one already was.
+    """
+    statements = []
+    for update in updates:
+        task_id = int(update["id"])
+        fields = {}
+        if "title" in update:
+            fields["title"] = str(update["title"]).strip()
+        if "completed" in update:
+            fields["completed"] = int(bool(update["completed"]))
+        if "minutes" in update:
+            fields["due_at"] = _due_in(update["minutes"])
+            fields["notified"] = 0
+        if fields:
+            assignments = ", ".join(f"{name} = ?" for name in fields)
+            statements.append((task_id, f"UPDATE tasks SET {assignments} WHERE id = ?", [*fields.values(), task_id]))
+    with _lock:
+        conn = _get_connection()
+        with conn:
+            for _, sql, params in statements:
+                conn.execute(sql, params)
+        tasks = _get_tasks(conn, [task_id for task_id, _, _ in statements])
+        for task in tasks:
+            _unschedule([task["id"]])
+            if not task["completed"] and not task["notified"]:
+                _schedule(task["id"], task["due_at"])
+            _index_title(task["id"], task["title"])
+    return tasks
+
+
+@span("tasks.pop_due")
 def pop_due_tasks():
-    tasks = _load_tasks()
-    due = []
-    now = datetime.now()
-    changed = False
-    for task in tasks:
-        if task.get("completed"):
-            continue
-        due_at = task.get("due_at")
-        if not due_at:
-            continue
-        try:
-            due_time = datetime.fromisoformat(due_at)
-        except Exception:
-            continue
-        if due_time <= now and not task.get("notified", False):
-            task["notified"] = True
-            due.append(task)
-            changed = True
-    if changed:
-        _save_tasks(tasks)
+    now = datetime.now().isoformat()
+    with _lock:
+        conn = _get_connection()
+        with conn:
+            rows = conn.execute(
+                f"SELECT {_COLUMNS} FROM tasks "
+                "WHERE completed = 0 AND notified = 0 AND due_at IS NOT NULL AND due_at <= ? ORDER BY id",
+                (now,),
+            ).fetchall()
+            if rows:
+                conn.executemany("UPDATE tasks SET notified = 1 WHERE id = ?", [(row[0],) for row in rows])
+        _unschedule([row[0] for row in rows])
+    due = [_row_to_task(row) for row in rows]
+    for task in due:
+        task["notified"] = True
+    return due
+
+
+def _claim(conn, task_ids):
+    """Mark the given tasks announced; returns the ones that were still waiting"""
+    with conn:
+        # _get_tasks reads in chunks, so a long overdue backlog stays under SQLite's parameter limit
+        due = [task for task in _get_tasks(conn, task_ids) if not task["completed"] and not task["notified"]]
+        conn.executemany("UPDATE tasks SET notified = 1 WHERE id = ?", [(task["id"],) for task in due])
+    for task in due:
+        task["notified"] = True
     return due
+
+
+def _next_due():
+    """Pop every heap entry that is due now; returns (task ids, seconds until the next one or None)"""
+    now = time.time()
+    task_ids = []
+    while _due_heap:
+        timestamp, task_id = _due_heap[0]
+        if _due_times.get(task_id) != timestamp:
+            heapq.heappop(_due_heap)
+        elif timestamp <= now:
+            heapq.heappop(_due_heap)
+            del _due_times[task_id]
+            task_ids.append(task_id)
+        else:
+            return task_ids, timestamp - now
+    return task_ids, None
+
+
+def _scheduler_loop():
+    retry = SCHEDULER_RETRY_SECONDS
+    reload = False
+    while True:
+        with _due_changed:
+            while True:
+                if _scheduler_stop:
+                    return
+                try:
+                    conn = _get_connection()
+                    if reload:
+                        # Puts back the entries popped before the error
+                        _load_schedule(conn)
+                        reload = False
+                    task_ids, wait = _next_due()
+                    due = _claim(conn, task_ids) if task_ids else []
+                except Exception as e:
+                    # A locked or unreadable database must not end the thread
+                    print(f"Error checking due tasks, retrying in {retry:g}s: {e}")
+                    reload = True
+                    _due_changed.wait(retry)
+                    retry = min(retry * 2, SCHEDULER_MAX_RETRY_SECONDS)
+                    continue
+                retry = SCHEDULER_RETRY_SECONDS
+                if due:
+                    break
+                if task_ids:
+                    continue
+                # Sleeps until the next task is due or the heap changes
+                _due_changed.wait(wait)
+        for task in due:
+            try:
+                _on_due(task)
+            except Exception as e:
+                print(f"Error announcing task {task['id']}: {e}")
+
+
+def start_due_scheduler(on_due):
+    """Call on_due(task) from a background thread as each task falls due.
+
+    Waits on a heap of due times, so checking costs nothing while no task
+    is due, however many tasks are saved.
+    """
+    global _scheduler, _scheduler_stop, _on_due
+    with _due_changed:
+        _on_due = on_due
+        if _scheduler is not None:
+            return
+        _scheduler_stop = False
+        _scheduler = threading.Thread(target=_scheduler_loop, name="assip-tasks", daemon=True)
+        _load_schedule(_get_connection())
+        _scheduler.start()
+
+
+def stop_due_scheduler():
+    global _scheduler, _scheduler_stop
+    with _due_changed:
+        if _scheduler is None:
+            return
+        _scheduler_stop = True
+        thread = _scheduler
+        _due_changed.notify_all()
+    thread.join()
+    with _due_changed:
+        _scheduler = None
+        _due_heap.clear()
+        _due_times.clear()
@@ -0,0 +1,77 @@
+import threading
+import unittest
+from unittest.mock import patch
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import background_jobs
+import core_voice
+
+
+def wait_idle(timeout=2.0):
+    """Wait for finished jobs to release their slots"""
+    waited = 0.0
+    while background_jobs.list_jobs() and waited < timeout:
+        threading.Event().wait(0.01)
+        waited += 0.01
+    return background_jobs.list_jobs()
+
+
+class TestBackgroundJobs(unittest.TestCase):
+
+    def setUp(self):
+        background_jobs.set_background_execution(True)
+
+    def tearDown(self):
+        background_jobs.cancel_jobs()
+        wait_idle()
+        background_jobs.set_background_execution(False)
+
+    def test_inline_when_disabled(self):
+        background_jobs.set_background_execution(False)
+        self.assertEqual(background_jobs.run_slow("sum", 1, sum, [1, 2]), 3)
+
+    @patch('background_jobs.speak')
+    def test_slow_job_is_acknowledged(self, mock_speak):
+        release = threading.Event()
+        with patch.object(background_jobs, "ACK_AFTER", 0.05):
+            job = background_jobs.run_slow("the news", 5, release.wait, 5)
+        self.assertIsNotNone(job)
+        threading.Event().wait(0.2)
+        mock_speak.assert_called_with("Still working on the news...")
+        release.set()
+        job["future"].result(timeout=1)
+
+    @patch('background_jobs.speak')
+    def test_deadline_silences_running_handler(self, mock_speak):
+        release = threading.Event()
+        heard = []
+
+        def handler():
+            release.wait(5)
+            heard.append(threading.get_ident() in core_voice._silenced_threads)
+
+        job = background_jobs.submit_job("the weather", handler, deadline=0.05)
+        threading.Event().wait(0.2)
+        self.assertEqual(job["state"], "cancelled")
+        mock_speak.assert_called_with("Sorry, the weather is taking too long, so I stopped waiting.")
+        release.set()
+        job["future"].result(timeout=1)
+        self.assertEqual(heard, [True])
+        self.assertEqual(wait_idle(), [])
+
+    @patch('background_jobs.speak')
+    def test_full_pool_turns_jobs_away(self, mock_speak):
+        release = threading.Event()
+        jobs = [background_jobs.submit_job(f"job {i}", release.wait, 5) for i in range(background_jobs.MAX_PENDING)]
+        self.assertIsNone(background_jobs.submit_job("one more", release.wait, 5))
+        release.set()
+        for job in jobs:
+            job["future"].result(timeout=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import json
+import unittest
+import os
+import sys
+import tempfile
+from contextlib import redirect_stdout
+from io import StringIO
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import benchmarks
+import nlp_processor
+
+
+class TestBenchmarkCorpus(unittest.TestCase):
+
+    def test_corpus_covers_every_intent(self):
+        """The labeled corpus has a few hundred utterances for each intent."""
+        corpus = benchmarks.load_corpus()
+        counts = {}
+        for _, intent in corpus:
+            counts[intent] = counts.get(intent, 0) + 1
+        self.assertEqual(set(counts), set(nlp_processor.COMMAND_PATTERNS) | {"general_query"})
+        self.assertTrue(all(count >= 200 for count in counts.values()))
+
+    def test_regressions_are_reported(self):
+        baseline = {"nlp": {"p50_ms": 1.0, "p95_ms": 2.0, "p99_ms": 3.0, "accuracy": 0.9}}
+        same = {"nlp": dict(baseline["nlp"])}
+        self.assertEqual(benchmarks.compare_to_baseline(same, baseline), [])
+        slower = {"nlp": dict(baseline["nlp"], p95_ms=3.0, accuracy=0.8)}
+        failures = benchmarks.compare_to_baseline(slower, baseline)
+        self.assertEqual(len(failures), 2)
+
+    def test_committed_baseline_gates_accuracy(self):
+        """The saved baseline has accuracy but no machine-specific latency."""
+        with open(benchmarks.BASELINE_PATH) as f:
+            baseline = json.load(f)
+        self.assertEqual(set(baseline), {"nlp", "router"})
+        for summary in baseline.values():
+            self.assertEqual(set(summary), {"count", "accuracy"})
+        worse = {"nlp": {"count": baseline["nlp"]["count"], "accuracy": baseline["nlp"]["accuracy"] - 0.05,
+                         "p50_ms": 1e6, "p95_ms": 1e6, "p99_ms": 1e6}}
+        self.assertEqual(len(benchmarks.compare_to_baseline(worse, baseline)), 1)
+
+    def test_missing_baseline_fails_the_run(self):
+        with tempfile.TemporaryDirectory() as tmp, redirect_stdout(StringIO()):
+            missing = os.path.join(tmp, "baseline.json")
+            self.assertEqual(benchmarks.run_pipeline_benchmark(("nlp",), baseline_path=missing, limit=20), 1)
+            self.assertEqual(benchmarks.run_pipeline_benchmark(("nlp",), baseline_path=missing, limit=20, save_baseline=True), 0)
+            self.assertEqual(benchmarks.run_pipeline_benchmark(("nlp",), baseline_path=missing, limit=20), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,5 @@
+import re
+import tempfile
 import unittest
 from unittest.mock import MagicMock, patch
 import os
@@ -7,9 +9,22 @@ import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 import command_router
+import usage_tracker
+from command_registry import parse_custom_action, register_route, unregister_route
 
 class TestCommandRouter(unittest.TestCase):
 
+    def setUp(self):
+        # Every command is logged; keep the events out of the project's usage log
+        self.tmp = tempfile.TemporaryDirectory()
+        self.usage_path = patch.object(usage_tracker, "USAGE_PATH", os.path.join(self.tmp.name, "usage_log.json"))
+        self.usage_path.start()
+
+    def tearDown(self):
+        usage_tracker.flush_usage()
+        self.usage_path.stop()
+        self.tmp.cleanup()
+
     @patch('command_router.web_search')
     @patch('command_router.speak')
     def test_search_command(self, mock_speak, mock_web_search):
@@ -23,6 +38,55 @@ class TestCommandRouter(unittest.TestCase):
         command_router.process_command("show system information")
         mock_get_info.assert_called()
 
+    @patch('command_router.delete_tasks', return_value=[4])
+    @patch('command_router.complete_tasks', return_value=[{"id": 3}, {"id": 5}])
+    @patch('command_router.speak')
+    def test_multi_task_commands(self, mock_speak, mock_complete, mock_delete):
+        """Several task numbers go to one batch call."""
+        command_router.process_command("complete tasks 3, 5 and 7")
+        mock_complete.assert_called_once_with([3, 5, 7])
+        mock_speak.assert_any_call("Tasks 3 and 5 marked completed.")
+        mock_speak.assert_any_call("Task 7 not found.")
+        command_router.process_command("delete task 4")
+        mock_delete.assert_called_once_with([4])
+        mock_speak.assert_called_with("Task 4 deleted.")
+
+    @patch('command_router.web_search')
+    @patch('command_router.search_tasks', return_value=[{"id": 4, "title": "buy milk"}, {"id": 9, "title": "milk the cow"}])
+    @patch('command_router.speak')
+    def test_find_task_command(self, mock_speak, mock_search, mock_web_search):
+        command_router.process_command("find my task about milk")
+        mock_search.assert_called_once_with("milk")
+        mock_speak.assert_called_with("2 tasks match milk: 4. buy milk | 9. milk the cow")
+        mock_web_search.assert_not_called()
+
+    @patch('command_router.complete_tasks', return_value=[{"id": 4, "title": "buy milk"}])
+    @patch('command_router.search_tasks', return_value=[{"id": 4, "title": "buy milk"}])
+    @patch('command_router.speak')
+    def test_complete_named_task_command(self, mock_speak, mock_search, mock_complete):
+        command_router.process_command("complete the milk task")
+        mock_search.assert_called_once_with("milk")
+        mock_complete.assert_called_once_with([4])
+        mock_speak.assert_called_with("Task 4 marked completed: buy milk")
+
+    @patch('command_router.clear_completed_tasks', return_value=2)
+    @patch('command_router.speak')
+    def test_clear_completed_tasks_command(self, mock_speak, mock_clear):
+        command_router.process_command("clear completed tasks")
+        mock_clear.assert_called_once_with()
+        mock_speak.assert_called_with("Cleared 2 completed tasks.")
+
+    @patch('command_router.report_battery_drain')
+    @patch('command_router.report_metric_trend')
+    def test_metric_history_commands(self, mock_trend, mock_drain):
+        """Trend questions go to the history, not the current CPU reading."""
+        command_router.process_command("average cpu usage over the last 10 minutes")
+        mock_trend.assert_called_with("average", "cpu", "average cpu usage over the last 10 minutes")
+        command_router.process_command("what was the peak memory today")
+        mock_trend.assert_called_with("peak", "memory", "what was the peak memory today")
+        command_router.process_command("what is the battery drain rate")
+        mock_drain.assert_called_once_with()
+
     @patch('command_router.add_task')
     @patch('command_router.speak')
     def test_add_task_command(self, mock_speak, mock_add_task):
@@ -48,5 +112,146 @@ class TestCommandRouter(unittest.TestCase):
         # but let's check if the router handles it.
         pass
 
+    @patch('command_router.get_chat_response')
+    @patch('command_router.get_daily_news')
+    @patch('command_router.process_nlp')
+    def test_runner_up_intent_before_chat(self, mock_nlp, mock_news, mock_chat):
+        """An intent that cannot be handled falls to the runner-up, not the LLM."""
+        mock_nlp.return_value = {
+            "intent": "weather",
+            "entities": {},
+            "top_intents": [("weather", 0.5), ("news", 0.45), ("emergency", 0.3)],
+        }
+        command_router.process_command("weather and sports news")
+        mock_news.assert_called()
+        mock_chat.assert_not_called()
+
+    @patch('command_router.get_chat_response')
+    @patch('command_router.send_sos_sms')
+    @patch('command_router.process_nlp')
+    def test_emergency_runner_up_not_triggered(self, mock_nlp, mock_sos, mock_chat):
+        mock_nlp.return_value = {
+            "intent": "general_query",
+            "entities": {},
+            "top_intents": [("weather", 0.05), ("emergency", 0.04)],
+        }
+        command_router.process_command("is it going to be alright")
+        mock_sos.assert_not_called()
+        mock_chat.assert_called_with("is it going to be alright")
+
+    @patch('command_router.get_chat_response')
+    @patch('command_router.get_daily_news')
+    @patch('command_router.process_nlp')
+    def test_runner_up_needs_clear_lead(self, mock_nlp, mock_news, mock_chat):
+        mock_nlp.return_value = {
+            "intent": "weather",
+            "entities": {},
+            "top_intents": [("weather", 0.5), ("news", 0.45), ("wikipedia", 0.4)],
+        }
+        command_router.process_command("weather and sports news")
+        mock_news.assert_not_called()
+        mock_chat.assert_called_with("weather and sports news")
+
+    @patch('command_router.get_chat_response')
+    @patch('command_router.process_system_control')
+    @patch('command_router.check_internet_speed')
+    @patch('command_router.send_whatsapp_message')
+    @patch('command_router.open_file_explorer')
+    @patch('command_router.take_command', return_value="hi")
+    @patch('command_router.speak')
+    def test_runner_up_with_side_effects_not_taken(self, mock_speak, mock_take, mock_explorer, mock_whatsapp,
+                                                   mock_speed, mock_control, mock_chat):
+        """Runner-ups that would act on the system leave the command to the LLM."""
+        commands = [
+            "open up espn.com",
+            "execute whatsapp right now",
+            "i need a reminder to check the oven",
+            "explain the internet using wikipedia",
+            "hey what is climate change",
+        ]
+        for command in commands:
+            command_router.process_command(command)
+            mock_chat.assert_called_with(command)
+        for handler in (mock_explorer, mock_whatsapp, mock_speed, mock_control):
+            handler.assert_not_called()
+
+    @patch('command_router.get_chat_response')
+    @patch('command_router.open_app')
+    @patch('command_router.send_whatsapp_message')
+    @patch('command_router.take_command', return_value="hi")
+    @patch('command_router.speak')
+    def test_corrected_words_do_not_trigger_actions(self, mock_speak, mock_take, mock_whatsapp, mock_open_app, mock_chat):
+        """A near-miss word ("massage", "lunch") is not corrected into an action."""
+        for command in ("book a massage for tomorrow", "any good lunch recipe"):
+            command_router.process_command(command)
+            mock_chat.assert_called_with(command)
+        mock_whatsapp.assert_not_called()
+        mock_open_app.assert_not_called()
+
+    def test_compiled_router_keeps_rule_order(self):
+        """The compiled router picks the same rule as trying each pattern in turn."""
+        commands = [
+            "add task check battery status in 5 minutes",
+            "show my tasks",
+            "set the volume to 30 percent",
+            "volume up",
+            "mute the system status",
+            "cpu usage and memory usage",
+            "take a screenshot",
+            "search for disk usage",
+            "open the file explorer",
+            "check my internet speed",
+            "set a reminder to stretch in 10 minutes",
+            "what is the weather in mumbai",
+        ]
+        handled = []
+        rules = [
+            route._replace(handler=lambda name=route.name, **args: handled.append(name))
+            for route in command_router.get_routes()
+            if route.pattern
+        ]
+        router = command_router.compile_router(rules)
+        for command in commands:
+            expected = next((rule.name for rule in rules if re.search(rule.pattern, command)), None)
+            del handled[:]
+            self.assertEqual(command_router.dispatch_rules(command, command, router), expected, command)
+            self.assertEqual(handled, [expected] if expected else [], command)
+
+    def test_custom_phrase_only_checked_when_present(self):
+        """find_action only runs for commands containing a saved phrase."""
+        rules = [
+            route._replace(anchors=lambda: ["good night"]) if route.name == "custom_action" else route
+            for route in command_router.get_routes()
+        ]
+        router = command_router.compile_router(rules)
+        custom = [rule.name for rule in rules].index("custom_action")
+        self.assertIn(custom, command_router.candidate_rules(router, "good night"))
+        self.assertNotIn(custom, command_router.candidate_rules(router, "what is the weather"))
+
+    @patch('command_router.web_search')
+    def test_registered_route_takes_priority(self, mock_web_search):
+        """A route registered elsewhere is dispatched by priority with parsed arguments."""
+        received = []
+        register_route(
+            "flip_coin",
+            r"(?:flip|toss)\s+(\d+)\s+coins?",
+            lambda count: received.append(count),
+            priority=165,
+            anchors=("coin",),
+            args={"count": (1, int)},
+        )
+        try:
+            command_router.process_command("flip 3 coins and search for luck")
+        finally:
+            unregister_route("flip_coin")
+        self.assertEqual(received, [3])
+        mock_web_search.assert_not_called()
+
+    def test_custom_action_prefix_table(self):
+        self.assertEqual(parse_custom_action("OPEN_APP: Notepad ")[1], "Notepad")
+        self.assertIsNone(parse_custom_action("open_app"))
+        self.assertIsNone(parse_custom_action("system_info:now"))
+        self.assertIsNone(parse_custom_action("unknown:thing"))
+
 if __name__ == "__main__":
     unittest.main()
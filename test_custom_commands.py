@@ -0,0 +1,82 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import custom_commands
+
+
+def scan_action(items, command_text):
+    """find_action as a scan of the saved commands in order"""
+    command_text = str(command_text).strip().lower()
+    for item in items:
+        phrase = str(item.get("phrase", "")).strip().lower()
+        if phrase and (command_text == phrase or command_text.startswith(phrase + " ")):
+            return item.get("action", "")
+    return None
+
+
+class TestCustomCommandIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "custom_commands.json")
+        self.patch = patch.object(custom_commands, "CUSTOM_COMMANDS_PATH", self.path)
+        self.patch.start()
+        custom_commands._index = None
+
+    def tearDown(self):
+        self.patch.stop()
+        custom_commands._index = None
+        self.tmp.cleanup()
+
+    def write(self, items):
+        with open(self.path, "w") as f:
+            json.dump(items, f)
+
+    def test_matches_a_scan_of_the_file(self):
+        items = [
+            {"phrase": "good night", "action": "say:sleep well"},
+            {"phrase": "good", "action": "say:good"},
+            {"phrase": "good night everyone", "action": "say:night all"},
+            {"phrase": "open  two", "action": "say:double space"},
+            {"phrase": "GOOD", "action": "say:duplicate"},
+            {"phrase": "", "action": "say:empty"},
+            {"phrase": "work mode", "action": ""},
+        ]
+        self.write(items)
+        commands = [
+            "good", "good night", "Good Night Everyone", "good nightly", "goodbye", "good  night",
+            "open  two now", "open two", "work mode on", "", "bad night",
+        ]
+        for command in commands:
+            self.assertEqual(custom_commands.find_action(command), scan_action(items, command), command)
+
+    def test_file_is_parsed_once(self):
+        self.write([{"phrase": "lights off", "action": "say:done"}])
+        with patch.object(custom_commands, "_load", wraps=custom_commands._load) as load:
+            for _ in range(5):
+                custom_commands.find_action("lights off now")
+                custom_commands.list_custom_phrases()
+        self.assertEqual(load.call_count, 1)
+
+    def test_changes_refresh_the_index(self):
+        custom_commands.add_custom_command("coffee time", "say:brewing")
+        self.assertEqual(custom_commands.find_action("coffee time"), "say:brewing")
+        version = custom_commands.get_custom_commands_version()
+        self.write([{"phrase": "tea time", "action": "say:steeping"}])
+        os.utime(self.path, ns=(1, 1))
+        self.assertIsNone(custom_commands.find_action("coffee time"))
+        self.assertEqual(custom_commands.list_custom_phrases(), ["tea time"])
+        self.assertGreater(custom_commands.get_custom_commands_version(), version)
+        self.assertTrue(custom_commands.remove_custom_command("tea time"))
+        self.assertIsNone(custom_commands.find_action("tea time"))
+
+
+if __name__ == "__main__":
+    unittest.main()
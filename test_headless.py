@@ -0,0 +1,75 @@
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import unittest
+from contextlib import ExitStack
+from io import StringIO
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import headless
+import task_manager
+import tracing
+
+
+class TestHeadless(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.stack = ExitStack()
+        headless.use_data_dir(self.stack, self.tmp.name)
+        headless.install_stubs(self.stack)
+
+    def tearDown(self):
+        self.stack.close()
+        self.tmp.cleanup()
+
+    def test_commands_from_lines(self):
+        out = StringIO()
+        count = headless.run_lines(
+            ["add task water plants\n", "\n", "what is the weather in Pune\n"],
+            headless.jsonl_sink(out),
+        )
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(count, 2)
+        self.assertEqual(records[0]["output"], ["Task 1 added: water plants"])
+        self.assertEqual(records[1]["output"], ["<get_weather('pune',)>"])
+        self.assertGreater(records[1]["latency_ms"], 0)
+        self.assertGreaterEqual(headless.latency_report()["count"], 2)
+
+    def test_data_dir_holds_tasks_and_traces(self):
+        for path in (task_manager.TASKS_DB_PATH, tracing.TRACE_PATH):
+            self.assertEqual(os.path.dirname(path), self.tmp.name)
+
+    def test_system_handlers_are_stubbed(self):
+        out = StringIO()
+        headless.run_lines(
+            ["take a screenshot", "cpu usage", "average memory over the last hour"],
+            headless.jsonl_sink(out),
+        )
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(records[0]["output"], ["<take_screenshot()>"])
+        self.assertEqual(records[1]["output"], ["<report_cpu_usage()>"])
+        self.assertEqual(records[2]["output"], ["<report_metric_trend('average', 'memory', 'average memory over the last hour')>"])
+
+    def test_tcp_server(self):
+        server = headless.make_server(tcp="127.0.0.1:0")
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            with socket.create_connection(server.server_address, timeout=10) as conn:
+                conn.sendall(b"list my tasks\n")
+                reply = json.loads(conn.makefile().readline())
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual(reply["command"], "list my tasks")
+        self.assertEqual(reply["output"], ["You have no pending tasks."])
+
+
+if __name__ == "__main__":
+    unittest.main()
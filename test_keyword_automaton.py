@@ -0,0 +1,29 @@
+import unittest
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from keyword_automaton import build_automaton, find_keywords
+
+
+class TestKeywordAutomaton(unittest.TestCase):
+
+    def test_finds_overlapping_keywords(self):
+        automaton = build_automaton(["task", "tasks", "ask", "sound", "so"])
+        self.assertEqual(find_keywords(automaton, "show my tasks"), {"task", "tasks", "ask"})
+        self.assertEqual(find_keywords(automaton, "sound up"), {"sound", "so"})
+
+    def test_matches_substring_search(self):
+        keywords = ["he", "she", "his", "hers", "volume", "mute", "e"]
+        automaton = build_automaton(keywords)
+        for text in ["ushers", "mute the volume", "", "xyz", "hishe"]:
+            self.assertEqual(find_keywords(automaton, text), {k for k in keywords if k in text}, text)
+
+    def test_no_keywords(self):
+        self.assertEqual(find_keywords(build_automaton([]), "anything"), set())
+
+
+if __name__ == "__main__":
+    unittest.main()
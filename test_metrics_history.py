@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import metrics_history
+
+
+def snapshot(timestamp, cpu=10.0, memory=50.0, battery=None, plugged=None, sent=0):
+    return {
+        "timestamp": timestamp,
+        "cpu_percent": cpu,
+        "memory_percent": memory,
+        "disk_read_bytes": 0,
+        "disk_write_bytes": 0,
+        "net_bytes_sent": sent,
+        "net_bytes_recv": 0,
+        "battery_percent": battery,
+        "battery_plugged": plugged,
+    }
+
+
+class TestMetricsHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.patches = [patch.object(metrics_history, "HISTORY_SPAN", 600)]
+        for p in self.patches:
+            p.start()
+        metrics_history.set_history_resolution(10)
+        self.now = time.time()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        metrics_history.set_history_resolution(10)
+
+    def feed(self, seconds, step=2, **values):
+        start = self.now - seconds
+        for offset in np.arange(0, seconds + step, step):
+            metrics_history.record_sample(snapshot(start + offset, **{k: v(offset) for k, v in values.items()}))
+
+    def test_buffer_size_is_fixed(self):
+        self.feed(3600)
+        history = metrics_history.get_history()
+        self.assertEqual(len(history), 60)
+        self.assertTrue(np.all(np.diff(history[:, 0]) > 0))
+        self.assertGreaterEqual(history[0, 0], self.now - 610)
+
+    def test_samples_are_averaged_per_row(self):
+        self.feed(60, cpu=lambda t: t, sent=lambda t: t * 100)
+        rows = metrics_history.get_history()
+        self.assertEqual(len(rows), 6)
+        # Each row covers the samples after the previous row up to and including its own
+        self.assertTrue(np.allclose(rows[1:, 1], [16, 26, 36, 46, 56]))
+        self.assertTrue(np.allclose(rows[:, metrics_history.HISTORY_COLUMNS.index("net_sent")], 100.0))
+
+    def test_average_and_peak(self):
+        self.feed(300, cpu=lambda t: 90.0 if t >= 240 else 10.0, memory=lambda t: 30.0 + t / 10)
+        self.assertAlmostEqual(metrics_history.average("cpu", seconds=50), 90.0, delta=1)
+        self.assertLess(metrics_history.average("processor", seconds=300), 30.0)
+        value, timestamp = metrics_history.peak("ram", since=self.now - 300)
+        self.assertAlmostEqual(value, 59.0, delta=1)
+        self.assertAlmostEqual(timestamp, self.now, delta=1)
+        with self.assertRaises(ValueError):
+            metrics_history.average("gpu", seconds=60)
+
+    def test_battery_drain_rate(self):
+        self.assertIsNone(metrics_history.battery_drain_rate())
+        self.feed(600, battery=lambda t: 80.0 - t / 360, plugged=lambda t: False)
+        self.assertAlmostEqual(metrics_history.battery_drain_rate(), 10.0, delta=0.1)
+
+    def test_parse_window(self):
+        self.assertEqual(metrics_history.parse_window("average cpu over the last 10 minutes")[0], 600)
+        self.assertEqual(metrics_history.parse_window("past hour")[:1], (3600,))
+        seconds, since, window = metrics_history.parse_window("peak memory today")
+        self.assertEqual((seconds, since, window), (None, metrics_history.start_of_today(), "today"))
+        self.assertEqual(metrics_history.parse_window("peak memory", default_seconds=None)[2], "today")
+
+
+if __name__ == "__main__":
+    unittest.main()
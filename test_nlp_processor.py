@@ -0,0 +1,300 @@
+import unittest
+import os
+import sys
+import tempfile
+from unittest.mock import patch
+
+import numpy as np
+from nltk.tokenize import word_tokenize
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import nlp_processor
+
+SAMPLE_INPUTS = [
+    "what is the weather in London",
+    "search for Python programming",
+    "open youtube.com",
+    "send a message to mom saying hello",
+    "tell me the latest sports news",
+    "search wikipedia for albert einstein",
+    "open notepad application",
+    "check my internet speed",
+    "remind me to call dad in 10 minutes",
+    "set brightness to 40",
+    "what is my ip address",
+    "help help emergency",
+    "",
+    "tell me a joke",
+]
+
+TOKENIZER_INPUTS = SAMPLE_INPUTS + [
+    "What's the weather like in New York?",
+    "Send a message to Mom saying \"I'll be home soon\"",
+    "can't you open youtube.com, please!",
+    "i wanna set volume to 50% (now)",
+    "remind me at 10:30 -- don't forget... ok",
+    "'hello' said the user's friend.",
+    "search for cats; dogs & birds",
+    "cannot gonna gotta lemme gimme",
+    "open notepad. then play music",
+    "Check the weather. Tell me the news. Open youtube.com.",
+    "call mr. sharma at 5 p.m. tomorrow",
+    "wait... open the file explorer. thanks!",
+]
+
+
+def refit_scores(user_input):
+    """Per-intent TfidfVectorizer fit that the intent index replaces"""
+    processed_input = nlp_processor.preprocess_text(user_input)
+    scores = {}
+    for intent, patterns in nlp_processor.COMMAND_PATTERNS.items():
+        corpus = [nlp_processor.preprocess_text(p) for p in patterns] + [processed_input]
+        tfidf_matrix = TfidfVectorizer().fit_transform(corpus)
+        scores[intent] = np.max(cosine_similarity(tfidf_matrix[-1], tfidf_matrix[:-1]))
+    return scores
+
+
+class TestIntentIndex(unittest.TestCase):
+
+    def test_scores_match_per_intent_fit(self):
+        """Index scores equal the per-intent TF-IDF fits."""
+        index = nlp_processor.get_intent_index()
+        for text in SAMPLE_INPUTS:
+            expected = refit_scores(text)
+            scores = nlp_processor._score_intents(index, [nlp_processor.preprocess_text(text)])[0]
+            for intent, score in zip(index["intents"], scores):
+                self.assertAlmostEqual(score, expected[intent], places=9, msg=f"{text!r} / {intent}")
+
+    def test_index_rebuilds_when_patterns_change(self):
+        """Adding a pattern is picked up without an explicit rebuild, and nothing is written to disk."""
+        original = nlp_processor.COMMAND_PATTERNS
+        with tempfile.TemporaryDirectory() as path, patch.object(nlp_processor, "NLP_ARTIFACT_DIR", path):
+            try:
+                nlp_processor.COMMAND_PATTERNS = dict(original, weather=original["weather"] + ["umbrella"])
+                intent, _ = nlp_processor.classify_intent("do I need an umbrella")
+                self.assertEqual(intent, "weather")
+            finally:
+                nlp_processor.COMMAND_PATTERNS = original
+            self.assertNotIn("umbrella", nlp_processor.get_intent_index()["vocabulary"])
+            self.assertEqual(os.listdir(path), [])
+
+
+class TestTopIntents(unittest.TestCase):
+
+    def test_topk_comes_from_the_score_vector(self):
+        intent, confidence, scores, top = nlp_processor.classify_intent_topk("show me weather news", k=2)
+        names = nlp_processor.get_intent_names()
+        self.assertEqual(scores.shape, (len(names),))
+        self.assertEqual([name for name, _ in top], ["weather", "news"])
+        self.assertEqual(top[0], (intent, confidence))
+        self.assertAlmostEqual(top[1][1], scores[names.index("news")])
+
+    def test_threshold_is_configurable(self):
+        intent, confidence = nlp_processor.classify_intent("show me weather news", threshold=0.9)
+        self.assertEqual((intent, confidence), ("general_query", 0.0))
+
+    def test_process_nlp_reports_top_intents(self):
+        result = nlp_processor.process_nlp("check weather wikipedia")
+        self.assertEqual([name for name, _ in result["top_intents"]][:2], ["weather", "wikipedia"])
+
+
+class TestBatchProcessing(unittest.TestCase):
+
+    def test_batch_matches_single_calls(self):
+        """Batch results equal one-at-a-time results, in input order."""
+        batch = nlp_processor.process_nlp_batch(SAMPLE_INPUTS)
+        self.assertEqual(len(batch), len(SAMPLE_INPUTS))
+        for text, result in zip(SAMPLE_INPUTS, batch):
+            single = nlp_processor.process_nlp(text)
+            self.assertEqual(result["input"], text)
+            self.assertEqual(result["intent"], single["intent"])
+            self.assertAlmostEqual(result["confidence"], single["confidence"])
+            self.assertEqual(result["entities"], single["entities"])
+
+    def test_empty_batch(self):
+        self.assertEqual(nlp_processor.classify_intents([]), [])
+        self.assertEqual(nlp_processor.process_nlp_batch([]), [])
+
+
+class TestPreprocessCaches(unittest.TestCase):
+
+    def test_repeated_text_hits_cache(self):
+        """Preprocessing the same text twice is served from the cache."""
+        nlp_processor.clear_preprocess_caches()
+        first = nlp_processor.preprocess_text("Show me the latest headlines")
+        second = nlp_processor.preprocess_text("Show me the latest headlines")
+        self.assertEqual(first, second)
+        stats = nlp_processor.get_preprocess_cache_stats()
+        self.assertEqual(stats["text"]["hits"], 1)
+        self.assertEqual(stats["text"]["misses"], 1)
+
+    def test_pattern_vocabulary_uses_lemma_table(self):
+        """Pattern words are lemmatized from the precomputed table."""
+        nlp_processor.build_intent_index(precompute_lemmas=True)
+        nlp_processor.clear_preprocess_caches()
+        nlp_processor.preprocess_text("weather forecast")
+        stats = nlp_processor.get_preprocess_cache_stats()
+        self.assertEqual(stats["lemma"]["table_hits"], 2)
+        self.assertEqual(stats["lemma"]["misses"], 0)
+
+    def test_missing_wordnet_keeps_words(self):
+        """Words outside the lemma table pass through when WordNet cannot be loaded."""
+        nlp_processor.clear_preprocess_caches()
+        try:
+            with patch.object(nlp_processor.lemmatizer, "lemmatize", side_effect=LookupError("wordnet")):
+                self.assertEqual(nlp_processor.preprocess_text("weather in london"), "weather london")
+        finally:
+            nlp_processor.clear_preprocess_caches()
+
+
+class TestEntityExtractors(unittest.TestCase):
+
+    def test_search_patterns_keep_priority_order(self):
+        """The combined search regex picks the same pattern as trying them in turn."""
+        self.assertEqual(
+            nlp_processor.extract_entities("can you search for cheap flights", "web_search"),
+            {"query": "cheap flights"},
+        )
+        self.assertEqual(
+            nlp_processor.extract_entities("show me details about mars rovers", "web_search"),
+            {"query": "mars rovers"},
+        )
+        self.assertEqual(nlp_processor.extract_entities("google", "web_search"), {})
+
+    def test_app_names_are_mapped(self):
+        self.assertEqual(nlp_processor.extract_entities("open calculator", "app_control"), {"app_name": "calc"})
+
+    def test_extractor_timings(self):
+        nlp_processor.reset_extractor_timings()
+        nlp_processor.extract_entities("weather in Mumbai", "weather")
+        nlp_processor.extract_entities("hello", "general_query")
+        timings = nlp_processor.get_extractor_timings()
+        self.assertEqual(list(timings), ["weather"])
+        self.assertEqual(timings["weather"]["calls"], 1)
+
+
+class TestModelArtifact(unittest.TestCase):
+
+    def setUp(self):
+        # Loading replaces these; later tests must not see the temporary artifact
+        self.saved = (nlp_processor._intent_index, nlp_processor._lemma_table, nlp_processor.stop_words)
+
+    def tearDown(self):
+        nlp_processor._intent_index, nlp_processor._lemma_table, nlp_processor.stop_words = self.saved
+
+    def test_saved_artifact_round_trip(self):
+        """A loaded artifact scores exactly like the freshly built index."""
+        built = nlp_processor.build_intent_index()
+        processed = [nlp_processor.preprocess_text(text) for text in SAMPLE_INPUTS]
+        expected = nlp_processor._score_intents(built, processed)
+        with tempfile.TemporaryDirectory() as path:
+            nlp_processor.save_nlp_artifact(built, path)
+            self.assertTrue(nlp_processor.load_nlp_artifact(path, mmap_mode=None))
+            loaded = nlp_processor.get_intent_index()
+            np.testing.assert_allclose(nlp_processor._score_intents(loaded, processed), expected)
+
+    def test_artifact_invalidated_by_pattern_change(self):
+        original = nlp_processor.COMMAND_PATTERNS
+        with tempfile.TemporaryDirectory() as path:
+            nlp_processor.save_nlp_artifact(nlp_processor.build_intent_index(), path)
+            try:
+                nlp_processor.COMMAND_PATTERNS = dict(original, news=original["news"] + ["bulletin"])
+                self.assertFalse(nlp_processor.load_nlp_artifact(path, mmap_mode=None))
+            finally:
+                nlp_processor.COMMAND_PATTERNS = original
+            self.assertTrue(nlp_processor.load_nlp_artifact(path, mmap_mode=None))
+
+
+    def test_first_start_builds_the_artifact_once(self):
+        with tempfile.TemporaryDirectory() as path, patch.object(nlp_processor, "NLP_ARTIFACT_DIR", path):
+            with patch.object(nlp_processor, "_artifact_loaded", False):
+                self.assertEqual(nlp_processor.ensure_nlp_artifact(), os.path.join(path, "manifest.json"))
+                self.assertIsNone(nlp_processor.ensure_nlp_artifact())
+            self.assertTrue(nlp_processor.load_nlp_artifact(path, mmap_mode=None))
+
+    def test_fast_tokenizer_does_not_need_punkt(self):
+        with patch.object(nlp_processor.nltk.data, "find") as find, patch.object(nlp_processor.nltk, "download") as download:
+            with patch.object(nlp_processor, "TOKENIZER_MODE", "fast"):
+                nlp_processor._ensure_nltk_resources()
+            self.assertEqual(sorted(call.args[0] for call in find.call_args_list), ["corpora/stopwords", "corpora/wordnet"])
+            find.side_effect = LookupError("missing")
+            with patch.object(nlp_processor, "TOKENIZER_MODE", "nltk"):
+                nlp_processor._ensure_nltk_resources()
+            self.assertEqual(sorted(call.args[0] for call in download.call_args_list), ["punkt", "stopwords", "wordnet"])
+
+
+class TestFastTokenizer(unittest.TestCase):
+
+    def test_matches_word_tokenize_on_commands(self):
+        """The fast tokenizer keeps exactly the word tokens word_tokenize keeps, across sentences too."""
+        for text in TOKENIZER_INPUTS:
+            for variant in (text, text.lower()):
+                expected = [t for t in word_tokenize(variant) if t.isalnum()]
+                actual = [t for t in nlp_processor.fast_tokenize(variant) if t.isalnum()]
+                self.assertEqual(actual, expected, variant)
+
+    def test_unknown_mode_rejected(self):
+        with self.assertRaises(ValueError):
+            nlp_processor.set_tokenizer_mode("whitespace")
+
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        nlp_processor.clear_nlp_cache()
+
+    def test_repeated_command_is_cached(self):
+        first = nlp_processor.process_nlp("Open  notepad")
+        second = nlp_processor.process_nlp("open notepad")
+        self.assertEqual(first["intent"], second["intent"])
+        self.assertEqual(second["input"], "open notepad")
+        stats = nlp_processor.get_nlp_cache_stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["size"]), (1, 1, 1))
+
+    def test_cached_result_is_not_shared(self):
+        nlp_processor.process_nlp("weather in Mumbai")["entities"]["city"] = "changed"
+        self.assertEqual(nlp_processor.process_nlp("weather in Mumbai")["entities"]["city"], "Mumbai")
+
+    def test_pattern_change_invalidates(self):
+        nlp_processor.process_nlp("do I need an umbrella")
+        original = nlp_processor.COMMAND_PATTERNS
+        try:
+            nlp_processor.COMMAND_PATTERNS = dict(original, weather=original["weather"] + ["umbrella"])
+            self.assertEqual(nlp_processor.process_nlp("do I need an umbrella")["intent"], "weather")
+        finally:
+            nlp_processor.COMMAND_PATTERNS = original
+        self.assertEqual(nlp_processor.get_nlp_cache_stats()["hits"], 0)
+
+
+class TestFuzzyMatching(unittest.TestCase):
+
+    def setUp(self):
+        nlp_processor.clear_nlp_cache()
+
+    def test_misheard_keyword_is_corrected(self):
+        result = nlp_processor.process_nlp("whether in Mumbai")
+        self.assertEqual(result["intent"], "weather")
+        self.assertEqual(result["entities"], {"city": "Mumbai"})
+        self.assertEqual(result["corrected_input"], "weather in Mumbai")
+
+    def test_recognized_input_is_left_alone(self):
+        result = nlp_processor.process_nlp("what is the weather in London")
+        self.assertNotIn("corrected_input", result)
+        self.assertEqual(nlp_processor.process_nlp("tell me a joke")["intent"], "general_query")
+
+    def test_never_corrects_towards_emergency(self):
+        self.assertNotEqual(nlp_processor.process_nlp("wikipedea albert einstein")["intent"], "emergency")
+
+    def test_batch_corrects_like_single_calls(self):
+        texts = ["whether in Mumbai", "temprature in delhi", "tell me a joke"]
+        batch = nlp_processor.process_nlp_batch(texts)
+        nlp_processor.clear_nlp_cache()
+        self.assertEqual(batch, [nlp_processor.process_nlp(text) for text in texts])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import reminder_scheduler
+import task_manager
+from reminder_scheduler import TimerWheel
+
+
+class TestTimerWheel(unittest.TestCase):
+
+    def test_items_fire_on_their_tick(self):
+        start = 1_000_003
+        wheel = TimerWheel(start, bits=3, levels=3)
+        rng = random.Random(7)
+        due = {index: start + rng.randint(-2, 1500) for index in range(2000)}
+        for index, tick in due.items():
+            wheel.add(index, tick)
+        fired_at = {}
+        for tick in range(start, start + 1600, 7):
+            for index in wheel.advance(tick):
+                fired_at[index] = tick
+        self.assertEqual(set(fired_at), set(due))
+        for index, tick in due.items():
+            # Checked every 7 ticks: never early, at most one check late
+            self.assertTrue(tick <= fired_at[index] < max(tick, start) + 7, (index, tick, fired_at[index]))
+        self.assertEqual(wheel.count, 0)
+
+    def test_next_tick_wakes_only_for_due_slots(self):
+        """Advancing from one next_tick to the next fires every item exactly on time."""
+        start = 5_000_001
+        wheel = TimerWheel(start, bits=3, levels=3)
+        rng = random.Random(11)
+        due = {index: start + rng.randint(1, 3000) for index in range(300)}
+        for index, tick in due.items():
+            wheel.add(index, tick)
+        wakeups = 0
+        while True:
+            tick = wheel.next_tick()
+            if tick is None:
+                break
+            self.assertGreater(tick, wheel.current)
+            for index in wheel.advance(tick):
+                self.assertEqual(due.pop(index), tick)
+            wakeups += 1
+        self.assertEqual(due, {})
+        # One wake-up per distinct due tick plus the cascades, not one per tick
+        self.assertLess(wakeups, 600)
+        self.assertIsNone(TimerWheel(0).next_tick())
+
+    def test_idle_ticks_are_skipped(self):
+        wheel = TimerWheel(0)
+        self.assertEqual(wheel.advance(10 ** 9), [])
+        self.assertEqual(wheel.current, 10 ** 9)
+        wheel.add("far", 10 ** 9 + 64 ** 4 + 5)
+        self.assertEqual(wheel.advance(10 ** 9 + 64 ** 4 + 4), [])
+        self.assertEqual(wheel.advance(10 ** 9 + 64 ** 4 + 5), ["far"])
+
+
+class TestReminderScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "tasks.db")
+        self.patch = patch.object(task_manager, "TASKS_DB_PATH", self.db_path)
+        self.patch.start()
+        self.fired = []
+        self.event = threading.Event()
+        reminder_scheduler.set_reminder_callback(self.deliver)
+
+    def tearDown(self):
+        reminder_scheduler.stop_reminder_scheduler()
+        reminder_scheduler.set_reminder_callback(None)
+        self.patch.stop()
+        self.tmp.cleanup()
+
+    def saved_titles(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return [row[0] for row in conn.execute("SELECT title FROM reminders ORDER BY id")]
+        finally:
+            conn.close()
+
+    def deliver(self, reminder):
+        self.fired.append(reminder["title"])
+        self.event.set()
+
+    def test_reminders_fire_once_and_are_saved(self):
+        reminder_scheduler.add_reminder("later", 3600)
+        cancelled = reminder_scheduler.add_reminder("never", 0)
+        reminder_scheduler.cancel_reminder(cancelled["id"])
+        reminder_scheduler.add_reminder("stretch", 0.2)
+        self.assertTrue(self.event.wait(3))
+        time.sleep(0.1)
+        self.assertEqual(self.fired, ["stretch"])
+        self.assertEqual(self.saved_titles(), ["later"])
+        self.assertEqual([r["title"] for r in reminder_scheduler.list_reminders()], ["later"])
+        reminder_scheduler.stop_reminder_scheduler()
+        reminder_scheduler.start_reminder_scheduler()
+        self.assertEqual([r["title"] for r in reminder_scheduler.list_reminders()], ["later"])
+
+    def test_reminders_missed_while_stopped_fire_on_start(self):
+        missed = reminder_scheduler.add_reminder("missed", 3600)
+        reminder_scheduler.add_reminder("tonight", 7200)
+        reminder_scheduler.stop_reminder_scheduler()
+        past = (datetime.now() - timedelta(minutes=5)).isoformat()
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            conn.execute("UPDATE reminders SET due_at = ? WHERE id = ?", (past, missed["id"]))
+        conn.close()
+        reminder_scheduler.start_reminder_scheduler()
+        self.assertTrue(self.event.wait(3))
+        self.assertEqual(self.fired, ["missed"])
+        self.assertEqual(self.saved_titles(), ["tonight"])
+
+    @patch("system_services.speak")
+    def test_set_reminder_uses_the_scheduler(self, mock_speak):
+        import system_services
+
+        system_services.set_reminder("drink water", "15")
+        (reminder,) = reminder_scheduler.list_reminders()
+        self.assertEqual(reminder["title"], "drink water")
+        due = datetime.fromisoformat(reminder["due_at"]) - datetime.fromisoformat(reminder["created_at"])
+        self.assertEqual(due, timedelta(minutes=15))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import sys
+import time
+import unittest
+from collections import namedtuple
+from unittest.mock import MagicMock, patch
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import system_metrics
+import system_services
+
+Usage = namedtuple("Usage", "total used free")
+
+
+def fake_psutil():
+    fake = MagicMock()
+    fake.cpu_percent.side_effect = lambda interval=None, percpu=False: [10.0, 30.0] if percpu else 20.0
+    fake.cpu_count.side_effect = lambda logical=True: 2 if logical else 1
+    fake.virtual_memory.return_value = MagicMock(total=8 * 1024**3, used=2 * 1024**3, percent=25.0)
+    fake.sensors_battery.return_value = MagicMock(percent=80, power_plugged=False)
+    fake.net_io_counters.return_value = MagicMock(bytes_sent=100, bytes_recv=200)
+    fake.disk_io_counters.return_value = MagicMock(read_bytes=300, write_bytes=400)
+    return fake
+
+
+class TestSystemMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.patches = [
+            patch.object(system_metrics, "psutil", fake_psutil()),
+            patch.object(system_metrics.shutil, "disk_usage", return_value=Usage(100, 40, 60)),
+            patch.object(system_metrics, "_network_identity", return_value=("desk", "10.0.0.2")),
+            patch.object(system_metrics, "FIRST_SAMPLE_WINDOW", 0.01),
+        ]
+        for p in self.patches:
+            p.start()
+        system_metrics._snapshot = None
+        system_metrics._ready.clear()
+
+    def tearDown(self):
+        system_metrics.stop_sampler()
+        for p in reversed(self.patches):
+            p.stop()
+        system_metrics._snapshot = None
+        system_metrics._ready.clear()
+
+    def test_sample_covers_every_metric(self):
+        sample = system_metrics.take_sample()
+        self.assertEqual(sample["cpu_percent"], 20.0)
+        self.assertEqual(sample["cpu_per_core"], [10.0, 30.0])
+        self.assertEqual(sample["disk_percent"], 40.0)
+        self.assertEqual((sample["battery_percent"], sample["battery_plugged"]), (80, False))
+        self.assertEqual((sample["net_bytes_sent"], sample["net_bytes_recv"]), (100, 200))
+
+    def test_snapshot_is_read_without_blocking(self):
+        first = system_metrics.get_snapshot()
+        self.assertEqual(first["memory_percent"], 25.0)
+        started = time.perf_counter()
+        for _ in range(100):
+            system_metrics.get_snapshot()
+        self.assertLess(time.perf_counter() - started, 0.1)
+        system_metrics.psutil.cpu_percent.assert_called_with(interval=None, percpu=True)
+
+    def test_listeners_and_interval(self):
+        samples = []
+        system_metrics.add_sample_listener(samples.append)
+        self.addCleanup(system_metrics.remove_sample_listener, samples.append)
+        with patch.object(system_metrics, "SAMPLE_INTERVAL", 0.01):
+            system_metrics.start_sampler()
+            deadline = time.time() + 2
+            while len(samples) < 3 and time.time() < deadline:
+                time.sleep(0.01)
+        self.assertGreaterEqual(len(samples), 3)
+        with self.assertRaises(ValueError):
+            system_metrics.set_sample_interval(0)
+
+    @patch("system_services.speak")
+    def test_reports_read_the_snapshot(self, mock_speak):
+        system_services.process_system_control("cpu status", {})
+        mock_speak.assert_called_with("CPU usage is currently 20.0% across 1 physical cores.")
+        system_services.process_system_control("battery level", {})
+        mock_speak.assert_called_with("Battery is at 80% and currently on battery power.")
+        system_metrics.psutil.sensors_battery.return_value = None
+        system_metrics._store(system_metrics.take_sample())
+        system_services.report_battery()
+        mock_speak.assert_called_with("Battery information is not available.")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,225 @@
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import task_manager
+
+
+class TestTaskStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.json_path = os.path.join(self.tmp.name, "tasks.json")
+        self.patches = [
+            patch.object(task_manager, "TASKS_PATH", self.json_path),
+            patch.object(task_manager, "TASKS_DB_PATH", os.path.join(self.tmp.name, "tasks.db")),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        task_manager.close_task_store()
+        for p in self.patches:
+            p.stop()
+        self.tmp.cleanup()
+
+    def test_tasks_json_is_migrated_once(self):
+        past = (datetime.now() - timedelta(minutes=5)).isoformat()
+        legacy = [
+            {"id": 3, "title": "water plants", "created_at": past, "due_at": past, "completed": False, "notified": False},
+            {"id": 7, "title": "old report", "created_at": past, "due_at": "soon", "completed": True, "notified": True},
+        ]
+        with open(self.json_path, "w") as f:
+            json.dump(legacy, f)
+        with patch("sys.stdout"):
+            tasks = task_manager.list_tasks(show_completed=True)
+        self.assertEqual([(t["id"], t["title"], t["completed"]) for t in tasks], [(3, "water plants", False), (7, "old report", True)])
+        self.assertEqual(task_manager.add_task("next")["id"], 8)
+        # A second start does not import the file again
+        task_manager.close_task_store()
+        self.assertEqual(len(task_manager.list_tasks(show_completed=True)), 3)
+        self.assertEqual([t["id"] for t in task_manager.pop_due_tasks()], [3])
+        self.assertTrue(os.path.exists(self.json_path))
+
+    def test_due_tasks_are_popped_once(self):
+        due = task_manager.add_task("stretch", minutes=-1)
+        task_manager.add_task("later", minutes=30)
+        task_manager.add_task("someday")
+        done = task_manager.add_task("done already", minutes=-1)
+        task_manager.complete_task(done["id"])
+        popped = task_manager.pop_due_tasks()
+        self.assertEqual([(t["id"], t["notified"]) for t in popped], [(due["id"], True)])
+        self.assertEqual(task_manager.pop_due_tasks(), [])
+
+    def test_single_row_operations(self):
+        first = task_manager.add_task("first")
+        second = task_manager.add_task("second")
+        self.assertTrue(task_manager.complete_task(first["id"])["completed"])
+        self.assertIsNone(task_manager.complete_task(999))
+        self.assertTrue(task_manager.delete_task(second["id"]))
+        self.assertFalse(task_manager.delete_task(second["id"]))
+        self.assertEqual(task_manager.list_tasks(), [])
+        # IDs are never reused
+        self.assertEqual(task_manager.add_task("third")["id"], second["id"] + 1)
+
+    def test_batches_share_one_transaction(self):
+        tasks = task_manager.add_tasks(["one", ("two", 30), {"title": "three", "minutes": None}])
+        self.assertEqual([t["title"] for t in tasks], ["one", "two", "three"])
+        self.assertIsNotNone(tasks[1]["due_at"])
+        ids = [t["id"] for t in tasks]
+        completed = task_manager.complete_tasks([ids[0], ids[2], 999])
+        self.assertEqual([t["id"] for t in completed], [ids[0], ids[2]])
+        updated = task_manager.update_tasks([{"id": ids[1], "title": "two (renamed)", "minutes": -1}, {"id": 999, "title": "x"}])
+        self.assertEqual([(t["title"], t["notified"]) for t in updated], [("two (renamed)", False)])
+        self.assertEqual([t["id"] for t in task_manager.pop_due_tasks()], [ids[1]])
+        self.assertEqual(task_manager.clear_completed_tasks(), 2)
+        self.assertEqual(task_manager.delete_tasks([ids[1], ids[0]]), [ids[1]])
+        self.assertEqual(task_manager.list_tasks(show_completed=True), [])
+
+    def test_failed_batch_changes_nothing(self):
+        task_manager.add_tasks(["keep"])
+        with task_manager._lock:
+            task_manager._get_connection().execute(
+                "CREATE TEMP TRIGGER refuse BEFORE INSERT ON tasks WHEN NEW.title = 'boom' "
+                "BEGIN SELECT RAISE(ABORT, 'refused'); END"
+            )
+        with self.assertRaises(sqlite3.IntegrityError):
+            task_manager.add_tasks(["first", ("second", 5), "boom"])
+        self.assertEqual([t["title"] for t in task_manager.list_tasks()], ["keep"])
+
+    def test_large_claim_stays_under_parameter_limit(self):
+        tasks = task_manager.add_tasks([("overdue", -1)] * 1500)
+        with task_manager._lock:
+            conn = task_manager._get_connection()
+            if hasattr(conn, "setlimit"):
+                conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+            claimed = task_manager._claim(conn, [t["id"] for t in reversed(tasks)])
+        self.assertEqual([t["id"] for t in claimed], [t["id"] for t in tasks])
+        self.assertEqual(task_manager.pop_due_tasks(), [])
+
+    def test_title_search(self):
+        tasks = task_manager.add_tasks(["Buy milk", "Milk the cow", "Call the plumber", "buy bread and MILK"])
+        ids = [t["id"] for t in tasks]
+        self.assertEqual([t["id"] for t in task_manager.search_tasks("milk")], [ids[0], ids[1], ids[3]])
+        self.assertEqual([t["id"] for t in task_manager.search_tasks("bu mil")], [ids[0], ids[3]])
+        self.assertEqual([t["id"] for t in task_manager.search_tasks("plumb")], [ids[2]])
+        self.assertEqual(task_manager.search_tasks("milkshake"), [])
+        self.assertEqual(task_manager.search_tasks("   "), [])
+        # Whole-word matches rank above prefix matches
+        task_manager.add_task("milkman visit")
+        self.assertEqual(task_manager.search_tasks("milk")[-1]["title"], "milkman visit")
+
+    def test_title_index_follows_changes(self):
+        first, second = task_manager.add_tasks(["water the plants", "plan the trip"])
+        self.assertEqual(len(task_manager.search_tasks("pla")), 2)
+        task_manager.update_tasks([{"id": second["id"], "title": "book flights"}])
+        self.assertEqual([t["id"] for t in task_manager.search_tasks("pla")], [first["id"]])
+        self.assertEqual([t["id"] for t in task_manager.search_tasks("flight")], [second["id"]])
+        task_manager.complete_task(first["id"])
+        self.assertEqual(task_manager.search_tasks("plants"), [])
+        self.assertEqual(len(task_manager.search_tasks("plants", show_completed=True)), 1)
+        task_manager.clear_completed_tasks()
+        task_manager.delete_task(second["id"])
+        self.assertEqual(task_manager.search_tasks("plants", show_completed=True), [])
+        self.assertEqual(task_manager._title_tokens, [])
+
+    def test_search_is_fast_on_large_lists(self):
+        words = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel"]
+        task_manager.add_tasks([f"{words[i % 8]} {words[i // 8 % 8]} item {i}" for i in range(20000)])
+        task_manager.search_tasks("warm up")
+        started = time.perf_counter()
+        for _ in range(100):
+            found = task_manager.search_tasks("item 1234")
+        self.assertLess((time.perf_counter() - started) / 100, 0.001)
+        self.assertEqual([t["title"] for t in found][:1], ["charlie charlie item 1234"])
+
+    def test_due_query_uses_the_index(self):
+        with task_manager._lock:
+            plan = task_manager._get_connection().execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM tasks "
+                "WHERE completed = 0 AND notified = 0 AND due_at IS NOT NULL AND due_at <= ?",
+                (datetime.now().isoformat(),),
+            ).fetchall()
+        self.assertIn("idx_tasks_due", " ".join(str(row) for row in plan))
+
+
+class TestDueScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.patches = [
+            patch.object(task_manager, "TASKS_PATH", os.path.join(self.tmp.name, "tasks.json")),
+            patch.object(task_manager, "TASKS_DB_PATH", os.path.join(self.tmp.name, "tasks.db")),
+        ]
+        for p in self.patches:
+            p.start()
+        self.announced = []
+        self.event = threading.Event()
+
+    def tearDown(self):
+        task_manager.stop_due_scheduler()
+        task_manager.close_task_store()
+        for p in self.patches:
+            p.stop()
+        self.tmp.cleanup()
+
+    def announce(self, task):
+        self.announced.append(task["title"])
+        self.event.set()
+
+    def test_due_tasks_are_announced_once(self):
+        task_manager.add_task("overdue", minutes=-5)
+        task_manager.start_due_scheduler(self.announce)
+        self.assertTrue(self.event.wait(2))
+        self.event.clear()
+        task_manager.add_task("due now", minutes=0)
+        self.assertTrue(self.event.wait(2))
+        self.assertEqual(self.announced, ["overdue", "due now"])
+        self.assertEqual(task_manager.pop_due_tasks(), [])
+
+    def test_completed_and_future_tasks_stay_quiet(self):
+        task_manager.start_due_scheduler(self.announce)
+        later = task_manager.add_task("later", minutes=30)
+        # The scheduler cannot run while the lock is held
+        with task_manager._lock:
+            gone = task_manager.add_task("gone", minutes=-1)
+            task_manager.delete_task(gone["id"])
+            done = task_manager.add_task("done", minutes=-1)
+            task_manager.complete_task(done["id"])
+        task_manager.add_task("marker", minutes=-1)
+        self.assertTrue(self.event.wait(2))
+        self.assertEqual(self.announced, ["marker"])
+        self.assertEqual(task_manager._due_times, {later["id"]: task_manager._due_times[later["id"]]})
+        self.assertEqual([(t["title"], t["notified"]) for t in task_manager.list_tasks()], [("later", False), ("marker", True)])
+
+    def test_database_error_does_not_stop_the_scheduler(self):
+        claim = task_manager._claim
+        failures = []
+
+        def flaky_claim(conn, task_ids):
+            if not failures:
+                failures.append(task_ids)
+                raise sqlite3.OperationalError("database is locked")
+            return claim(conn, task_ids)
+
+        task_manager.add_task("overdue", minutes=-1)
+        with patch.object(task_manager, "_claim", flaky_claim), patch.object(task_manager, "SCHEDULER_RETRY_SECONDS", 0.05):
+            with patch("sys.stdout"):
+                task_manager.start_due_scheduler(self.announce)
+                self.assertTrue(self.event.wait(2))
+        self.assertEqual(len(failures), 1)
+        self.assertEqual(self.announced, ["overdue"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import tracing
+
+
+class TestTracing(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "traces.jsonl")
+        self.patches = [patch.object(tracing, "TRACE_PATH", self.path)]
+        for p in self.patches:
+            p.start()
+        tracing.set_tracing(True)
+
+    def tearDown(self):
+        tracing.set_tracing(False)
+        for p in self.patches:
+            p.stop()
+        self.tmp.cleanup()
+
+    def test_spans_are_written_per_trace(self):
+        @tracing.span("inner")
+        def inner():
+            return 42
+
+        with tracing.start_trace("command"):
+            trace_id = tracing.current_trace_id()
+            with tracing.span("outer"):
+                self.assertEqual(inner(), 42)
+        self.assertIsNone(tracing.current_trace_id())
+        (record,) = tracing.load_traces(self.path)
+        self.assertEqual(record["trace_id"], trace_id)
+        self.assertEqual([(s["name"], s["depth"]) for s in record["spans"]], [("outer", 0), ("inner", 1)])
+
+    def test_disabled_or_outside_a_trace_records_nothing(self):
+        with tracing.span("lonely"):
+            pass
+        tracing.set_tracing(False)
+        with tracing.start_trace("command"), tracing.span("stage"):
+            self.assertIsNone(tracing.current_trace_id())
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_trace_file_rolls_over(self):
+        with patch.object(tracing, "TRACE_MAX_BYTES", 200):
+            for _ in range(6):
+                with tracing.start_trace("command"), tracing.span("stage"):
+                    pass
+        self.assertTrue(os.path.exists(self.path + ".1"))
+        self.assertLessEqual(len(tracing.load_traces(self.path)), 6)
+
+    def test_router_stages_are_traced(self):
+        import command_router
+
+        with tempfile.TemporaryDirectory() as data, \
+                patch("usage_tracker.USAGE_PATH", os.path.join(data, "usage.json")), \
+                patch("command_router.get_weather"), \
+                patch("command_router.speak"):
+            command_router.process_command("what is the weather in Mumbai")
+        (record,) = tracing.load_traces(self.path)
+        names = {s["name"] for s in record["spans"]}
+        self.assertTrue({"router.dispatch", "nlp.process", "intent.weather"} <= names, names)
+        stages = {s["stage"] for s in tracing.summarize_traces([record])}
+        self.assertIn("command (whole)", stages)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import usage_tracker
+
+
+def read_events(path):
+    with open(path, "r") as f:
+        return json.load(f)["events"]
+
+
+class TestUsageBuffer(unittest.TestCase):
+
+    def setUp(self):
+        usage_tracker.flush_usage()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "usage_log.json")
+        self.patch = patch.object(usage_tracker, "USAGE_PATH", self.path)
+        self.patch.start()
+
+    def tearDown(self):
+        usage_tracker.flush_usage()
+        self.patch.stop()
+        self.tmp.cleanup()
+
+    def test_unflushed_events_are_summarized(self):
+        usage_tracker.log_event("app", "notepad")
+        usage_tracker.log_event("command", "open notepad")
+        self.assertFalse(os.path.exists(self.path))
+        self.assertIn("notepad (1)", usage_tracker.get_usage_summary())
+        self.assertEqual(usage_tracker.get_top_commands(), [("open notepad", 1)])
+
+    def test_flush_appends_to_the_log(self):
+        usage_tracker.log_event("app", "chrome")
+        self.assertEqual(usage_tracker.flush_usage(), 1)
+        usage_tracker.log_event("app", "calculator")
+        usage_tracker.flush_usage()
+        self.assertEqual([e["name"] for e in read_events(self.path)], ["chrome", "calculator"])
+        self.assertEqual(os.listdir(self.tmp.name), ["usage_log.json"])
+
+    def test_full_buffer_is_flushed_in_the_background(self):
+        with patch.object(usage_tracker, "FLUSH_EVENTS", 3):
+            for index in range(3):
+                usage_tracker.log_event("command", f"command {index}")
+            for _ in range(200):
+                if os.path.exists(self.path):
+                    break
+                threading.Event().wait(0.01)
+        self.assertEqual(len(read_events(self.path)), 3)
+
+    def test_events_go_to_the_log_they_were_logged_for(self):
+        other = os.path.join(self.tmp.name, "other.json")
+        usage_tracker.log_event("app", "first")
+        with patch.object(usage_tracker, "USAGE_PATH", other):
+            usage_tracker.log_event("app", "second")
+        usage_tracker.flush_usage()
+        self.assertEqual([e["name"] for e in read_events(self.path)], ["first"])
+        self.assertEqual([e["name"] for e in read_events(other)], ["second"])
+
+    def test_failed_write_keeps_events(self):
+        usage_tracker.log_event("app", "paint")
+        with patch.object(usage_tracker.os, "replace", side_effect=OSError("disk full")):
+            self.assertEqual(usage_tracker.flush_usage(), 0)
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(os.listdir(self.tmp.name), [])
+        self.assertEqual(usage_tracker.flush_usage(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
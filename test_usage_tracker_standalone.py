@@ -1,6 +1,6 @@
 import os
 import json
-from usage_tracker import log_event, get_usage_summary, USAGE_PATH
+from usage_tracker import flush_usage, log_event, get_usage_summary, USAGE_PATH
 
 def test_usage_tracker():
     print("--- Testing usage_tracker.py ---")
@@ -9,6 +9,7 @@ def test_usage_tracker():
     test_app = "TestApp_123"
     print(f"Logging test event: {test_app}...")
     log_event("app", test_app)
+    flush_usage()
     
     # 2. Check if usage_log.json was updated
     if os.path.exists(USAGE_PATH):
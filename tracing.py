@@ -0,0 +1,185 @@
+import argparse
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+
+TRACE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "traces.jsonl")
+# The trace file is rolled over to .1, .2, ... once it grows past this size
+TRACE_MAX_BYTES = 5 * 1024 * 1024
+TRACE_BACKUPS = 2
+
+_enabled = os.getenv("ASSIP_TRACE", "").strip().lower() in ("1", "true", "yes")
+_current = contextvars.ContextVar("assip_trace", default=None)
+_write_lock = threading.Lock()
+
+
+def set_tracing(enabled):
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def is_tracing():
+    return _enabled
+
+
+def current_trace_id():
+    trace = _current.get()
+    return trace["trace_id"] if trace else None
+
+
+@contextmanager
+def start_trace(name, parent_id=None):
+    """Collect the spans of one unit of work (a command) and write them out at the end"""
+    if not _enabled or _current.get() is not None:
+        yield
+        return
+    trace = {
+        "trace_id": uuid.uuid4().hex[:12],
+        "name": name,
+        "started": time.perf_counter(),
+        "depth": 0,
+        "spans": [],
+    }
+    if parent_id:
+        trace["parent_id"] = parent_id
+    token = _current.set(trace)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+        _write_trace(trace, time.perf_counter() - trace["started"])
+
+
+@contextmanager
+def span(name):
+    """Time a stage of the current trace; does nothing outside a trace.
+
+    Works as a context manager and as a function decorator.
+    """
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    trace["depth"] += 1
+    try:
+        yield
+    finally:
+        trace["depth"] -= 1
+        trace["spans"].append(
+            {
+                "name": name,
+                "start_ms": round((started - trace["started"]) * 1000, 3),
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                "depth": trace["depth"],
+            }
+        )
+
+
+def _rollover(path):
+    for index in range(TRACE_BACKUPS, 0, -1):
+        source = path if index == 1 else f"{path}.{index - 1}"
+        if os.path.exists(source):
+            os.replace(source, f"{path}.{index}")
+
+
+def _write_trace(trace, duration):
+    record = {
+        "trace_id": trace["trace_id"],
+        "name": trace["name"],
+        "timestamp": time.time(),
+        "duration_ms": round(duration * 1000, 3),
+        "spans": sorted(trace["spans"], key=lambda s: s["start_ms"]),
+    }
+    if "parent_id" in trace:
+        record["parent_id"] = trace["parent_id"]
+    line = json.dumps(record) + "\n"
+    try:
+        with _write_lock:
+            if os.path.exists(TRACE_PATH) and os.path.getsize(TRACE_PATH) + len(line) > TRACE_MAX_BYTES:
+                _rollover(TRACE_PATH)
+            with open(TRACE_PATH, "a") as f:
+                f.write(line)
+    except OSError as e:
+        print(f"Warning: Could not write trace: {e}")
+
+
+def load_traces(path=None):
+    """Traces from the trace file and its backups, oldest first"""
+    path = path or TRACE_PATH
+    traces = []
+    for index in range(TRACE_BACKUPS, -1, -1):
+        file_path = path if index == 0 else f"{path}.{index}"
+        if not os.path.exists(file_path):
+            continue
+        with open(file_path, "r") as f:
+            for line in f:
+                try:
+                    traces.append(json.loads(line))
+                except ValueError:
+                    continue
+    return traces
+
+
+def summarize_traces(traces):
+    """Per-stage count, total, mean, p95 and max in ms, slowest total first"""
+    durations = {}
+    for trace in traces:
+        durations.setdefault(f"{trace['name']} (whole)", []).append(trace["duration_ms"])
+        for item in trace.get("spans", []):
+            durations.setdefault(item["name"], []).append(item["duration_ms"])
+    stages = []
+    for name, values in durations.items():
+        values = sorted(values)
+        stages.append(
+            {
+                "stage": name,
+                "count": len(values),
+                "total_ms": round(sum(values), 3),
+                "mean_ms": round(sum(values) / len(values), 3),
+                "p95_ms": values[min(len(values) - 1, int(len(values) * 0.95))],
+                "max_ms": values[-1],
+            }
+        )
+    return sorted(stages, key=lambda s: s["total_ms"], reverse=True)
+
+
+def print_summary(traces, top=15):
+    stages = summarize_traces(traces)
+    print(f"{len(traces)} traces")
+    print(f"{'stage':<36} {'count':>7} {'total ms':>11} {'mean ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for stage in stages[:top]:
+        print(
+            f"{stage['stage']:<36} {stage['count']:>7} {stage['total_ms']:>11.1f} "
+            f"{stage['mean_ms']:>9.2f} {stage['p95_ms']:>9.2f} {stage['max_ms']:>9.2f}"
+        )
+    slowest = sorted(traces, key=lambda t: t["duration_ms"], reverse=True)[:5]
+    if slowest:
+        print("\nSlowest traces:")
+    for trace in slowest:
+        spans = sorted(trace.get("spans", []), key=lambda s: s["duration_ms"], reverse=True)[:3]
+        stages_text = ", ".join(f"{s['name']} {s['duration_ms']:.1f}ms" for s in spans)
+        print(f"  {trace['trace_id']} {trace['name']} {trace['duration_ms']:.1f}ms: {stages_text}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize ASSIP command traces")
+    parser.add_argument("--path", default=TRACE_PATH)
+    parser.add_argument("--top", type=int, default=15, help="number of stages to show")
+    args = parser.parse_args(argv)
+    traces = load_traces(args.path)
+    if not traces:
+        print(f"No traces in {args.path}. Run the assistant with ASSIP_TRACE=1 to record some.")
+        return 1
+    print_summary(traces, args.top)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,37 @@
+import atexit
 import json
 import os
+import tempfile
+import threading
 from datetime import datetime
 
+from tracing import span
+
 
 USAGE_PATH = os.path.join(os.path.dirname(__file__), "usage_log.json")
+# Events are buffered in memory and written by a background thread once this
+# many are waiting, or FLUSH_INTERVAL seconds after the last write
+FLUSH_EVENTS = 50
+FLUSH_INTERVAL = 5.0
+
+# Unwritten events per log file, so events logged while USAGE_PATH is pointed
+# elsewhere (tests, headless --data-dir) end up in the right file
+_pending = {}
+_pending_count = 0
+_pending_lock = threading.Lock()
+# Held for a whole load-append-replace cycle; readers take it to see a consistent log
+_flush_lock = threading.Lock()
+_wake = threading.Event()
+_flusher = None
 
 
-def _load_usage():
-    if not os.path.exists(USAGE_PATH):
+@span("usage.load")
+def _load_usage(path=None):
+    path = path or USAGE_PATH
+    if not os.path.exists(path):
         return {"events": []}
     try:
-        with open(USAGE_PATH, "r") as f:
+        with open(path, "r") as f:
             data = json.load(f)
         if isinstance(data, dict) and "events" in data and isinstance(data["events"], list):
             return data
@@ -19,26 +40,112 @@ def _load_usage():
     return {"events": []}
 
 
-def _save_usage(data):
-    with open(USAGE_PATH, "w") as f:
-        json.dump(data, f, indent=2)
+@span("usage.save")
+def _save_usage(data, path=None):
+    """Write the log to a temporary file and swap it in, so a crash never leaves half a file"""
+    path = path or USAGE_PATH
+    fd, tmp_path = tempfile.mkstemp(prefix=".usage_log.", suffix=".tmp", dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _take_pending():
+    global _pending_count
+    with _pending_lock:
+        pending = dict(_pending)
+        _pending.clear()
+        _pending_count = 0
+    return pending
+
+
+def _requeue(path, events):
+    global _pending_count
+    with _pending_lock:
+        _pending[path] = events + _pending.get(path, [])
+        _pending_count += len(events)
+
+
+def flush_usage():
+    """Write buffered events to their log files; returns how many were written"""
+    written = 0
+    with _flush_lock:
+        for path, events in _take_pending().items():
+            if not os.path.isdir(os.path.dirname(os.path.abspath(path))):
+                # The folder of a temporary log is gone; nothing to write to
+                continue
+            try:
+                data = _load_usage(path)
+                data["events"].extend(events)
+                _save_usage(data, path)
+                written += len(events)
+            except OSError as e:
+                print(f"Warning: Could not save usage log: {e}")
+                _requeue(path, events)
+    return written
+
+
+def _flush_loop():
+    while True:
+        _wake.wait(FLUSH_INTERVAL)
+        _wake.clear()
+        if _pending_count:
+            flush_usage()
+
+
+def _start_flusher():
+    global _flusher
+    with _pending_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_loop, name="assip-usage-flush", daemon=True)
+            _flusher.start()
 
 
 def log_event(event_type, name):
-    data = _load_usage()
-    data["events"].append(
-        {
-            "event_type": str(event_type),
-            "name": str(name),
-            "timestamp": datetime.now().isoformat(),
-        }
-    )
-    _save_usage(data)
+    global _pending_count
+    event = {
+        "event_type": str(event_type),
+        "name": str(name),
+        "timestamp": datetime.now().isoformat(),
+    }
+    if _flusher is None:
+        _start_flusher()
+    with _pending_lock:
+        _pending.setdefault(USAGE_PATH, []).append(event)
+        _pending_count += 1
+        full = _pending_count >= FLUSH_EVENTS
+    if full:
+        _wake.set()
+
+
+def _events():
+    """Logged events including the ones not written yet"""
+    with _flush_lock:
+        events = _load_usage()["events"]
+        with _pending_lock:
+            events.extend(_pending.get(USAGE_PATH, []))
+    return events
+
+
+def get_top_commands(limit=None):
+    counts = {}
+    for event in _events():
+        if event.get("event_type") == "command":
+            name = event.get("name", "")
+            counts[name] = counts.get(name, 0) + 1
+    top = sorted(counts.items(), key=lambda x: x[1], reverse=True)
+    return top[:limit] if limit is not None else top
 
 
 def get_usage_summary():
-    data = _load_usage()
-    events = data["events"]
+    events = _events()
     if not events:
         return "No usage activity recorded yet."
     app_counts = {}
@@ -60,3 +167,6 @@ def get_usage_summary():
     if not parts:
         return "No summarized usage available yet."
     return " | ".join(parts)
+
+
+atexit.register(flush_usage)